@@ -1,24 +1,89 @@
 """Main agentic system for Facebook ads analysis."""
+import asyncio
+import importlib.util
 import json
-from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema import HumanMessage, SystemMessage
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, AsyncIterator, Callable, Coroutine, Optional, Tuple, Type
+import pandas as pd
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from pydantic import BaseModel
 from config import (
     OPENAI_API_KEY, 
     OPENAI_MODEL,
+    OPENAI_STAGE_MODELS,
+    OPENAI_FALLBACK_MODEL,
+    ROUTING_LARGE_PROMPT_TOKENS,
+    ROUTING_LARGE_PROMPT_MODEL,
+    MODEL_PRICES,
     LANGFUSE_PUBLIC_KEY,
     LANGFUSE_SECRET_KEY,
-    LANGFUSE_HOST
+    LANGFUSE_HOST,
+    DATA_CHUNKSIZE,
+    DATA_OPTIMIZE_DTYPES,
+    DATA_CACHE_ENABLED,
+    DATA_CACHE_DIR,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_PATH,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_THRESHOLDS,
+    SIGNIFICANCE_ENABLED,
+    SIGNIFICANCE_ALPHA,
+    SIGNIFICANCE_MIN_EFFECT,
+    SIGNIFICANCE_BOOTSTRAP_RESAMPLES,
+    SIGNIFICANCE_MAX_FINDINGS,
+    ANOMALY_Z_THRESHOLD,
+    COMPACT_PROMPTS,
+    PROMPT_TOKEN_BUDGETS,
+    INCREMENTAL_STORE_PATH,
+    REPORT_STREAM_FLUSH_CHARS,
+    STRUCTURED_OUTPUT_JSON_MODE,
+    STRUCTURED_OUTPUT_MAX_RETRIES,
+    METRICS_PATH,
+    METRICS_FORMAT,
+    MAP_REDUCE_CONCURRENCY,
+    SEGMENT_INSIGHTS_PATH,
+    CREATIVE_VARIANTS,
+    CREATIVE_DEDUP_THRESHOLD,
+    CREATIVE_MAX_RECOMMENDATIONS,
+    AGENT_MAX_TOOL_CALLS,
+    AGENT_MAX_TOKENS,
+    AGENT_MAX_RESULT_ROWS
 )
 from data_loader import DataLoader
+from analytics import format_metrics_summary
+from prompt_budget import count_message_tokens
+from incremental import IncrementalStore, format_daily_history, format_delta_summary
+from llm_cache import LLMResponseCache
+from pipeline import Stage, StageResult, run_stages, summarize_timings
+from io_utils import atomic_write
+from output_schemas import InsightsOutput, CreativesOutput
+from structured_output import StructuredOutputParser, ParseOutcome
+from instrumentation import create_instrumentation
+from map_reduce import SegmentInsightStore, partition, segment_fingerprint
+from checkpoints import CheckpointStore, fingerprint
+from routing import ModelRouter, Route, RoutingStats
+from semantic_cache import SemanticCache, adapt_insights, summary_features
+from significance import format_significance
+from creative_variants import merge_variants
+from tools import TOOL_SPECS, DataTools, ToolBudgetExceeded
 
-# Optional Langfuse import
-try:
-    from langfuse.decorators import observe
-    LANGFUSE_AVAILABLE = True
-except ImportError:
-    LANGFUSE_AVAILABLE = False
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+# Optional Langfuse import, skipped without credentials since tracing would be off anyway
+LANGFUSE_AVAILABLE = importlib.util.find_spec("langfuse") is not None
+observe = None
+if LANGFUSE_AVAILABLE and LANGFUSE_PUBLIC_KEY and LANGFUSE_SECRET_KEY:
+    try:
+        from langfuse.decorators import observe
+    except ImportError:
+        LANGFUSE_AVAILABLE = False
+if observe is None:
     # Create a no-op decorator if Langfuse is not available
     def observe(*args, **kwargs):
         def decorator(func):
@@ -26,21 +91,222 @@ except ImportError:
         return decorator
 
 
+# JSON layout of the insights stage output, shared by the single-pass and map-reduce prompts
+INSIGHTS_FORMAT = """{{
+    "key_insights": [
+        {{
+            "insight": "Description of the insight",
+            "metric": "Relevant metric name",
+            "value": "Metric value",
+            "impact": "high|medium|low",
+            "recommendation": "Actionable recommendation"
+        }}
+    ],
+    "performance_summary": {{
+        "top_performers": ["List of top performing campaigns/ads"],
+        "underperformers": ["List of underperforming campaigns/ads"],
+        "trends": ["Key trends observed"]
+    }},
+    "opportunities": [
+        {{
+            "opportunity": "Description of opportunity",
+            "potential_impact": "Expected impact",
+            "action_items": ["List of action items"]
+        }}
+    ]
+}}"""
+
+
+def create_llm(**overrides: Any) -> "ChatOpenAI":
+    """Create the chat model client used by the analyst.
+    
+    A single client can be shared by many analysts so they reuse its HTTP
+    connection pool.
+    
+    Args:
+        **overrides: Extra keyword arguments passed to ``ChatOpenAI``
+        
+    Returns:
+        Configured ChatOpenAI client
+    """
+    # Imported here: the OpenAI client stack is the slowest import and offline runs never need it
+    from langchain_openai import ChatOpenAI
+    
+    kwargs = {"model": OPENAI_MODEL, "temperature": 0.7, "api_key": OPENAI_API_KEY}
+    kwargs.update(overrides)
+    return ChatOpenAI(**kwargs)
+
+
+def create_data_loader(data_path: str, instrumentation: Any = None) -> DataLoader:
+    """Create a data loader with the configured chunking, cache and dtype settings."""
+    return DataLoader(
+        data_path,
+        chunksize=DATA_CHUNKSIZE,
+        cache_dir=DATA_CACHE_DIR if DATA_CACHE_ENABLED else None,
+        instrumentation=instrumentation,
+        optimize_dtypes=DATA_OPTIMIZE_DTYPES
+    )
+
+
+def significance_options() -> Dict[str, Any]:
+    """Settings of ``DataLoader.get_significance_summary`` configured by the SIGNIFICANCE_* variables."""
+    return {
+        "alpha": SIGNIFICANCE_ALPHA,
+        "min_effect": SIGNIFICANCE_MIN_EFFECT,
+        "resamples": SIGNIFICANCE_BOOTSTRAP_RESAMPLES,
+        "z_threshold": ANOMALY_Z_THRESHOLD
+    }
+
+
+def create_router(**overrides: Any) -> ModelRouter:
+    """Create the per-stage model router configured by the OPENAI_MODEL_* settings.
+    
+    Clients are created on first use, one per model, and shared by every
+    analyst using the router.
+    
+    Args:
+        **overrides: Extra keyword arguments passed to each ``ChatOpenAI``
+        
+    Returns:
+        ModelRouter with fallback, the large-prompt rule and the price table
+    """
+    return ModelRouter(
+        OPENAI_STAGE_MODELS,
+        OPENAI_MODEL,
+        fallback_model=OPENAI_FALLBACK_MODEL,
+        large_prompt_tokens=ROUTING_LARGE_PROMPT_TOKENS,
+        large_prompt_model=ROUTING_LARGE_PROMPT_MODEL,
+        client_factory=lambda model: create_llm(model=model, **overrides),
+        prices=MODEL_PRICES
+    )
+
+
+def _run_blocking(coroutine: Coroutine[Any, Any, Any], async_api: str) -> Any:
+    """Run the coroutine behind a blocking method to completion.
+    
+    Args:
+        coroutine: Coroutine to run on a new event loop
+        async_api: Name of the async method callers in an event loop should await instead
+        
+    Raises:
+        RuntimeError: If called from a running event loop (e.g. a notebook or
+            an async service), which ``asyncio.run`` cannot nest in
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    coroutine.close()
+    raise RuntimeError(f"Cannot block inside a running event loop; await {async_api}() instead "
+                       f"(or arun_full_analysis() for the whole pipeline)")
+
+
 class AgenticFBAnalyst:
     """Agentic system for analyzing Facebook ads and generating insights."""
     
-    def __init__(self, data_path: str):
+    def __init__(self, data_path: str, use_llm_cache: bool = True, llm: Optional["ChatOpenAI"] = None,
+                 incremental: bool = False, instrumentation: Any = None,
+                 map_reduce_dimension: Optional[str] = None, checkpoint_dir: Optional[str] = None,
+                 resume: bool = False, router: Optional[ModelRouter] = None,
+                 data_loader: Optional[DataLoader] = None, semantic_cache: Optional[bool] = None,
+                 agent_tools: bool = False, creative_variants: Optional[int] = None):
         """Initialize the agentic analyst.
         
         Args:
             data_path: Path to the CSV file containing FB ads data
+            use_llm_cache: Reuse cached LLM responses for identical prompts
+            llm: Chat model client to use for every stage; if omitted, stages
+                are routed to their configured models (see ``create_router``)
+            incremental: Only ingest rows appended since the last run and analyze
+                day-over-day/week-over-week changes from the local aggregate store
+            instrumentation: Per-stage metrics recorder; defaults to the one
+                configured by METRICS_PATH (a no-op when unset)
+            map_reduce_dimension: If set, generate insights per value of this
+                column in parallel and merge them (see ``aanalyze_insights_map_reduce``)
+            checkpoint_dir: If set, write insights.json, creatives.json and
+                report.md here as soon as each stage completes
+            resume: Reuse checkpointed stage outputs whose inputs are unchanged
+                instead of calling the model again
+            router: Per-stage model router to use instead of ``llm`` (e.g. one
+                shared by many analysts)
+            data_loader: Loader for ``data_path`` whose data is already in
+                memory (e.g. kept warm by the service); one is created if omitted
+            semantic_cache: Reuse insights and creatives of accounts with
+                near-identical data (None = SEMANTIC_CACHE_ENABLED)
+            agent_tools: Give the insights model tools to fetch data slices on
+                demand instead of the data summary (see ``analyze_insights_with_tools``)
+            creative_variants: Creatives calls made concurrently and merged
+                (None = CREATIVE_VARIANTS; see ``agenerate_creative_variants``)
         """
-        self.data_loader = DataLoader(data_path)
-        self.llm = ChatOpenAI(
-            model=OPENAI_MODEL,
-            temperature=0.7,
-            api_key=OPENAI_API_KEY
-        )
+        if incremental and map_reduce_dimension:
+            raise ValueError("Map-reduce insights need the full dataset and cannot be combined with incremental mode")
+        if agent_tools and (incremental or map_reduce_dimension):
+            raise ValueError("Tool-calling insights cannot be combined with incremental or map-reduce mode")
+        self.instrumentation = instrumentation or create_instrumentation(METRICS_PATH, METRICS_FORMAT)
+        self.data_loader = data_loader or create_data_loader(data_path, self.instrumentation)
+        # A preloaded loader is kept as is; otherwise every run re-reads the file
+        self.preloaded = data_loader is not None
+        if router is None:
+            router = ModelRouter.single(llm) if llm is not None else create_router()
+        self.router = router
+        # The report model; per-stage calls go through the router
+        self.llm = llm if llm is not None else router.client(router.model_for("report"))
+        self.routing_stats = RoutingStats(router)
+        
+        # Compact prompts use TSV tables and minified JSON fitted to per-stage token budgets
+        self.compact_prompts = COMPACT_PROMPTS
+        self.prompt_tokens: Dict[str, int] = {}
+        
+        self.incremental_store = IncrementalStore(INCREMENTAL_STORE_PATH) if incremental else None
+        
+        self.map_reduce_dimension = map_reduce_dimension
+        self.segment_store = SegmentInsightStore(SEGMENT_INSIGHTS_PATH) if map_reduce_dimension else None
+        self.map_reduce_stats: Dict[str, Any] = {}
+        
+        self.checkpoints = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+        self.resume = resume
+        self.resumed_stages: List[str] = []
+        
+        self.stream_metrics: Dict[str, Any] = {}
+        self.parse_stats: Dict[str, Dict[str, int]] = {}
+        
+        # Cached responses make re-runs on unchanged data free and let a
+        # failed run resume from the last completed stage
+        if use_llm_cache and LLM_CACHE_ENABLED:
+            self.llm_cache = LLMResponseCache(
+                LLM_CACHE_PATH,
+                ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                max_entries=LLM_CACHE_MAX_ENTRIES
+            )
+        else:
+            self.llm_cache = None
+        
+        # Near-identical accounts reuse each other's insights and creatives; the
+        # features come from a full summary, which incremental runs do not build
+        if semantic_cache is None:
+            semantic_cache = SEMANTIC_CACHE_ENABLED
+        if semantic_cache and use_llm_cache and not incremental:
+            self.semantic_cache = SemanticCache(SEMANTIC_CACHE_PATH, max_entries=SEMANTIC_CACHE_MAX_ENTRIES)
+        else:
+            self.semantic_cache = None
+        self.semantic_stats: Dict[str, Dict[str, Any]] = {}
+        self._features: Optional[Dict[str, float]] = None
+        
+        # Only differences that pass significance tests reach the prompts
+        self.significance_enabled = SIGNIFICANCE_ENABLED
+        self.significance_text = ""
+        self.significance_stats: Dict[str, Any] = {}
+        
+        # The model pulls the slices it needs through tools, within a per-run budget
+        self.data_tools = DataTools(self.data_loader, AGENT_MAX_TOOL_CALLS, AGENT_MAX_RESULT_ROWS,
+                                    COMPACT_PROMPTS) if agent_tools else None
+        
+        # Several creatives calls at once, deduplicated and ranked locally
+        self.creative_variants = CREATIVE_VARIANTS if creative_variants is None else creative_variants
+        self.variant_stats: Dict[str, Any] = {}
+        
+        # Fingerprint of the data, model and prompt settings the insights were produced from
+        self.input_fingerprint = ""
         
         # Initialize Langfuse if credentials are provided
         if LANGFUSE_AVAILABLE and LANGFUSE_PUBLIC_KEY and LANGFUSE_SECRET_KEY:
@@ -62,79 +328,521 @@ class AgenticFBAnalyst:
             else:
                 print("ℹ Langfuse credentials not provided - tracing disabled")
     
+    def _cache_key(self, messages: List[BaseMessage], model: str) -> str:
+        """Build the LLM cache key for a request to ``model``."""
+        llm = self.router.client(model)
+        return LLMResponseCache.make_key(
+            getattr(llm, "model_name", None),
+            getattr(llm, "temperature", None),
+            messages
+        )
+    
+    def _route(self, stage: str, messages: List[BaseMessage]) -> Route:
+        """Count and report the tokens sent for a stage's prompt and choose its model."""
+        tokens = count_message_tokens(messages, self.router.model_for(stage))
+        self.prompt_tokens[stage] = self.prompt_tokens.get(stage, 0) + tokens
+        route = self.router.route(stage, tokens)
+        print(f"ℹ {stage} prompt: {tokens} tokens → {route.model}"
+              f"{f' ({route.reason})' if route.reason != 'stage' else ''}")
+        return route
+    
+    def _record_route(self, route: Route, model: str, started: float, response: Any):
+        """Add a model call's latency, tokens and cost to the routing statistics."""
+        self.routing_stats.record(route.stage, model, time.perf_counter() - started,
+                                  getattr(response, "usage_metadata", None), fallback=model != route.model)
+    
+    def _invoke(self, stage: str, messages: List[BaseMessage], json_mode: bool = False,
+                use_cache: bool = True) -> BaseMessage:
+        """Call the stage's routed model, serving identical requests from the response cache.
+        
+        Args:
+            stage: Stage name used for routing and logging
+            messages: Prompt messages
+            json_mode: Request JSON output from the model
+            use_cache: Read from the cache; the response is still written to it
+        
+        Returns:
+            The response; ``response_metadata["routed_model"]`` names the model
+            that produced it (the fallback, after a fallback)
+        """
+        route = self._route(stage, messages)
+        if self.llm_cache and use_cache:
+            key = self._cache_key(messages, route.model)
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                print(f"✓ {stage} served from LLM cache")
+                self.instrumentation.record_llm_call(cached=True)
+                return AIMessage(content=cached, response_metadata={"routed_model": route.model})
+        
+        started = time.perf_counter()
+        response, model = self.router.invoke(route, messages, json_mode)
+        self._record_route(route, model, started, response)
+        self.instrumentation.record_llm_call(getattr(response, "usage_metadata", None))
+        response.response_metadata["routed_model"] = model
+        if self.llm_cache:
+            # Keyed on the model that answered: after a fallback, the next run retries the primary
+            self.llm_cache.put(self._cache_key(messages, model), model, response.content)
+        return response
+    
+    async def _ainvoke(self, stage: str, messages: List[BaseMessage], json_mode: bool = False,
+                       use_cache: bool = True) -> BaseMessage:
+        """Async version of ``_invoke``."""
+        route = self._route(stage, messages)
+        if self.llm_cache and use_cache:
+            key = self._cache_key(messages, route.model)
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                print(f"✓ {stage} served from LLM cache")
+                self.instrumentation.record_llm_call(cached=True)
+                return AIMessage(content=cached, response_metadata={"routed_model": route.model})
+        
+        started = time.perf_counter()
+        response, model = await self.router.ainvoke(route, messages, json_mode)
+        self._record_route(route, model, started, response)
+        self.instrumentation.record_llm_call(getattr(response, "usage_metadata", None))
+        response.response_metadata["routed_model"] = model
+        if self.llm_cache:
+            # Keyed on the model that answered: after a fallback, the next run retries the primary
+            self.llm_cache.put(self._cache_key(messages, model), model, response.content)
+        return response
+    
+    def _record_parse(self, stage: str, outcome: ParseOutcome) -> ParseOutcome:
+        """Update the parse statistics for a stage response."""
+        stats = self.parse_stats.setdefault(stage, {
+            "responses": 0, "parse_failures": 0, "salvaged": 0, "repair_calls": 0,
+            "repaired": 0, "retries": 0, "dropped_elements": 0
+        })
+        stats["responses"] += 1
+        if outcome.ok:
+            return outcome
+        stats["parse_failures"] += 1
+        stats["salvaged"] += int(outcome.salvaged)
+        if outcome.data is None:
+            print(f"⚠ {stage}: response contained no usable JSON")
+        else:
+            stats["repair_calls"] += 1
+            print(f"⚠ {stage}: {len(outcome.problems)} invalid parts"
+                  f"{' and truncated/malformed JSON' if outcome.broken_tail else ''}, requesting targeted repair")
+        return outcome
+    
+    def _finish_structured(self, stage: str, messages: List[BaseMessage], parser: StructuredOutputParser,
+                           outcome: ParseOutcome, first_ok: bool, repaired: bool,
+                           model: Optional[str] = None) -> Dict[str, Any]:
+        """Validate the final outcome and cache the clean result in place of a broken response.
+        
+        Args:
+            model: Model that produced the response; the result is cached under
+                its key, like the response itself (None = not cached)
+        """
+        stats = self.parse_stats[stage]
+        stats["repaired"] += int(repaired and outcome.ok)
+        result, dropped = parser.finalize(outcome)
+        stats["dropped_elements"] += dropped
+        if self.llm_cache and not first_ok and model:
+            # Later runs get the repaired output instead of repeating the repair
+            self.llm_cache.put(self._cache_key(messages, model), model, json.dumps(result, ensure_ascii=False))
+        return result
+    
+    def _invoke_structured(self, stage: str, messages: List[BaseMessage],
+                           output_model: Type[BaseModel]) -> Dict[str, Any]:
+        """Call the LLM for a JSON stage and validate the response against ``output_model``.
+        
+        Truncated or malformed JSON is salvaged up to its last complete element
+        and only the broken parts are sent back to the model for repair. The
+        whole stage is re-requested only if no JSON object can be recovered.
+        """
+        with self.instrumentation.stage(stage):
+            parser = StructuredOutputParser(output_model)
+            for attempt in range(STRUCTURED_OUTPUT_MAX_RETRIES + 1):
+                if attempt:
+                    self.parse_stats[stage]["retries"] += 1
+                    self.instrumentation.record_retry()
+                response = self._invoke(stage, messages, json_mode=STRUCTURED_OUTPUT_JSON_MODE,
+                                        use_cache=not attempt)
+                outcome = self._record_parse(stage, parser.parse(response.content))
+                if outcome.data is not None:
+                    break
+            first_ok, repaired = outcome.ok, False
+            if outcome.data is not None and not outcome.ok:
+                self.instrumentation.record_retry()
+                repair = self._invoke(f"{stage} repair", parser.repair_messages(outcome),
+                                      json_mode=STRUCTURED_OUTPUT_JSON_MODE, use_cache=False)
+                outcome, repaired = parser.apply_repair(outcome, repair.content), True
+            return self._finish_structured(stage, messages, parser, outcome, first_ok, repaired,
+                                           response.response_metadata.get("routed_model"))
+    
+    async def _ainvoke_structured(self, stage: str, messages: List[BaseMessage],
+                                  output_model: Type[BaseModel]) -> Dict[str, Any]:
+        """Async version of ``_invoke_structured``."""
+        with self.instrumentation.stage(stage):
+            parser = StructuredOutputParser(output_model)
+            for attempt in range(STRUCTURED_OUTPUT_MAX_RETRIES + 1):
+                if attempt:
+                    self.parse_stats[stage]["retries"] += 1
+                    self.instrumentation.record_retry()
+                response = await self._ainvoke(stage, messages, json_mode=STRUCTURED_OUTPUT_JSON_MODE,
+                                               use_cache=not attempt)
+                outcome = self._record_parse(stage, parser.parse(response.content))
+                if outcome.data is not None:
+                    break
+            first_ok, repaired = outcome.ok, False
+            if outcome.data is not None and not outcome.ok:
+                self.instrumentation.record_retry()
+                repair = await self._ainvoke(f"{stage} repair", parser.repair_messages(outcome),
+                                             json_mode=STRUCTURED_OUTPUT_JSON_MODE, use_cache=False)
+                outcome, repaired = parser.apply_repair(outcome, repair.content), True
+            return self._finish_structured(stage, messages, parser, outcome, first_ok, repaired,
+                                           response.response_metadata.get("routed_model"))
+    
+    def _dump_json(self, value: Dict[str, Any]) -> str:
+        """Serialize upstream stage output for embedding in a prompt."""
+        if self.compact_prompts:
+            return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+        return json.dumps(value, indent=2)
+    
+    def parse_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Parse statistics per stage with the failure rate of first responses."""
+        return {
+            stage: {**stats, "failure_rate": round(stats["parse_failures"] / stats["responses"], 3)
+                    if stats["responses"] else 0.0}
+            for stage, stats in self.parse_stats.items()
+        }
+    
+    def _insights_messages(self, data_summary: str, metrics_summary: str = "") -> List[BaseMessage]:
+        """Build the messages for the insights stage."""
+        metrics_block = ""
+        if metrics_summary:
+            # Numbers come from the local metric engine; the model only writes the narrative
+            metrics_block = """
+
+Precomputed metrics (aggregated locally over every row - treat these numbers as ground truth and base top performers, underperformers and trends on them):
+{metrics_summary}"""
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are an expert Facebook ads analyst. Your task is to analyze Facebook ads performance data and generate actionable insights.
+
+Analyze the provided data and generate insights in the following JSON format:
+""" + INSIGHTS_FORMAT),
+            ("human", """Please analyze the following Facebook ads data and generate comprehensive insights:
+
+{data_summary}""" + metrics_block + """
+
+Provide your analysis in valid JSON format only, no additional text.""")
+        ])
+        
+        # Data goes in as template variables so braces in it are not parsed as placeholders
+        if metrics_summary:
+            return prompt.format_messages(data_summary=data_summary, metrics_summary=metrics_summary)
+        return prompt.format_messages(data_summary=data_summary)
+    
     @observe()
-    def analyze_insights(self, data_summary: str) -> Dict[str, Any]:
+    def analyze_insights(self, data_summary: str, metrics_summary: str = "") -> Dict[str, Any]:
         """Generate insights from the Facebook ads data.
         
         Args:
             data_summary: Formatted string containing data summary
+            metrics_summary: Precomputed metrics from ``analytics.format_metrics_summary``
             
         Returns:
             Dictionary containing insights
         """
+        return self._invoke_structured("insights", self._insights_messages(data_summary, metrics_summary),
+                                       InsightsOutput)
+    
+    @observe()
+    async def aanalyze_insights(self, data_summary: str, metrics_summary: str = "") -> Dict[str, Any]:
+        """Async version of ``analyze_insights``."""
+        return await self._ainvoke_structured("insights", self._insights_messages(data_summary, metrics_summary),
+                                              InsightsOutput)
+    
+    def _agent_messages(self, overview: str) -> List[BaseMessage]:
+        """Build the opening messages of the tool-calling insights stage."""
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert Facebook ads analyst. Your task is to analyze Facebook ads performance data and generate actionable insights.
 
-Analyze the provided data and generate insights in the following JSON format:
-{{
-    "key_insights": [
-        {{
-            "insight": "Description of the insight",
-            "metric": "Relevant metric name",
-            "value": "Metric value",
-            "impact": "high|medium|low",
-            "recommendation": "Actionable recommendation"
-        }}
-    ],
-    "performance_summary": {{
-        "top_performers": ["List of top performing campaigns/ads"],
-        "underperformers": ["List of underperforming campaigns/ads"],
-        "trends": ["Key trends observed"]
-    }},
-    "opportunities": [
-        {{
-            "opportunity": "Description of opportunity",
-            "potential_impact": "Expected impact",
-            "action_items": ["List of action items"]
-        }}
-    ]
-}}"""),
-            ("human", f"""Please analyze the following Facebook ads data and generate comprehensive insights:
+You do not receive the data itself. Use the tools to fetch the aggregates, rankings, distributions and time windows you need; results are computed over every row. You have at most {max_calls} tool calls, so ask for several slices at once and do not repeat a question.
 
-{data_summary}
+When you have enough evidence, answer with the insights in the following JSON format:
+""" + INSIGHTS_FORMAT),
+            ("human", """Dataset overview:
 
-Provide your analysis in valid JSON format only, no additional text.""")
+{overview}
+
+Investigate the performance of these ads with the tools, then provide your analysis in valid JSON format only, no additional text.""")
         ])
+        return prompt.format_messages(overview=overview, max_calls=self.data_tools.max_calls)
+    
+    def _run_tool(self, call: Dict[str, Any], model: str) -> ToolMessage:
+        """Answer one tool call of the model, turning an exhausted budget into a message it can act on."""
+        try:
+            content = self.data_tools.call(call["name"], call["args"], model)
+        except ToolBudgetExceeded as e:
+            content = f"Error: {e}. Answer from the results you already have."
+        return ToolMessage(content=content, tool_call_id=call["id"])
+    
+    def _tool_round(self, stage: str, messages: List[BaseMessage]) -> Tuple[Route, bool]:
+        """Route the next call of a tool loop and decide whether it must be the final answer.
+        
+        Once the tool calls or the prompt tokens of the stage are used up,
+        the model is asked to answer and the tools are no longer offered.
+        """
+        final = self.data_tools.exhausted or self.prompt_tokens.get(stage, 0) >= AGENT_MAX_TOKENS
+        if final and isinstance(messages[-1], ToolMessage):
+            messages.append(HumanMessage(content="The data budget of this run is used up. "
+                                                 "Answer now in valid JSON format only, from the results you have."))
+        return self._route(stage, messages), final
+    
+    def _invoke_with_tools(self, stage: str, messages: List[BaseMessage]) -> BaseMessage:
+        """Call the model, running the tools it asks for, until it answers without tool calls.
         
-        messages = prompt.format_messages()
-        response = self.llm.invoke(messages)
+        The transcript grows with every round, so the LLM cache is not used.
         
-        # Parse JSON response
-        try:
-            insights = json.loads(response.content)
-        except json.JSONDecodeError:
-            # Try to extract JSON from response if wrapped in markdown
-            content = response.content
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            insights = json.loads(content.strip())
+        Returns:
+            The final response
+        """
+        while True:
+            route, final = self._tool_round(stage, messages)
+            started = time.perf_counter()
+            response, model = self.router.invoke(route, messages, json_mode=final and STRUCTURED_OUTPUT_JSON_MODE,
+                                                 tools=None if final else TOOL_SPECS)
+            self._record_route(route, model, started, response)
+            self.instrumentation.record_llm_call(getattr(response, "usage_metadata", None))
+            if final or not getattr(response, "tool_calls", None):
+                return response
+            messages.append(response)
+            messages.extend(self._run_tool(call, model) for call in response.tool_calls)
+    
+    async def _ainvoke_with_tools(self, stage: str, messages: List[BaseMessage]) -> BaseMessage:
+        """Async version of ``_invoke_with_tools``; tools run in a worker thread."""
+        while True:
+            route, final = self._tool_round(stage, messages)
+            started = time.perf_counter()
+            response, model = await self.router.ainvoke(route, messages,
+                                                        json_mode=final and STRUCTURED_OUTPUT_JSON_MODE,
+                                                        tools=None if final else TOOL_SPECS)
+            self._record_route(route, model, started, response)
+            self.instrumentation.record_llm_call(getattr(response, "usage_metadata", None))
+            if final or not getattr(response, "tool_calls", None):
+                return response
+            messages.append(response)
+            for call in response.tool_calls:
+                messages.append(await asyncio.to_thread(self._run_tool, call, model))
+    
+    def _finish_tool_answer(self, messages: List[BaseMessage], parser: StructuredOutputParser,
+                            outcome: ParseOutcome, repair: Optional[BaseMessage]) -> Dict[str, Any]:
+        """Validate the final answer of the tool loop, after a targeted repair if one was needed."""
+        if repair is not None:
+            outcome = parser.apply_repair(outcome, repair.content)
+        # first_ok=True: the transcript is specific to this run, so nothing is cached
+        return self._finish_structured("insights", messages, parser, outcome, True, repair is not None)
+    
+    @observe()
+    def analyze_insights_with_tools(self, overview: str) -> Dict[str, Any]:
+        """Generate insights with a model that fetches the data it needs through tools.
         
-        return insights
+        Args:
+            overview: Dataset overview from ``DataTools.overview``
+        
+        Returns:
+            Dictionary containing insights
+        """
+        with self.instrumentation.stage("insights"):
+            messages = self._agent_messages(overview)
+            response = self._invoke_with_tools("insights", messages)
+            parser = StructuredOutputParser(InsightsOutput)
+            outcome = self._record_parse("insights", parser.parse(response.content))
+            repair = None
+            if outcome.data is not None and not outcome.ok:
+                self.instrumentation.record_retry()
+                repair = self._invoke("insights repair", parser.repair_messages(outcome),
+                                      json_mode=STRUCTURED_OUTPUT_JSON_MODE, use_cache=False)
+            return self._finish_tool_answer(messages, parser, outcome, repair)
     
     @observe()
-    def generate_creatives(self, data_summary: str, insights: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate creative recommendations based on insights.
+    async def aanalyze_insights_with_tools(self, overview: str) -> Dict[str, Any]:
+        """Async version of ``analyze_insights_with_tools``."""
+        with self.instrumentation.stage("insights"):
+            messages = self._agent_messages(overview)
+            response = await self._ainvoke_with_tools("insights", messages)
+            parser = StructuredOutputParser(InsightsOutput)
+            outcome = self._record_parse("insights", parser.parse(response.content))
+            repair = None
+            if outcome.data is not None and not outcome.ok:
+                self.instrumentation.record_retry()
+                repair = await self._ainvoke("insights repair", parser.repair_messages(outcome),
+                                             json_mode=STRUCTURED_OUTPUT_JSON_MODE, use_cache=False)
+            return self._finish_tool_answer(messages, parser, outcome, repair)
+    
+    def _segment_jobs(self, dimension: str) -> List[Tuple[str, pd.DataFrame, str]]:
+        """Partition the loaded data by ``dimension`` and fingerprint each segment."""
+        if self.data_loader.df is None:
+            # Segments need the rows themselves, so streaming mode loads the file here
+            self.data_loader.load_data()
+        model = self.router.model_for("insights")
+        # Stored insights go stale when the model or the prompt changes, not only the rows
+        template = [message.content for message in self._insights_messages("", "")]
+        return [
+            (segment, rows, segment_fingerprint(rows, dimension, model, template))
+            for segment, rows in partition(self.data_loader.df, dimension)
+        ]
+    
+    def _segment_messages(self, dimension: str, segment: str, rows: pd.DataFrame) -> List[BaseMessage]:
+        """Build the insights messages for one segment, with its own summary and metrics."""
+        loader = DataLoader.from_dataframe(rows, f"{dimension}={segment}")
+        metrics_summary = format_metrics_summary(loader.get_metrics_summary())
+        header = f"Segment: {dimension} = {segment} (analyze only this segment)\n"
+        if not self.compact_prompts:
+            return self._insights_messages(header + loader.get_data_for_analysis(), metrics_summary)
+        model = self.router.model_for("insights")
+        budget = PROMPT_TOKEN_BUDGETS.get("insights")
+        overhead = count_message_tokens(self._insights_messages(header, metrics_summary), model)
+        data_summary = loader.get_compact_data_for_analysis(max(budget - overhead, 0) if budget else None, model)
+        return self._insights_messages(header + data_summary, metrics_summary)
+    
+    def _reduce_messages(self, dimension: str, segment_insights: List[Tuple[str, Dict[str, Any]]],
+                         metrics_summary: str = "") -> List[BaseMessage]:
+        """Build the messages that merge per-segment insights into one result."""
+        segments_str = "\n\n".join(
+            f"{dimension} = {segment}:\n{self._dump_json(insights)}" for segment, insights in segment_insights
+        )
+        metrics_block = ""
+        if metrics_summary:
+            metrics_block = """
+
+Precomputed metrics for the whole account (aggregated locally over every row - treat these numbers as ground truth):
+{metrics_summary}"""
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are an expert Facebook ads analyst. Insights were generated separately for each segment of the data; merge them into one set of actionable insights for the whole account.
+
+Compare segments against each other, merge duplicate findings, keep segment names where they matter and rank insights by impact.
+
+Return the merged insights in the following JSON format:
+""" + INSIGHTS_FORMAT),
+            ("human", """Insights per {dimension} segment:
+
+{segments}""" + metrics_block + """
+
+Provide the merged analysis in valid JSON format only, no additional text.""")
+        ])
+        
+        if metrics_summary:
+            return prompt.format_messages(dimension=dimension, segments=segments_str,
+                                          metrics_summary=metrics_summary)
+        return prompt.format_messages(dimension=dimension, segments=segments_str)
+    
+    async def _amap_segment(self, dimension: str, segment: str, rows: pd.DataFrame, fingerprint: str,
+                            semaphore: asyncio.Semaphore) -> Tuple[Dict[str, Any], bool]:
+        """Generate insights for one segment unless its stored insights are still current.
+        
+        Returns:
+            (segment insights, whether they were reused from the store)
+        """
+        source = self.data_loader.data_path
+        stored = self.segment_store.get(source, dimension, segment, fingerprint)
+        if stored is not None:
+            return stored, True
+        async with semaphore:
+            messages = await asyncio.to_thread(self._segment_messages, dimension, segment, rows)
+            insights = await self._ainvoke_structured(f"insights[{segment}]", messages, InsightsOutput)
+        self.segment_store.put(source, dimension, segment, fingerprint, insights)
+        return insights, False
+    
+    async def _areduce(self, dimension: str, segment_insights: List[Tuple[str, Dict[str, Any]]],
+                       metrics_summary: str, stage: str = "insights") -> Dict[str, Any]:
+        """Merge segment insights, reducing in halves when they overflow the insights budget."""
+        if len(segment_insights) == 1:
+            return segment_insights[0][1]
+        messages = self._reduce_messages(dimension, segment_insights, metrics_summary)
+        budget = PROMPT_TOKEN_BUDGETS.get("insights")
+        model = self.router.model_for("insights")
+        if budget and len(segment_insights) > 2 and count_message_tokens(messages, model) > budget:
+            middle = len(segment_insights) // 2
+            halves = [segment_insights[:middle], segment_insights[middle:]]
+            merged = await asyncio.gather(*(
+                self._areduce(dimension, half, "", "insights reduce") for half in halves
+            ))
+            segment_insights = [(f"{half[0][0]} … {half[-1][0]}", insights) for half, insights in zip(halves, merged)]
+            messages = self._reduce_messages(dimension, segment_insights, metrics_summary)
+        return await self._ainvoke_structured(stage, messages, InsightsOutput)
+    
+    @observe()
+    async def aanalyze_insights_map_reduce(self, metrics_summary: str = "",
+                                           dimension: Optional[str] = None) -> Dict[str, Any]:
+        """Generate insights per segment in parallel, then merge them into one result.
+        
+        Each value of ``dimension`` gets its own insights call with a summary
+        of only its rows, at most MAP_REDUCE_CONCURRENCY at a time. Segments
+        whose rows, model and prompt are unchanged since the last run reuse
+        their stored insights without a model call. A reduce call merges the
+        segment insights into the usual insights schema.
         
         Args:
-            data_summary: Formatted string containing data summary
-            insights: Generated insights dictionary
-            
+            metrics_summary: Precomputed metrics for the whole dataset
+            dimension: Column to partition by (defaults to the analyst's map-reduce dimension)
+        
         Returns:
-            Dictionary containing creative recommendations
+            Dictionary containing insights
         """
-        insights_str = json.dumps(insights, indent=2)
+        dimension = dimension or self.map_reduce_dimension
+        if not dimension:
+            raise ValueError("No map-reduce dimension given")
+        if self.segment_store is None:
+            self.segment_store = SegmentInsightStore(SEGMENT_INSIGHTS_PATH)
+        
+        started = time.perf_counter()
+        with self.instrumentation.stage("insights_map", dimension=dimension) as record:
+            jobs = await asyncio.to_thread(self._segment_jobs, dimension)
+            if not jobs:
+                raise ValueError(f"No rows to partition by {dimension}")
+            semaphore = asyncio.Semaphore(MAP_REDUCE_CONCURRENCY)
+            mapped = await asyncio.gather(*(
+                self._amap_segment(dimension, segment, rows, fingerprint, semaphore)
+                for segment, rows, fingerprint in jobs
+            ))
+            reused = sum(was_reused for _, was_reused in mapped)
+            record.set(segments=len(jobs), reused=reused)
+        self.segment_store.prune(self.data_loader.data_path, dimension, [segment for segment, _, _ in jobs])
+        map_seconds = time.perf_counter() - started
+        print(f"✓ insights: {len(jobs)} {dimension} segments, {reused} unchanged and reused")
+        
+        insights = await self._areduce(
+            dimension, [(job[0], result[0]) for job, result in zip(jobs, mapped)], metrics_summary
+        )
+        self.map_reduce_stats = {
+            "dimension": dimension,
+            "segments": len(jobs),
+            "reused": reused,
+            "map_seconds": round(map_seconds, 3),
+            "reduce_seconds": round(time.perf_counter() - started - map_seconds, 3)
+        }
+        return insights
+    
+    def analyze_insights_map_reduce(self, metrics_summary: str = "",
+                                    dimension: Optional[str] = None) -> Dict[str, Any]:
+        """Blocking version of ``aanalyze_insights_map_reduce`` (segments still run concurrently).
+        
+        Raises:
+            RuntimeError: If called from a running event loop; await the async version there
+        """
+        return _run_blocking(self.aanalyze_insights_map_reduce(metrics_summary, dimension),
+                             "aanalyze_insights_map_reduce")
+    
+    def _creatives_messages(self, data_summary: str, insights: Dict[str, Any],
+                            evidence: Optional[str] = None) -> List[BaseMessage]:
+        """Build the messages for the creatives stage.
+        
+        Args:
+            evidence: Significance findings to ground A/B tests in (None = the
+                findings of the current run)
+        """
+        insights_str = self._dump_json(insights)
+        if evidence is None:
+            evidence = self.significance_text
+        evidence_block = ""
+        if evidence:
+            evidence_block = """
+
+Statistically tested differences (base A/B test hypotheses and targeting on these; differences not listed are noise):
+{evidence}"""
         
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a creative strategist specializing in Facebook ads. Based on performance data and insights, generate creative recommendations.
@@ -170,47 +878,106 @@ Generate creative recommendations in the following JSON format:
         "List of best practices based on the data analysis"
     ]
 }}"""),
-            ("human", f"""Based on the following Facebook ads data and insights, generate creative recommendations:
+            ("human", """Based on the following Facebook ads data and insights, generate creative recommendations:
 
 Data Summary:
 {data_summary}
 
 Generated Insights:
-{insights_str}
+{insights_str}""" + evidence_block + """
 
 Provide your creative recommendations in valid JSON format only, no additional text.""")
         ])
         
-        messages = prompt.format_messages()
-        response = self.llm.invoke(messages)
-        
-        # Parse JSON response
-        try:
-            creatives = json.loads(response.content)
-        except json.JSONDecodeError:
-            content = response.content
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            creatives = json.loads(content.strip())
+        if evidence:
+            return prompt.format_messages(data_summary=data_summary, insights_str=insights_str, evidence=evidence)
+        return prompt.format_messages(data_summary=data_summary, insights_str=insights_str)
+    
+    @observe()
+    def generate_creatives(self, data_summary: str, insights: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate creative recommendations based on insights.
         
-        return creatives
+        Args:
+            data_summary: Formatted string containing data summary
+            insights: Generated insights dictionary
+            
+        Returns:
+            Dictionary containing creative recommendations
+            
+        Raises:
+            RuntimeError: If several variants are configured and this is called
+                from a running event loop; await ``agenerate_creatives`` there
+        """
+        if self.creative_variants > 1:
+            return _run_blocking(self.agenerate_creative_variants(data_summary, insights), "agenerate_creatives")
+        return self._invoke_structured("creatives", self._creatives_messages(data_summary, insights),
+                                       CreativesOutput)
     
     @observe()
-    def generate_report(self, data_summary: str, insights: Dict[str, Any], creatives: Dict[str, Any]) -> str:
-        """Generate a comprehensive markdown report.
+    async def agenerate_creatives(self, data_summary: str, insights: Dict[str, Any]) -> Dict[str, Any]:
+        """Async version of ``generate_creatives``."""
+        if self.creative_variants > 1:
+            return await self.agenerate_creative_variants(data_summary, insights)
+        return await self._ainvoke_structured("creatives", self._creatives_messages(data_summary, insights),
+                                              CreativesOutput)
+    
+    @staticmethod
+    def _variant_messages(messages: List[BaseMessage], index: int, count: int) -> List[BaseMessage]:
+        """Ask for a distinct take in one of several concurrent creatives calls (and give it its own cache key)."""
+        request = messages[-1].content + (f"\n\nThis is variant {index} of {count} generated independently: "
+                                          "take a creative angle the other variants are unlikely to choose.")
+        return messages[:-1] + [HumanMessage(content=request)]
+    
+    async def agenerate_creative_variants(self, data_summary: str, insights: Dict[str, Any],
+                                          count: Optional[int] = None) -> Dict[str, Any]:
+        """Generate several creatives outputs concurrently and merge them.
+        
+        Near-duplicate headlines and copy are dropped and the remaining
+        recommendations are ranked by how the segments they target perform
+        (see ``creative_variants.merge_variants``). The calls run at once, so
+        the wall time stays close to that of the slowest one.
         
         Args:
             data_summary: Formatted string containing data summary
             insights: Generated insights dictionary
-            creatives: Generated creatives dictionary
+            count: Number of variants (defaults to the analyst's ``creative_variants``)
             
         Returns:
-            Markdown formatted report
+            Dictionary containing creative recommendations
         """
-        insights_str = json.dumps(insights, indent=2)
-        creatives_str = json.dumps(creatives, indent=2)
+        count = count or self.creative_variants
+        messages = self._creatives_messages(data_summary, insights)
+        
+        async def variant(index: int) -> Tuple[Dict[str, Any], float]:
+            started = time.perf_counter()
+            value = await self._ainvoke_structured(f"creatives[{index}]",
+                                                   self._variant_messages(messages, index, count), CreativesOutput)
+            return value, time.perf_counter() - started
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*(variant(index) for index in range(1, count + 1)))
+        wall = time.perf_counter() - started
+        # Incremental runs have no full summary to rank against, so variants keep their order
+        metrics = None if self.incremental_store is not None else \
+            await asyncio.to_thread(self.data_loader.get_metrics_summary)
+        merged, counts = merge_variants([value for value, _ in results], metrics, CREATIVE_DEDUP_THRESHOLD,
+                                        CREATIVE_MAX_RECOMMENDATIONS)
+        self.variant_stats = {
+            "variants": count,
+            "seconds": [round(seconds, 3) for _, seconds in results],
+            "wall_seconds": round(wall, 3),
+            **counts,
+            "kept": len(merged["creative_recommendations"])
+        }
+        print(f"✓ creatives: {count} variants in {wall:.2f}s (slowest {max(s for _, s in results):.2f}s), "
+              f"{counts['candidates']} recommendations, {counts['duplicates']} near-duplicates dropped")
+        return merged
+    
+    def _report_messages(self, data_summary: str, insights: Dict[str, Any],
+                         creatives: Dict[str, Any]) -> List[BaseMessage]:
+        """Build the messages for the report stage."""
+        insights_str = self._dump_json(insights)
+        creatives_str = self._dump_json(creatives)
         
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a senior Facebook ads analyst preparing an executive report. Create a comprehensive, well-structured markdown report that summarizes the analysis, insights, and recommendations.
@@ -224,7 +991,7 @@ The report should include:
 6. Action Items and Next Steps
 
 Format the report in clean, professional markdown with proper headings, bullet points, and sections."""),
-            ("human", f"""Create a comprehensive markdown report based on:
+            ("human", """Create a comprehensive markdown report based on:
 
 Data Summary:
 {data_summary}
@@ -238,41 +1005,631 @@ Creative Recommendations:
 Generate a professional markdown report.""")
         ])
         
-        messages = prompt.format_messages()
-        response = self.llm.invoke(messages)
+        return prompt.format_messages(
+            data_summary=data_summary,
+            insights_str=insights_str,
+            creatives_str=creatives_str
+        )
+    
+    @observe()
+    def generate_report(self, data_summary: str, insights: Dict[str, Any], creatives: Dict[str, Any]) -> str:
+        """Generate a comprehensive markdown report.
+        
+        Args:
+            data_summary: Formatted string containing data summary
+            insights: Generated insights dictionary
+            creatives: Generated creatives dictionary
+            
+        Returns:
+            Markdown formatted report
+        """
+        with self.instrumentation.stage("report"):
+            response = self._invoke("report", self._report_messages(data_summary, insights, creatives))
+            return response.content
+    
+    @observe()
+    def stream_report(self, data_summary: str, insights: Dict[str, Any], creatives: Dict[str, Any],
+                      report_path: str, echo: bool = True) -> str:
+        """Generate the report from the model's token stream, writing it as it arrives.
+        
+        The text is flushed to ``<report_path>.tmp`` every few hundred
+        characters and renamed to ``report_path`` once complete. If generation
+        fails, the partial ``.tmp`` file is kept. Time to first token and total
+        generation time are stored in ``self.stream_metrics``.
         
-        return response.content
+        Args:
+            data_summary: Formatted string containing data summary
+            insights: Generated insights dictionary
+            creatives: Generated creatives dictionary
+            report_path: File to write the report to
+            echo: Also print the report to the console as it streams
+            
+        Returns:
+            Markdown formatted report
+        """
+        with self.instrumentation.stage("report", streamed=True):
+            messages = self._report_messages(data_summary, insights, creatives)
+            route = self._route("report", messages)
+            model = route.model
+            key = self._cache_key(messages, model) if self.llm_cache else None
+            cached = self.llm_cache.get(key) if key else None
+        
+            started = time.perf_counter()
+            first_token = None
+            parts = []
+            pending = 0
+            with atomic_write(report_path, keep_partial=True) as f:
+                chunks = [AIMessage(content=cached)] if cached is not None else self.router.stream(route, messages)
+                usage = None
+                for chunk in chunks:
+                    # Providers that report usage while streaming attach it to a chunk
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    text = chunk.content
+                    if not text:
+                        continue
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                    parts.append(text)
+                    f.write(text)
+                    pending += len(text)
+                    if pending >= REPORT_STREAM_FLUSH_CHARS:
+                        f.flush()
+                        pending = 0
+                    if echo:
+                        print(text, end="", flush=True)
+            total = time.perf_counter() - started
+            if echo:
+                print()
+        
+            report = "".join(parts)
+            self.instrumentation.record_llm_call(usage, cached=cached is not None)
+            if cached is None:
+                self.routing_stats.record("report", route.model, total, usage, fallback=route.model != model)
+            if key and cached is None:
+                # After a fallback, route.model names the model that produced the stream
+                self.llm_cache.put(self._cache_key(messages, route.model), route.model, report)
+            self.stream_metrics = {
+                "time_to_first_token_seconds": round(first_token or total, 3),
+                "generation_seconds": round(total, 3),
+                "chars": len(report),
+                "cached": cached is not None
+            }
+            print(f"ℹ report: first token after {self.stream_metrics['time_to_first_token_seconds']:.2f}s, "
+                  f"{total:.2f}s total, {len(report)} chars → {report_path}")
+            return report
     
-    def run_full_analysis(self) -> Dict[str, Any]:
+    @observe()
+    async def agenerate_report_sections(self, sections: List[str], **context: str) -> str:
+        """Generate only some sections of the report from the context available so far.
+        
+        Lets report sections start as soon as their inputs exist instead of
+        waiting for every upstream stage.
+        
+        Args:
+            sections: Section headings to write, in order
+            **context: Labelled context blocks (e.g. ``data_summary``, ``insights``)
+            
+        Returns:
+            Markdown for the requested sections
+        """
+        with self.instrumentation.stage("report", sections=", ".join(sections)):
+            messages = self._report_sections_messages(sections, **context)
+            response = await self._ainvoke("report sections", messages)
+            return response.content.strip()
+    
+    def _report_sections_messages(self, sections: List[str], **context: str) -> List[BaseMessage]:
+        """Build the messages for a partial report."""
+        context_str = "\n\n".join(
+            f"{name.replace('_', ' ').title()}:\n{value}" for name, value in context.items()
+        )
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are a senior Facebook ads analyst preparing part of an executive report. Write only the sections you are asked for, in clean, professional markdown with proper headings, bullet points, and sections.
+
+Use a level-2 heading (##) for each section, named exactly as requested, and do not add a title or any other sections."""),
+            ("human", """Write the following report sections: {sections}
+
+Base them on:
+
+{context}""")
+        ])
+        return prompt.format_messages(sections=", ".join(sections), context=context_str)
+    
+    def _prepare_data(self) -> str:
+        """Load the dataset (or stream it) and build the summary sent to the LLM."""
+        if self.incremental_store is not None:
+            print("\n📊 Ingesting new rows...")
+            self.incremental_store.ingest(self.data_loader.data_path, self.data_loader.chunksize or 100_000)
+            return format_daily_history(self.incremental_store.daily_totals(self.data_loader.data_path))
+        
+        print("\n📊 Loading data...")
+        if self.data_tools is not None:
+            # The tools answer from the rows, so they are loaded even in streaming mode
+            if self.data_loader.df is None or not self.preloaded:
+                self.data_loader.load_data()
+            return self.data_tools.overview()
+        if self.data_loader.streaming:
+            self.data_loader.scan()
+        elif self.data_loader.df is None or not self.preloaded:
+            self.data_loader.load_data()
+        if self.compact_prompts:
+            return self.data_loader.get_compact_data_for_analysis()
+        return self.data_loader.get_data_for_analysis()
+    
+    def _stage_data(self, stage: str, data_summary: str,
+                    build_messages: Callable[[str], List[BaseMessage]]) -> str:
+        """Fit the data summary into what is left of the stage's token budget.
+        
+        Args:
+            stage: Stage name used to look up the budget
+            data_summary: Data summary from ``_prepare_data``
+            build_messages: Builds the stage's messages around a data summary
+            
+        Returns:
+            Data summary that keeps the whole prompt within budget when possible
+        """
+        budget = PROMPT_TOKEN_BUDGETS.get(stage)
+        if not self.compact_prompts or not budget or self.incremental_store is not None or self.data_tools:
+            return data_summary
+        model = self.router.model_for(stage)
+        overhead = count_message_tokens(build_messages(""), model)
+        return self.data_loader.get_compact_data_for_analysis(max(budget - overhead, 0), model)
+    
+    def _prepare_metrics(self) -> str:
+        """Compute the deterministic metrics summary that grounds the insights stage."""
+        if self.incremental_store is not None:
+            # Deltas come from the aggregate store, so no pass over the full history
+            return format_delta_summary(self.incremental_store.delta_summary(self.data_loader.data_path))
+        if self.data_tools is not None:
+            # The model fetches the metrics it needs through the tools
+            return ""
+        metrics = self.data_loader.get_metrics_summary()
+        self.significance_text = self._prepare_significance()
+        if self.significance_text:
+            # Tested findings replace the raw segment tables and IQR outliers
+            return format_metrics_summary(metrics, segments=False) + "\n\n" + self.significance_text
+        return format_metrics_summary(metrics)
+    
+    def _prepare_significance(self) -> str:
+        """Test segment and campaign differences and render only the significant ones.
+        
+        Returns:
+            Findings and anomalies for the prompts, or "" when disabled, in
+            streaming mode or without the metric columns
+        """
+        if not self.significance_enabled or self.data_loader.streaming:
+            return ""
+        started = time.perf_counter()
+        summary = self.data_loader.get_significance_summary(**significance_options())
+        if not summary:
+            return ""
+        significant = summary["significant_count"] + summary["significant_campaign_count"]
+        self.significance_stats = {
+            "tests": summary["tests"],
+            "significant": significant,
+            "anomalies": summary["anomaly_count"],
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+        print(f"✓ Significance: {significant} of {summary['tests']} differences significant, "
+              f"{summary['anomaly_count']} anomalies ({self.significance_stats['seconds']:.2f}s)")
+        return format_significance(summary, max_findings=SIGNIFICANCE_MAX_FINDINGS)
+    
+    def _checkpoint_fingerprint(self, stage: str, data_summary: str, metrics_summary: str,
+                                insights: Optional[Dict[str, Any]] = None,
+                                creatives: Optional[Dict[str, Any]] = None, sections: bool = False) -> str:
+        """Fingerprint what a stage's output depends on: the data, the model
+        settings, its prompt template and the outputs of upstream stages.
+        
+        Args:
+            sections: The report is assembled from sections (async pipeline)
+        """
+        if stage == "insights":
+            template = self._agent_messages("") if self.data_tools else self._insights_messages("", "")
+            inputs = [metrics_summary, self.map_reduce_dimension]
+        elif stage == "creatives":
+            # Significance evidence is part of the metrics summary
+            template, inputs = self._creatives_messages("", {}, ""), [insights, metrics_summary]
+            if self.creative_variants > 1:
+                inputs.append(self.creative_variants)
+        else:
+            template = self._report_sections_messages([]) if sections else self._report_messages("", {}, {})
+            inputs = [insights, creatives]
+        llm = self.router.client(self.router.model_for(stage))
+        return fingerprint(stage, getattr(llm, "model_name", None), getattr(llm, "temperature", None),
+                           self.compact_prompts, [message.content for message in template], data_summary, *inputs)
+    
+    def _resumed_outputs(self, data_summary: str, metrics_summary: str, sections: bool = False) -> Dict[str, Any]:
+        """Load the checkpointed outputs that can be reused in this run.
+        
+        Stages are checked in order and each fingerprint includes the upstream
+        outputs, so a stage is reused only if every stage before it was too.
+        
+        Returns:
+            Mapping of stage name to its reused output
+        """
+        if self.checkpoints is None or not self.resume:
+            return {}
+        resumed: Dict[str, Any] = {}
+        for stage in ["insights", "creatives", "report"]:
+            input_fingerprint = self._checkpoint_fingerprint(
+                stage, data_summary, metrics_summary, resumed.get("insights"), resumed.get("creatives"), sections
+            )
+            value = self.checkpoints.load(stage, input_fingerprint)
+            if value is None:
+                break
+            resumed[stage] = value
+            self.resumed_stages.append(stage)
+            print(f"↻ {stage}: inputs unchanged, reusing {self.checkpoints.path(stage)}")
+        return resumed
+    
+    def _save_checkpoint(self, stage: str, value: Any, data_summary: str, metrics_summary: str,
+                         insights: Optional[Dict[str, Any]] = None, creatives: Optional[Dict[str, Any]] = None,
+                         sections: bool = False):
+        """Write a completed stage's output to the checkpoint directory, if configured."""
+        if self.checkpoints is None:
+            return
+        input_fingerprint = self._checkpoint_fingerprint(
+            stage, data_summary, metrics_summary, insights, creatives, sections
+        )
+        self.checkpoints.save(stage, input_fingerprint, value)
+    
+    def _semantic_features(self) -> Dict[str, float]:
+        """Feature vector of the current data for the semantic cache, computed once per run."""
+        if self._features is None:
+            self._features = summary_features(
+                self.data_loader.get_summary_stats()["numeric_summary"],
+                self.data_loader.get_metrics_summary()
+            )
+        return self._features
+    
+    def _semantic_reuse(self, stage: str) -> Optional[Dict[str, Any]]:
+        """Return the output of a near-identical dataset for ``stage``, adapted to this one.
+        
+        Cached creatives were written from their account's insights, so they
+        are only reused when this run's insights were reused from the same
+        account; creatives for freshly generated insights are generated too.
+        
+        Returns:
+            Reused output, or None if the semantic cache is off or has no match
+            above the stage's similarity threshold
+        """
+        if self.semantic_cache is None:
+            return None
+        insights_source = self.semantic_stats.get("insights", {}).get("source")
+        if stage == "creatives" and insights_source is None:
+            return None
+        threshold = SEMANTIC_CACHE_THRESHOLDS[stage]
+        # The namespace covers the model settings and prompt template, not the data
+        namespace = self._checkpoint_fingerprint(stage, "", "")
+        match = self.semantic_cache.lookup(namespace, self._semantic_features(), threshold)
+        hit = bool(match and match.hit) and (stage != "creatives" or match.source == insights_source)
+        self.semantic_stats[stage] = {
+            "hit": hit,
+            "similarity": round(match.similarity, 4) if match else None,
+            "threshold": threshold
+        }
+        if not hit:
+            return None
+        self.semantic_stats[stage]["source"] = match.source
+        print(f"≈ {stage}: reusing the output for {match.source} (similarity {match.similarity:.3f} ≥ {threshold})")
+        if stage == "insights":
+            return adapt_insights(match.output, self.data_loader.get_metrics_summary())
+        return match.output
+    
+    def _semantic_store(self, stage: str, value: Dict[str, Any]):
+        """Add a generated stage output to the semantic cache, if enabled."""
+        if self.semantic_cache is not None:
+            self.semantic_cache.put(self._checkpoint_fingerprint(stage, "", ""), self._semantic_features(), value,
+                                    self.data_loader.data_path)
+    
+    def semantic_summary(self) -> Dict[str, Any]:
+        """Semantic cache lookups of the last run, with the nearest similarity per stage."""
+        hits = sum(stats["hit"] for stats in self.semantic_stats.values())
+        return {
+            "lookups": len(self.semantic_stats),
+            "hits": hits,
+            "hit_rate": round(hits / len(self.semantic_stats), 3) if self.semantic_stats else 0.0,
+            "stages": {stage: dict(stats) for stage, stats in self.semantic_stats.items()}
+        }
+    
+    def query_cube(self, group_by: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None,
+                   metrics: Optional[List[str]] = None, sort_by: Optional[str] = None,
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Break ads performance down by any dimensions, for any dimension values.
+        
+        Answers follow-up questions such as "ROAS by ad_format × target_age_group
+        for Bras" from the pre-aggregated cube (see ``cube.AggregateCube``), in
+        milliseconds whatever the number of rows; the cube is built or loaded
+        from disk on first use.
+        
+        Args:
+            group_by: Dimensions to break down by (none = account totals)
+            filters: Dimension → value or list of values to keep
+            metrics: Measures and ratio metrics to return (defaults to all)
+            sort_by: Metric to sort by, best first (defaults to roas)
+            limit: Maximum number of rows returned
+            
+        Returns:
+            One record per group with its dimension values and metrics
+        """
+        return self.data_loader.get_cube().query(group_by, filters, metrics, sort_by, limit)
+    
+    def _reset_run_state(self):
+        """Forget the token counts, statistics and features of a previous run."""
+        self.prompt_tokens = {}
+        self.parse_stats = {}
+        self.map_reduce_stats = {}
+        self.resumed_stages = []
+        self.routing_stats.reset()
+        self.semantic_stats = {}
+        self._features = None
+        self.input_fingerprint = ""
+        self.significance_text = ""
+        self.significance_stats = {}
+        self.variant_stats = {}
+        if self.data_tools is not None:
+            self.data_tools.reset()
+    
+    def _build_results(self, insights: Dict[str, Any], creatives: Dict[str, Any], report: str,
+                       timings: Dict[str, Any]) -> Dict[str, Any]:
+        """Assemble the outputs of a run with its timings and the statistics gathered along the way."""
+        return {
+            "insights": insights,
+            "creatives": creatives,
+            "report": report,
+            "timings": timings,
+            "prompt_tokens": dict(self.prompt_tokens),
+            "input_fingerprint": self.input_fingerprint,
+            "parse_stats": self.parse_summary(),
+            "routing": self.routing_stats.summary(),
+            **({"semantic_cache": self.semantic_summary()} if self.semantic_cache is not None else {}),
+            **({"significance": dict(self.significance_stats)} if self.significance_stats else {}),
+            **({"tools": self.data_tools.summary()} if self.data_tools is not None else {}),
+            **({"creative_variants": dict(self.variant_stats)} if self.variant_stats else {}),
+            **({"map_reduce": dict(self.map_reduce_stats)} if self.map_reduce_stats else {}),
+            "resumed_stages": list(self.resumed_stages)
+        }
+    
+    def run_full_analysis(self, report_path: Optional[str] = None) -> Dict[str, Any]:
         """Run the complete analysis pipeline.
         
+        Args:
+            report_path: If set, stream the report to this file and the console
+                as it is generated
+        
         Returns:
             Dictionary containing all generated outputs
         """
         print("🚀 Starting agentic FB ads analysis...")
+        self._reset_run_state()
+        timings = {}
+        started = time.perf_counter()
         
         # Load and prepare data
-        print("\n📊 Loading data...")
-        self.data_loader.load_data()
-        data_summary = self.data_loader.get_data_for_analysis()
+        data_summary = self._prepare_data()
+        timings["data"] = time.perf_counter() - started
+        
+        # Compute metrics locally
+        stage_start = time.perf_counter()
+        metrics_summary = self._prepare_metrics()
+        self.input_fingerprint = self._checkpoint_fingerprint("insights", data_summary, metrics_summary)
+        timings["metrics"] = time.perf_counter() - stage_start
+        
+        # Stages whose inputs are unchanged since the last checkpoint are skipped
+        resumed = self._resumed_outputs(data_summary, metrics_summary)
         
         # Generate insights
         print("\n💡 Generating insights...")
-        insights = self.analyze_insights(data_summary)
+        stage_start = time.perf_counter()
+        if "insights" in resumed:
+            insights = resumed["insights"]
+        else:
+            insights = self._semantic_reuse("insights")
+            if insights is None:
+                if self.map_reduce_dimension:
+                    insights = self.analyze_insights_map_reduce(metrics_summary)
+                elif self.data_tools is not None:
+                    insights = self.analyze_insights_with_tools(data_summary)
+                else:
+                    insights = self.analyze_insights(
+                        self._stage_data("insights", data_summary,
+                                         lambda d: self._insights_messages(d, metrics_summary)),
+                        metrics_summary
+                    )
+                self._semantic_store("insights", insights)
+            self._save_checkpoint("insights", insights, data_summary, metrics_summary)
+        timings["insights"] = time.perf_counter() - stage_start
         
         # Generate creatives
         print("\n🎨 Generating creative recommendations...")
-        creatives = self.generate_creatives(data_summary, insights)
+        stage_start = time.perf_counter()
+        if "creatives" in resumed:
+            creatives = resumed["creatives"]
+        else:
+            creatives = self._semantic_reuse("creatives")
+            if creatives is None:
+                creatives = self.generate_creatives(
+                    self._stage_data("creatives", data_summary,
+                                     lambda d: self._creatives_messages(d, insights)),
+                    insights
+                )
+                self._semantic_store("creatives", creatives)
+            self._save_checkpoint("creatives", creatives, data_summary, metrics_summary, insights)
+        timings["creatives"] = time.perf_counter() - stage_start
         
         # Generate report
         print("\n📝 Generating comprehensive report...")
-        report = self.generate_report(data_summary, insights, creatives)
+        stage_start = time.perf_counter()
+        if "report" in resumed:
+            report = resumed["report"]
+        else:
+            report_data = self._stage_data("report", data_summary,
+                                           lambda d: self._report_messages(d, insights, creatives))
+            if report_path:
+                report = self.stream_report(report_data, insights, creatives, report_path)
+            else:
+                report = self.generate_report(report_data, insights, creatives)
+            self._save_checkpoint("report", report, data_summary, metrics_summary, insights, creatives)
+        timings["report"] = time.perf_counter() - stage_start
         
-        print("\n✅ Analysis complete!")
+        total = time.perf_counter() - started
+        print(f"\n✅ Analysis complete! ({total:.2f}s sequential)")
         
-        return {
-            "insights": insights,
-            "creatives": creatives,
-            "report": report
+        timing_summary = {
+            "stages": {name: round(value, 3) for name, value in timings.items()},
+            "total_seconds": round(total, 3)
         }
-
+        if report_path and "report" not in resumed:
+            timing_summary["report_stream"] = dict(self.stream_metrics)
+        
+        return self._build_results(insights, creatives, report, timing_summary)
+    
+    def _analysis_stages(self) -> List[Stage]:
+        """Describe the async pipeline as a dependency graph.
+        
+        The report is split into sections so that each one starts as soon as
+        its inputs exist: the data overview runs alongside the insights call,
+        the insight/performance sections alongside the creatives call, and only
+        the executive summary and creative sections wait for everything.
+        """
+        async def data():
+            return await asyncio.to_thread(self._prepare_data)
+        
+        async def metrics(data):
+            value = await asyncio.to_thread(self._prepare_metrics)
+            self.input_fingerprint = self._checkpoint_fingerprint("insights", data, value)
+            return value
+        
+        async def resumed(data, metrics):
+            return self._resumed_outputs(data, metrics, sections=True)
+        
+        async def insights(data, metrics, resumed=None):
+            if resumed and "insights" in resumed:
+                return resumed["insights"]
+            value = await asyncio.to_thread(self._semantic_reuse, "insights")
+            if value is None:
+                if self.map_reduce_dimension:
+                    value = await self.aanalyze_insights_map_reduce(metrics)
+                elif self.data_tools is not None:
+                    value = await self.aanalyze_insights_with_tools(data)
+                else:
+                    staged = self._stage_data("insights", data, lambda d: self._insights_messages(d, metrics))
+                    value = await self.aanalyze_insights(staged, metrics)
+                self._semantic_store("insights", value)
+            self._save_checkpoint("insights", value, data, metrics)
+            return value
+        
+        async def creatives(data, metrics, insights, resumed=None):
+            if resumed and "creatives" in resumed:
+                return resumed["creatives"]
+            value = await asyncio.to_thread(self._semantic_reuse, "creatives")
+            if value is None:
+                staged = self._stage_data("creatives", data, lambda d: self._creatives_messages(d, insights))
+                value = await self.agenerate_creatives(staged, insights)
+                self._semantic_store("creatives", value)
+            self._save_checkpoint("creatives", value, data, metrics, insights)
+            return value
+        
+        # With a reusable report checkpoint, the section calls are skipped
+        async def overview_section(data, resumed=None):
+            if resumed and "report" in resumed:
+                return ""
+            sections = ["Data Overview"]
+            data = self._stage_data(
+                "report", data, lambda d: self._report_sections_messages(sections, data_summary=d)
+            )
+            return await self.agenerate_report_sections(sections, data_summary=data)
+        
+        async def analysis_sections(data, insights, resumed=None):
+            if resumed and "report" in resumed:
+                return ""
+            sections = ["Key Insights", "Performance Analysis"]
+            insights_str = self._dump_json(insights)
+            data = self._stage_data(
+                "report", data,
+                lambda d: self._report_sections_messages(sections, data_summary=d, insights=insights_str)
+            )
+            return await self.agenerate_report_sections(sections, data_summary=data, insights=insights_str)
+        
+        async def summary_section(insights, creatives, resumed=None):
+            if resumed and "report" in resumed:
+                return ""
+            return await self.agenerate_report_sections(
+                ["Executive Summary"],
+                insights=self._dump_json(insights),
+                creative_recommendations=self._dump_json(creatives)
+            )
+        
+        async def recommendation_sections(insights, creatives, resumed=None):
+            if resumed and "report" in resumed:
+                return ""
+            return await self.agenerate_report_sections(
+                ["Creative Recommendations", "Action Items and Next Steps"],
+                insights=self._dump_json(insights),
+                creative_recommendations=self._dump_json(creatives)
+            )
+        
+        async def report(data, metrics, insights, creatives, summary_section, overview_section,
+                         analysis_sections, recommendation_sections, resumed=None):
+            if resumed and "report" in resumed:
+                return resumed["report"]
+            value = "\n\n".join([
+                "# Facebook Ads Performance Report",
+                summary_section,
+                overview_section,
+                analysis_sections,
+                recommendation_sections
+            ]) + "\n"
+            self._save_checkpoint("report", value, data, metrics, insights, creatives, sections=True)
+            return value
+        
+        # Only wait on the checkpoint lookup (which needs the metrics) when resuming
+        resume = ["resumed"] if self.checkpoints is not None and self.resume else []
+        return [
+            Stage("data", data),
+            Stage("metrics", metrics, ["data"]),
+            *([Stage("resumed", resumed, ["data", "metrics"])] if resume else []),
+            Stage("insights", insights, ["data", "metrics", *resume]),
+            Stage("overview_section", overview_section, ["data", *resume]),
+            Stage("creatives", creatives, ["data", "metrics", "insights", *resume]),
+            Stage("analysis_sections", analysis_sections, ["data", "insights", *resume]),
+            Stage("summary_section", summary_section, ["insights", "creatives", *resume]),
+            Stage("recommendation_sections", recommendation_sections, ["insights", "creatives", *resume]),
+            Stage("report", report, [
+                "data", "metrics", "insights", "creatives", "summary_section", "overview_section",
+                "analysis_sections", "recommendation_sections", *resume
+            ]),
+        ]
+    
+    async def astream_analysis(self) -> AsyncIterator[StageResult]:
+        """Run the async pipeline, yielding each stage's result as soon as it finishes.
+        
+        Yields:
+            StageResult for each pipeline stage in completion order
+        """
+        async for result in run_stages(self._analysis_stages()):
+            yield result
+    
+    async def arun_full_analysis(self) -> Dict[str, Any]:
+        """Run the complete analysis pipeline concurrently.
+        
+        Independent LLM calls overlap, so end-to-end latency follows the
+        critical path of the stage graph rather than the sum of all calls.
+        
+        Returns:
+            Dictionary containing all generated outputs plus stage timings
+        """
+        print("🚀 Starting agentic FB ads analysis (async)...")
+        self._reset_run_state()
+        stages = self._analysis_stages()
+        results = {}
+        async for result in run_stages(stages):
+            results[result.name] = result
+            print(f"✓ {result.name} finished at {result.finished:.2f}s ({result.duration:.2f}s)")
+        
+        timings = summarize_timings(stages, results)
+        print(f"\n✅ Analysis complete! Critical path {timings['critical_path_seconds']:.2f}s "
+              f"({' → '.join(timings['critical_path'])}); stages took {timings['sum_of_stage_seconds']:.2f}s "
+              f"in total ({timings['concurrency']}x in flight on average)")
+        
+        return self._build_results(results["insights"].value, results["creatives"].value,
+                                   results["report"].value, timings)
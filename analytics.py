@@ -0,0 +1,253 @@
+"""Deterministic, vectorized ad performance metrics computed locally with pandas."""
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from schema import DIMENSIONS
+
+
+# Measures that can be summed across rows; every ratio metric is derived from these
+ADDITIVE_MEASURES = ["impressions", "clicks", "conversions", "spend_usd", "revenue_usd"]
+
+# Identifies a campaign for campaign-level rankings
+CAMPAIGN_KEYS = ["campaign_id", "campaign_name"]
+
+# Ratio metrics and whether a higher value is better
+RATIO_METRICS = {
+    "ctr_percent": True,
+    "conversion_rate_percent": True,
+    "roas": True,
+    "cpc_usd": False,
+    "cpm_usd": False,
+    "cpa_usd": False,
+}
+
+REQUIRED_COLUMNS = ["impressions", "clicks", "conversions", "spend_usd", "roas"]
+
+
+def has_metric_columns(df: pd.DataFrame) -> bool:
+    """Whether the frame has the columns needed to compute metrics."""
+    return all(column in df.columns for column in REQUIRED_COLUMNS)
+
+
+def additive_measures(df: pd.DataFrame) -> pd.DataFrame:
+    """Extract additive measures, deriving revenue from per-row ROAS and spend."""
+    measures = df[["impressions", "clicks", "conversions", "spend_usd"]].astype("float64")
+    measures["revenue_usd"] = df["roas"].astype("float64") * measures["spend_usd"]
+    measures["rows"] = 1.0
+    return measures
+
+
+def derive_ratios(totals: pd.DataFrame) -> pd.DataFrame:
+    """Compute ratio metrics from summed measures.
+
+    Ratios are recomputed from totals rather than averaged per row, so large
+    campaigns weigh more than small ones. Divisions by zero yield NaN.
+    """
+    impressions = totals["impressions"].replace(0, np.nan)
+    clicks = totals["clicks"].replace(0, np.nan)
+    conversions = totals["conversions"].replace(0, np.nan)
+    spend = totals["spend_usd"].replace(0, np.nan)
+
+    ratios = totals.copy()
+    ratios["ctr_percent"] = totals["clicks"] / impressions * 100
+    ratios["conversion_rate_percent"] = totals["conversions"] / clicks * 100
+    ratios["cpc_usd"] = totals["spend_usd"] / clicks
+    ratios["cpm_usd"] = totals["spend_usd"] / impressions * 1000
+    ratios["cpa_usd"] = totals["spend_usd"] / conversions
+    ratios["roas"] = totals["revenue_usd"] / spend
+    return ratios
+
+
+class SegmentAggregator:
+    """Mergeable per-segment sums of additive measures.
+
+    Memory is bounded by the number of distinct segments and campaigns, not
+    the number of rows, so it can be fed chunk by chunk.
+    """
+
+    def __init__(self, dimensions: Optional[List[str]] = None):
+        """Initialize an empty aggregator.
+
+        Args:
+            dimensions: Dimensions to break metrics down by (defaults to DIMENSIONS)
+        """
+        self.dimensions = list(dimensions or DIMENSIONS)
+        self.overall: Optional[pd.Series] = None
+        self.segments: Dict[str, pd.DataFrame] = {}
+        self.campaigns: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame):
+        """Add a chunk of rows to the running sums."""
+        if not has_metric_columns(chunk):
+            return
+        measures = additive_measures(chunk)
+        self.overall = measures.sum() if self.overall is None else self.overall + measures.sum()
+
+        for dimension in self.dimensions:
+            if dimension not in chunk.columns:
+                continue
+            sums = measures.groupby(chunk[dimension].astype(str), observed=True).sum()
+            previous = self.segments.get(dimension)
+            self.segments[dimension] = sums if previous is None else previous.add(sums, fill_value=0)
+
+        keys = [chunk[key].astype(str) for key in CAMPAIGN_KEYS if key in chunk.columns]
+        if keys:
+            sums = measures.groupby(keys, observed=True).sum()
+            self.campaigns = sums if self.campaigns is None else self.campaigns.add(sums, fill_value=0)
+
+    def merge(self, other: "SegmentAggregator"):
+        """Merge another aggregator into this one."""
+        if other.overall is None:
+            return
+        self.overall = other.overall if self.overall is None else self.overall + other.overall
+        for dimension, sums in other.segments.items():
+            previous = self.segments.get(dimension)
+            self.segments[dimension] = sums if previous is None else previous.add(sums, fill_value=0)
+        if other.campaigns is not None:
+            self.campaigns = other.campaigns if self.campaigns is None else self.campaigns.add(
+                other.campaigns, fill_value=0
+            )
+
+    def to_summary(self, top_k: int = 3, rank_by: str = "roas") -> Optional[Dict[str, Any]]:
+        """Return the metrics summary (see ``compute_metrics_summary``)."""
+        if self.overall is None:
+            return None
+
+        overall = derive_ratios(self.overall.to_frame().T).iloc[0]
+        summary = {
+            "overall": _round_record(overall),
+            "segments": {},
+            "top_performers": [],
+            "underperformers": [],
+            "outliers": []
+        }
+
+        for dimension, sums in self.segments.items():
+            ratios = derive_ratios(sums).sort_values(rank_by, ascending=False)
+            summary["segments"][dimension] = [
+                {"segment": segment, **_round_record(row)} for segment, row in ratios.iterrows()
+            ]
+
+        if self.campaigns is not None and len(self.campaigns):
+            campaigns = derive_ratios(self.campaigns)
+            campaigns.index = [
+                " / ".join(key) if isinstance(key, tuple) else key for key in campaigns.index
+            ]
+            ranked = campaigns.sort_values(rank_by, ascending=False)
+            summary["top_performers"] = _campaign_records(ranked.head(top_k))
+            summary["underperformers"] = _campaign_records(ranked.tail(top_k).iloc[::-1])
+            summary["outliers"] = flag_outliers(campaigns)
+        return summary
+
+
+def flag_outliers(campaigns: pd.DataFrame, metrics: Optional[List[str]] = None,
+                  fence: float = 1.5) -> List[Dict[str, Any]]:
+    """Flag campaigns outside Tukey's fences on each ratio metric.
+
+    Args:
+        campaigns: Campaign-level ratios indexed by campaign label
+        metrics: Metrics to check (defaults to every ratio metric)
+        fence: IQR multiplier for the fences
+
+    Returns:
+        List of outlier records sorted by how far they are outside the fence
+    """
+    metrics = metrics or list(RATIO_METRICS)
+    values = campaigns[metrics]
+    q1, q3 = values.quantile(0.25), values.quantile(0.75)
+    iqr = q3 - q1
+    low, high = q1 - fence * iqr, q3 + fence * iqr
+    # Distance outside the fence in IQR units; 0 when inside
+    distance = ((low - values).clip(lower=0) + (values - high).clip(lower=0)) / iqr.replace(0, np.nan)
+
+    stacked = distance.stack()
+    stacked = stacked[stacked > 0].sort_values(ascending=False)
+    outliers = []
+    for (campaign, metric), score in stacked.items():
+        value = values.at[campaign, metric]
+        direction = "high" if value > high[metric] else "low"
+        good = (direction == "high") == RATIO_METRICS[metric]
+        outliers.append({
+            "campaign": campaign,
+            "metric": metric,
+            "value": round(float(value), 2),
+            "direction": direction,
+            "assessment": "unusually good" if good else "unusually poor",
+            "iqr_distance": round(float(score), 2)
+        })
+    return outliers
+
+
+def compute_metrics_summary(df: pd.DataFrame, dimensions: Optional[List[str]] = None,
+                            top_k: int = 3, rank_by: str = "roas") -> Optional[Dict[str, Any]]:
+    """Compute aggregated metrics, rankings and outliers for a DataFrame.
+
+    Args:
+        df: Ads data
+        dimensions: Dimensions to break metrics down by (defaults to DIMENSIONS)
+        top_k: Number of top and bottom campaigns to report
+        rank_by: Metric used for rankings
+
+    Returns:
+        Dictionary with overall metrics, per-dimension segment metrics,
+        top performers, underperformers and outliers, or None if the frame
+        lacks the metric columns
+    """
+    aggregator = SegmentAggregator(dimensions)
+    aggregator.update(df)
+    return aggregator.to_summary(top_k=top_k, rank_by=rank_by)
+
+
+def format_metrics_summary(summary: Optional[Dict[str, Any]], max_outliers: int = 10,
+                           segments: bool = True) -> str:
+    """Render a metrics summary as compact text for an LLM prompt.
+
+    Args:
+        summary: Output of ``compute_metrics_summary``
+        max_outliers: Maximum number of outliers to list
+        segments: Include the per-segment tables and IQR outliers; leave them
+            out when significance findings (see ``significance``) replace them
+
+    Returns:
+        Compact, tab-separated text (empty if there is no summary)
+    """
+    if not summary:
+        return ""
+
+    columns = ["impressions", "clicks", "conversions", "spend_usd"] + list(RATIO_METRICS)
+    lines = ["Overall: " + ", ".join(f"{c}={summary['overall'][c]}" for c in columns)]
+
+    for dimension, rows in (summary["segments"] if segments else {}).items():
+        lines.append(f"\nBy {dimension} (sorted by ROAS):")
+        lines.append("\t".join(["segment"] + columns))
+        for row in rows:
+            lines.append("\t".join([str(row["segment"])] + [str(row[c]) for c in columns]))
+
+    for title, key in (("Top campaigns by ROAS", "top_performers"), ("Bottom campaigns by ROAS", "underperformers")):
+        if summary[key]:
+            lines.append(f"\n{title}:")
+            for row in summary[key]:
+                lines.append(f"- {row['campaign']}: roas={row['roas']}, ctr_percent={row['ctr_percent']}, "
+                             f"cpa_usd={row['cpa_usd']}, spend_usd={row['spend_usd']}")
+
+    if segments and summary["outliers"]:
+        lines.append("\nOutlier campaigns (outside 1.5×IQR):")
+        for row in summary["outliers"][:max_outliers]:
+            lines.append(f"- {row['campaign']}: {row['metric']}={row['value']} ({row['assessment']})")
+    return "\n".join(lines)
+
+
+def _round_record(row: pd.Series) -> Dict[str, Any]:
+    record = {}
+    for key, value in row.items():
+        if key in ("impressions", "clicks", "conversions", "rows"):
+            record[key] = int(value)
+        elif pd.isna(value):
+            record[key] = None
+        else:
+            record[key] = round(float(value), 2)
+    return record
+
+
+def _campaign_records(campaigns: pd.DataFrame) -> List[Dict[str, Any]]:
+    return [{"campaign": campaign, **_round_record(row)} for campaign, row in campaigns.iterrows()]
@@ -0,0 +1,292 @@
+"""Batch entry point: analyze many advertiser accounts in one process."""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+import openai
+from config import (
+    OUTPUT_DIR,
+    BATCH_CONCURRENCY,
+    BATCH_MAX_RETRIES,
+    BATCH_BACKOFF_SECONDS,
+    RUN_HISTORY_ENABLED,
+    RUN_HISTORY_PATH,
+    EXPORT_OUTPUTS
+)
+from agent import AgenticFBAnalyst, create_router
+from io_utils import atomic_write
+from main import record_history, save_outputs
+
+# Errors worth retrying after a pause; anything else fails the account immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+def validate_accounts(accounts: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Check that account names are safe and unique, since each one names an output directory.
+
+    Raises:
+        ValueError: On an empty name, one containing a path separator, ``.``
+            or ``..``, or a name used twice
+    """
+    seen = set()
+    for account, _ in accounts:
+        if not account or account in (".", "..") or "/" in account or "\\" in account:
+            raise ValueError(f"Invalid account name {account!r}: it must be a plain directory name")
+        if account in seen:
+            raise ValueError(f"Duplicate account name {account!r}: outputs would overwrite each other")
+        seen.add(account)
+    return accounts
+
+
+def discover_accounts(source: str) -> List[Tuple[str, str]]:
+    """List the accounts to analyze.
+
+    Args:
+        source: A directory of CSV files (one per account, named after the
+            account), a JSON manifest (``{"account": "path"}`` or a list of
+            ``{"account": ..., "path": ...}`` objects), or a text manifest with
+            one ``account,path`` or ``path`` per line
+
+    Returns:
+        List of (account, data_path) pairs
+
+    Raises:
+        ValueError: If an account name is unsafe or duplicated (see ``validate_accounts``)
+    """
+    source_path = Path(source)
+    if source_path.is_dir():
+        return validate_accounts([(path.stem, str(path)) for path in sorted(source_path.glob("*.csv"))])
+
+    if not source_path.exists():
+        raise FileNotFoundError(f"Batch source not found: {source}")
+
+    base = source_path.parent
+    if source_path.suffix == ".json":
+        with open(source_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if isinstance(manifest, dict):
+            entries = list(manifest.items())
+        else:
+            entries = [(item["account"], item["path"]) for item in manifest]
+    else:
+        entries = []
+        with open(source_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if "," in line:
+                    account, path = (part.strip() for part in line.split(",", 1))
+                else:
+                    account, path = Path(line).stem, line
+                entries.append((account, path))
+
+    # Relative manifest paths are relative to the manifest itself
+    return validate_accounts([(str(account), str(base / path)) for account, path in entries])
+
+
+async def run_account(account: str, data_path: str, router: Any, semaphore: asyncio.Semaphore,
+                      output_dir: Path, max_retries: int, backoff_seconds: float,
+                      use_llm_cache: bool, semantic_cache: Optional[bool] = None,
+                      history_path: Optional[str] = None, export: bool = True) -> Dict[str, Any]:
+    """Analyze one account, backing off and retrying on rate limits and timeouts.
+
+    Retries go through the LLM response cache, so stages that already
+    succeeded are not paid for again.
+
+    Args:
+        history_path: Run history to append the run to (None = not recorded)
+        export: Write the account's JSON/markdown outputs under ``output_dir``
+
+    Returns:
+        Per-account summary record
+    """
+    async with semaphore:
+        started = time.perf_counter()
+        record = {"account": account, "data_path": data_path, "attempts": 0}
+        while True:
+            record["attempts"] += 1
+            try:
+                analyst = AgenticFBAnalyst(data_path, use_llm_cache=use_llm_cache, router=router,
+                                           semantic_cache=semantic_cache)
+                results = await analyst.arun_full_analysis()
+                break
+            except RETRYABLE_ERRORS as e:
+                if record["attempts"] > max_retries:
+                    record.update(status="failed", error=f"{type(e).__name__}: {e}")
+                    record["seconds"] = round(time.perf_counter() - started, 3)
+                    print(f"❌ {account}: giving up after {record['attempts']} attempts ({e})")
+                    return record
+                # Exponential backoff with jitter so throttled accounts spread out
+                delay = backoff_seconds * 2 ** (record["attempts"] - 1) * (1 + random.random())
+                print(f"⚠ {account}: {type(e).__name__}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                record.update(status="failed", error=f"{type(e).__name__}: {e}")
+                record["seconds"] = round(time.perf_counter() - started, 3)
+                print(f"❌ {account}: {e}")
+                return record
+
+        if export:
+            save_outputs(results["insights"], results["creatives"], results["report"],
+                         output_dir=str(output_dir / account))
+        if history_path:
+            record["run_id"] = record_history(analyst, results, account, history_path)
+        record.update(
+            status="ok",
+            seconds=round(time.perf_counter() - started, 3),
+            timings=results["timings"],
+            routing=results["routing"]
+        )
+        if "semantic_cache" in results:
+            record["semantic_cache"] = results["semantic_cache"]
+        return record
+
+
+def semantic_hit_rate(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Semantic cache hits over all accounts of a batch, if the cache was used."""
+    stats = [r["semantic_cache"] for r in records if "semantic_cache" in r]
+    if not stats:
+        return {}
+    lookups = sum(s["lookups"] for s in stats)
+    hits = sum(s["hits"] for s in stats)
+    return {"semantic_cache": {"lookups": lookups, "hits": hits,
+                               "hit_rate": round(hits / lookups, 3) if lookups else 0.0}}
+
+
+async def run_batch(accounts: List[Tuple[str, str]], output_dir: str, concurrency: int,
+                    max_retries: int, backoff_seconds: float, use_llm_cache: bool = True,
+                    semantic_cache: Optional[bool] = None, history_path: Optional[str] = None,
+                    export: bool = True) -> Dict[str, Any]:
+    """Analyze several accounts concurrently with one shared LLM client.
+
+    Args:
+        accounts: (account, data_path) pairs
+        output_dir: Root directory; each account writes to its own subdirectory
+        concurrency: Maximum number of accounts analyzed at once
+        max_retries: Retries per account on rate limits and timeouts
+        backoff_seconds: Base delay for exponential backoff
+        use_llm_cache: Reuse cached LLM responses for identical prompts
+        semantic_cache: Reuse insights/creatives across accounts with near-identical
+            data (None = SEMANTIC_CACHE_ENABLED)
+        history_path: Run history to append each account's run to (None = not recorded)
+        export: Write each account's JSON/markdown outputs
+
+    Returns:
+        Run summary with per-account timings and failures
+    """
+    output_path = Path(output_dir)
+    started_at = datetime.now(timezone.utc).isoformat()
+    started = time.perf_counter()
+
+    # One router, its clients and one connection pool for every account; size the
+    # pool for the concurrent requests the async pipeline can issue per account
+    http_client = httpx.AsyncClient(limits=httpx.Limits(
+        max_connections=concurrency * 4,
+        max_keepalive_connections=concurrency * 4
+    ))
+    router = create_router(http_async_client=http_client)
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        records = await asyncio.gather(*[
+            run_account(account, data_path, router, semaphore, output_path,
+                        max_retries, backoff_seconds, use_llm_cache, semantic_cache, history_path, export)
+            for account, data_path in accounts
+        ])
+    finally:
+        await http_client.aclose()
+
+    failed = [r for r in records if r["status"] != "ok"]
+    summary = {
+        "started_at": started_at,
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "concurrency": concurrency,
+        "accounts": len(records),
+        "succeeded": len(records) - len(failed),
+        "failed": len(failed),
+        **semantic_hit_rate(records),
+        "results": records
+    }
+
+    output_path.mkdir(parents=True, exist_ok=True)
+    summary_path = output_path / "batch_summary.json"
+    with atomic_write(summary_path) as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    print(f"✓ Saved batch summary to {summary_path}")
+    return summary
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Analyze many ad accounts in one process")
+    parser.add_argument("source", help="Directory of per-account CSVs, or a .json/.txt manifest")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Root output directory")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help="Maximum number of accounts analyzed at once")
+    parser.add_argument("--max-retries", type=int, default=BATCH_MAX_RETRIES,
+                        help="Retries per account on rate limits and timeouts")
+    parser.add_argument("--backoff", type=float, default=BATCH_BACKOFF_SECONDS,
+                        help="Base delay in seconds for exponential backoff")
+    parser.add_argument("--no-llm-cache", dest="use_llm_cache", action="store_false",
+                        help="Bypass the local LLM response cache")
+    parser.add_argument("--semantic-cache", action="store_true", default=None,
+                        help="Reuse insights/creatives across accounts with near-identical data")
+    parser.add_argument("--no-history", dest="history", action="store_false", default=RUN_HISTORY_ENABLED,
+                        help="Do not append the runs to the run history (RUN_HISTORY_PATH)")
+    parser.add_argument("--no-export", dest="export", action="store_false", default=EXPORT_OUTPUTS,
+                        help="Do not write per-account insights.json, creatives.json and report.md")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Batch execution function."""
+    args = parse_args(argv)
+
+    print("=" * 60)
+    print("Agentic Facebook Ads Analyst - Batch Mode")
+    print("=" * 60)
+
+    try:
+        accounts = discover_accounts(args.source)
+    except ValueError as e:
+        print(f"\n❌ Error: {e}")
+        return
+    if not accounts:
+        print(f"\n❌ Error: No accounts found in {args.source}")
+        return
+    print(f"\nAnalyzing {len(accounts)} accounts with concurrency {args.concurrency}...")
+
+    summary = asyncio.run(run_batch(
+        accounts,
+        args.output_dir,
+        args.concurrency,
+        args.max_retries,
+        args.backoff,
+        use_llm_cache=args.use_llm_cache,
+        semantic_cache=args.semantic_cache,
+        history_path=RUN_HISTORY_PATH if args.history else None,
+        export=args.export
+    ))
+
+    print("\n" + "=" * 60)
+    print(f"Batch complete in {summary['total_seconds']:.1f}s: "
+          f"{summary['succeeded']} succeeded, {summary['failed']} failed")
+    for record in summary["results"]:
+        if record["status"] != "ok":
+            print(f"  ✗ {record['account']}: {record['error']}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Offline benchmark of data loading and the analysis pipeline, using a fake LLM."""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from io_utils import atomic_write
+
+# Optional resource import (not available on Windows)
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+DEFAULT_SIZES = [50, 1_000, 100_000, 1_000_000, 10_000_000]
+BENCH_DIR = "bench_results"
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB."""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def dataset_path(data_dir: Path, rows: int) -> Path:
+    """Path of the benchmark dataset with ``rows`` rows, generating it on first use."""
+    path = data_dir / f"fb_ads_{rows}.csv"
+    if not path.exists():
+        from generate_sample_data import generate_sample_data
+        data_dir.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stderr):
+            generate_sample_data(n_campaigns=rows, output_path=str(path), workers=os.cpu_count() or 1)
+        print(f"  generated {rows:,} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return path
+
+
+def run_single(rows: int, data_path: str, latency: float, tokens_per_second: Optional[float],
+               use_async: bool) -> Dict[str, Any]:
+    """Run one full analysis in this process and measure it.
+
+    Returns:
+        Record with per-stage wall time, peak RSS, prompt tokens and throughput
+    """
+    # Only the child processes that measure a run need the analysis stack
+    from agent import AgenticFBAnalyst
+    from fake_llm import FakeChatModel
+
+    llm = FakeChatModel(latency_seconds=latency, tokens_per_second=tokens_per_second)
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    # The analyst reports progress on stdout, which carries the result here
+    with contextlib.redirect_stdout(sys.stderr):
+        analyst = AgenticFBAnalyst(data_path, use_llm_cache=False, llm=llm)
+        if use_async:
+            results = asyncio.run(analyst.arun_full_analysis())
+        else:
+            results = analyst.run_full_analysis()
+    wall = time.perf_counter() - started
+
+    stages = results["timings"]["stages"]
+    local_seconds = stages.get("data", 0) + stages.get("metrics", 0)
+    return {
+        "rows": rows,
+        "wall_seconds": round(wall, 3),
+        "stages": stages,
+        "critical_path_seconds": results["timings"].get("critical_path_seconds"),
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_before_run_mb": rss_before,
+        "prompt_tokens": results["prompt_tokens"],
+        "prompt_tokens_total": sum(results["prompt_tokens"].values()),
+        "local_rows_per_second": round(rows / local_seconds) if local_seconds else None,
+        "rows_per_second": round(rows / wall) if wall else None
+    }
+
+
+def run_isolated(rows: int, data_path: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one size in a fresh interpreter so peak RSS is not shared between sizes."""
+    env = dict(os.environ)
+    env["DATA_CACHE_ENABLED"] = "true" if args.data_cache else "false"
+    env["LLM_CACHE_ENABLED"] = "false"
+    env.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    if args.chunksize:
+        env["DATA_CHUNKSIZE"] = str(args.chunksize)
+    else:
+        env.pop("DATA_CHUNKSIZE", None)
+
+    command = [sys.executable, os.path.abspath(__file__), "--single", str(rows), "--data-path", str(data_path),
+               "--latency", str(args.latency)]
+    if args.tokens_per_second:
+        command += ["--tokens-per-second", str(args.tokens_per_second)]
+    if args.use_async:
+        command.append("--async")
+
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "unknown error"
+        return {"rows": rows, "error": error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_revision() -> Optional[str]:
+    """Short commit hash of the working tree, if it is a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_result(output_dir: Path, exclude: Optional[Path] = None) -> Optional[Path]:
+    """Most recent saved benchmark run in ``output_dir``."""
+    runs = sorted(p for p in output_dir.glob("bench_*.json") if p != exclude)
+    return runs[-1] if runs else None
+
+
+def compare_runs(current: Dict[str, Any], previous: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Compare two benchmark runs size by size.
+
+    Args:
+        current: Newly recorded run
+        previous: Baseline run
+        threshold: Relative slowdown (e.g. 0.15 = 15%) reported as a regression
+
+    Returns:
+        One record per metric present in both runs, with the relative change
+    """
+    baseline = {r["rows"]: r for r in previous["results"] if "error" not in r}
+    changes = []
+    for record in current["results"]:
+        before = baseline.get(record["rows"])
+        if before is None or "error" in record:
+            continue
+        metrics = {"wall_seconds": (record["wall_seconds"], before["wall_seconds"]),
+                   "peak_rss_mb": (record["peak_rss_mb"], before["peak_rss_mb"]),
+                   "prompt_tokens_total": (record["prompt_tokens_total"], before["prompt_tokens_total"])}
+        for stage, seconds in record["stages"].items():
+            if stage in before["stages"]:
+                metrics[f"stage:{stage}"] = (seconds, before["stages"][stage])
+        for metric, (now, then) in metrics.items():
+            if now is None or not then:
+                continue
+            change = (now - then) / then
+            changes.append({"rows": record["rows"], "metric": metric, "current": now, "previous": then,
+                            "change": round(change, 3), "regression": change > threshold})
+    return changes
+
+
+def print_results(run: Dict[str, Any]):
+    """Print a one-line summary per dataset size."""
+    print(f"\n{'rows':>12} {'wall s':>9} {'data s':>8} {'metrics s':>10} {'peak MiB':>9} "
+          f"{'prompt tok':>11} {'rows/s':>12}")
+    for record in run["results"]:
+        if "error" in record:
+            print(f"{record['rows']:>12,} failed: {record['error']}")
+            continue
+        stages = record["stages"]
+        print(f"{record['rows']:>12,} {record['wall_seconds']:>9.2f} {stages.get('data', 0):>8.2f} "
+              f"{stages.get('metrics', 0):>10.2f} {record['peak_rss_mb'] or 0:>9.1f} "
+              f"{record['prompt_tokens_total']:>11,} {record['rows_per_second'] or 0:>12,}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark data loading and the analysis pipeline offline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Dataset sizes in rows")
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="Simulated seconds before the fake model's first token")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0,
+                        help="Simulated output speed of the fake model (0 = instant)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Benchmark the async pipeline")
+    parser.add_argument("--chunksize", type=int, help="Stream the CSV in chunks of this many rows")
+    parser.add_argument("--data-cache", action="store_true", help="Allow the columnar data cache")
+    parser.add_argument("--output-dir", default=BENCH_DIR, help="Where results and datasets are stored")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="Baseline results file to compare against ('latest' = previous run)")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Relative slowdown reported as a regression")
+    # Internal: measure one size in a child process
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--data-path", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Benchmark execution function."""
+    args = parse_args(argv)
+    if args.single is not None:
+        record = run_single(args.single, args.data_path, args.latency, args.tokens_per_second or None,
+                            args.use_async)
+        print(json.dumps(record))
+        return
+
+    output_dir = Path(args.output_dir)
+    run = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "latency_seconds": args.latency,
+            "tokens_per_second": args.tokens_per_second,
+            "async": args.use_async,
+            "chunksize": args.chunksize,
+            "data_cache": args.data_cache
+        },
+        "results": []
+    }
+
+    for rows in args.sizes:
+        print(f"▶ {rows:,} rows...")
+        data_path = dataset_path(output_dir / "data", rows)
+        record = run_isolated(rows, data_path, args)
+        run["results"].append(record)
+        if "error" in record:
+            print(f"  ❌ {record['error']}")
+        else:
+            print(f"  ✓ {record['wall_seconds']:.2f}s, peak {record['peak_rss_mb']} MiB")
+
+    print_results(run)
+
+    result_path = output_dir / f"bench_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    baseline_path = args.compare
+    if baseline_path == "latest":
+        baseline_path = latest_result(output_dir, exclude=result_path)
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        run["compared_to"] = str(baseline_path)
+        run["comparison"] = compare_runs(run, previous, args.threshold)
+        regressions = [c for c in run["comparison"] if c["regression"]]
+        print(f"\nCompared to {baseline_path}: {len(regressions)} regressions over {args.threshold:.0%}")
+        for change in regressions:
+            print(f"  ✗ {change['rows']:,} rows {change['metric']}: "
+                  f"{change['previous']} → {change['current']} ({change['change']:+.0%})")
+
+    with atomic_write(result_path) as f:
+        json.dump(run, f, indent=2)
+    print(f"\n✓ Saved benchmark results to {result_path}")
+
+
+if __name__ == "__main__":
+    main()
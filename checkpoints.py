@@ -0,0 +1,97 @@
+"""Stage checkpoints that let an interrupted analysis resume where it stopped."""
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from io_utils import atomic_write
+
+# Output file of each checkpointed stage (the same files main.save_outputs writes)
+STAGE_FILES = {
+    "insights": "insights.json",
+    "creatives": "creatives.json",
+    "report": "report.md",
+}
+
+MANIFEST_NAME = "checkpoint.json"
+
+
+def fingerprint(*parts: Any) -> str:
+    """Hash everything a stage's output depends on.
+
+    Args:
+        *parts: JSON-serializable inputs (prompt text, upstream outputs, model settings)
+
+    Returns:
+        Hex digest that changes when any input changes
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """Stage outputs in a directory plus a manifest of the input fingerprint behind each.
+
+    Outputs and the manifest are written atomically, so a crash leaves either
+    the previous version of a file or the complete new one.
+    """
+
+    def __init__(self, directory: str):
+        """Initialize the store.
+
+        Args:
+            directory: Directory the stage outputs and manifest are written to
+        """
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / MANIFEST_NAME
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def path(self, stage: str) -> Path:
+        """Output file of ``stage``."""
+        return self.directory / STAGE_FILES[stage]
+
+    def load(self, stage: str, input_fingerprint: str) -> Optional[Any]:
+        """Return the stage's saved output if it was produced from the same inputs.
+
+        Returns:
+            Parsed JSON or report text, or None if missing, stale or unreadable
+        """
+        entry = self._manifest.get(stage)
+        if not entry or entry.get("fingerprint") != input_fingerprint:
+            return None
+        try:
+            with open(self.path(stage), "r", encoding="utf-8") as f:
+                if self.path(stage).suffix == ".json":
+                    return json.load(f)
+                return f.read()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, stage: str, input_fingerprint: str, value: Any) -> Path:
+        """Write a stage's output and record the fingerprint of its inputs."""
+        path = self.path(stage)
+        # Drop the old entry first so a crash between the two writes cannot pair
+        # the new file with the fingerprint of the old one
+        if self._manifest.pop(stage, None) is not None:
+            self._write_manifest()
+        with atomic_write(path) as f:
+            if path.suffix == ".json":
+                json.dump(value, f, indent=2, ensure_ascii=False)
+            else:
+                f.write(value)
+        self._manifest[stage] = {"fingerprint": input_fingerprint, "completed_at": time.time()}
+        self._write_manifest()
+        print(f"✓ Saved {stage} to {path}")
+        return path
+
+    def _write_manifest(self):
+        with atomic_write(self.manifest_path) as f:
+            json.dump(self._manifest, f, indent=2)
@@ -1,4 +1,5 @@
 """Configuration settings for the agentic FB analyst."""
+import json
 import os
 from dotenv import load_dotenv
 
@@ -8,6 +9,20 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 
+# Model routing: a cheaper model for the JSON extraction stages, OPENAI_MODEL for the report
+OPENAI_STAGE_MODELS = {
+    "insights": os.getenv("OPENAI_MODEL_INSIGHTS", "gpt-4o-mini"),
+    "creatives": os.getenv("OPENAI_MODEL_CREATIVES", "gpt-4o-mini"),
+    "report": os.getenv("OPENAI_MODEL_REPORT", OPENAI_MODEL),
+}
+# Retried once on this model after a rate limit or timeout (a stage already on it falls back to OPENAI_MODEL)
+OPENAI_FALLBACK_MODEL = os.getenv("OPENAI_FALLBACK_MODEL", "gpt-4o-mini")
+# Prompts above this many tokens go to ROUTING_LARGE_PROMPT_MODEL whatever their stage (0 = disabled)
+ROUTING_LARGE_PROMPT_TOKENS = int(os.getenv("ROUTING_LARGE_PROMPT_TOKENS", "12000"))
+ROUTING_LARGE_PROMPT_MODEL = os.getenv("ROUTING_LARGE_PROMPT_MODEL", OPENAI_MODEL)
+# USD per million input/output tokens, e.g. {"my-model": [1.0, 4.0]}, added to the built-in price table
+MODEL_PRICES = json.loads(os.getenv("MODEL_PRICES_JSON") or "{}")
+
 # Langfuse Configuration
 LANGFUSE_PUBLIC_KEY = os.getenv("LANGFUSE_PUBLIC_KEY")
 LANGFUSE_SECRET_KEY = os.getenv("LANGFUSE_SECRET_KEY")
@@ -17,6 +32,103 @@ LANGFUSE_HOST = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
 DATA_PATH = os.getenv("DATA_PATH", "synthetic_fb_ads_undergarments.csv")
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
 
-# Create output directory if it doesn't exist
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Stream the CSV in chunks of this many rows instead of loading it whole (unset = load whole file).
+# Quantiles in the statistics are then approximate (not interpolated) once a column exceeds
+# 100,000 values across several chunks; a file that fits in one chunk gets exact ones.
+DATA_CHUNKSIZE = int(os.getenv("DATA_CHUNKSIZE")) if os.getenv("DATA_CHUNKSIZE") else None
+
+# Shrink loaded data: categoricals for repeated strings, datetime64 dates, smaller ints
+# (false keeps pandas' parsed dtypes and skips the typed columnar cache for full loads)
+DATA_OPTIMIZE_DTYPES = os.getenv("DATA_OPTIMIZE_DTYPES", "true").lower() == "true"
+
+# Typed columnar cache of parsed CSVs (requires pyarrow)
+DATA_CACHE_ENABLED = os.getenv("DATA_CACHE_ENABLED", "true").lower() == "true"
+DATA_CACHE_DIR = os.getenv("DATA_CACHE_DIR", ".cache")
+
+# Persistent LLM response cache
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_CACHE_DIR, "llm_responses.sqlite"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+# Semantic cache: reuse insights/creatives of accounts whose numeric summary is near-identical
+# (similarity = 1 - mean relative difference of the summary features; 1.0 = identical)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", os.path.join(DATA_CACHE_DIR, "semantic_cache.sqlite"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+SEMANTIC_CACHE_THRESHOLDS = {
+    "insights": float(os.getenv("SEMANTIC_CACHE_THRESHOLD_INSIGHTS", os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))),
+    "creatives": float(os.getenv("SEMANTIC_CACHE_THRESHOLD_CREATIVES", os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))),
+}
+
+# Incremental mode: per-day aggregates of appended exports
+INCREMENTAL_STORE_PATH = os.getenv("INCREMENTAL_STORE_PATH", os.path.join(DATA_CACHE_DIR, "incremental.sqlite"))
+
+# Significance testing: only segment/campaign differences that pass the tests reach the prompts
+# (two-proportion z-tests for CTR and conversion rate, bootstrap intervals for ROAS, Benjamini-Hochberg
+# false discovery rate), plus campaigns whose robust z-score is beyond ANOMALY_Z_THRESHOLD
+SIGNIFICANCE_ENABLED = os.getenv("SIGNIFICANCE_ENABLED", "true").lower() == "true"
+SIGNIFICANCE_ALPHA = float(os.getenv("SIGNIFICANCE_ALPHA", "0.05"))
+SIGNIFICANCE_MIN_EFFECT = float(os.getenv("SIGNIFICANCE_MIN_EFFECT", "0.05"))
+SIGNIFICANCE_BOOTSTRAP_RESAMPLES = int(os.getenv("SIGNIFICANCE_BOOTSTRAP_RESAMPLES", "1000"))
+SIGNIFICANCE_MAX_FINDINGS = int(os.getenv("SIGNIFICANCE_MAX_FINDINGS", "10"))
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.5"))
+
+# Prompt compaction: TSV tables and minified JSON, fitted to a token budget per stage
+COMPACT_PROMPTS = os.getenv("COMPACT_PROMPTS", "true").lower() == "true"
+PROMPT_TOKEN_BUDGETS = {
+    "insights": int(os.getenv("PROMPT_TOKEN_BUDGET_INSIGHTS", "8000")),
+    "creatives": int(os.getenv("PROMPT_TOKEN_BUDGET_CREATIVES", "6000")),
+    "report": int(os.getenv("PROMPT_TOKEN_BUDGET_REPORT", "8000")),
+}
+
+# Structured output: JSON mode for the insights/creatives stages, and full re-requests
+# allowed when no JSON can be recovered (broken parts are repaired with a targeted call)
+STRUCTURED_OUTPUT_JSON_MODE = os.getenv("STRUCTURED_OUTPUT_JSON_MODE", "true").lower() == "true"
+STRUCTURED_OUTPUT_MAX_RETRIES = int(os.getenv("STRUCTURED_OUTPUT_MAX_RETRIES", "1"))
+
+# Streamed report output (python main.py --stream-report): flush to disk every N characters
+REPORT_STREAM_FLUSH_CHARS = int(os.getenv("REPORT_STREAM_FLUSH_CHARS", "512"))
+
+# Local per-stage metrics (unset = disabled); .prom/.txt files use the Prometheus text format
+METRICS_PATH = os.getenv("METRICS_PATH", "")
+METRICS_FORMAT = os.getenv("METRICS_FORMAT") or None
+
+# Map-reduce insights (python main.py --map-reduce DIMENSION): segment calls in flight at once,
+# and the store that lets unchanged segments skip their call on re-runs
+MAP_REDUCE_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY", "4"))
+SEGMENT_INSIGHTS_PATH = os.getenv("SEGMENT_INSIGHTS_PATH", os.path.join(DATA_CACHE_DIR, "segment_insights.sqlite"))
+
+# Creative variants (python main.py --creative-variants N): concurrent creatives calls merged into one
+# result; copy at least this similar (trigram Jaccard) counts as a duplicate
+CREATIVE_VARIANTS = int(os.getenv("CREATIVE_VARIANTS", "1"))
+CREATIVE_DEDUP_THRESHOLD = float(os.getenv("CREATIVE_DEDUP_THRESHOLD", "0.6"))
+CREATIVE_MAX_RECOMMENDATIONS = int(os.getenv("CREATIVE_MAX_RECOMMENDATIONS", "8"))
+
+# Tool-calling insights (python main.py --agent): the model fetches data slices through tools
+# instead of receiving the data summary; caps per run on tool calls, prompt tokens and result rows
+AGENT_MAX_TOOL_CALLS = int(os.getenv("AGENT_MAX_TOOL_CALLS", "12"))
+AGENT_MAX_TOKENS = int(os.getenv("AGENT_MAX_TOKENS", "30000"))
+AGENT_MAX_RESULT_ROWS = int(os.getenv("AGENT_MAX_RESULT_ROWS", "50"))
+
+# Service mode (service.py): worker pool, bounded job queue and datasets kept loaded between jobs
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "4"))
+SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "64"))
+SERVICE_WARM_DATASETS = int(os.getenv("SERVICE_WARM_DATASETS", "8"))
+SERVICE_JOB_HISTORY = int(os.getenv("SERVICE_JOB_HISTORY", "1000"))
+# Only files inside this directory can be analyzed (unset = any local path)
+SERVICE_DATA_ROOT = os.getenv("SERVICE_DATA_ROOT", "")
+
+# Run history: every run's insights, creatives, metrics and input fingerprint appended to an indexed
+# SQLite store (python run_history.py list|insights|show|diff|export); the JSON/markdown files in
+# OUTPUT_DIR are optional exports
+RUN_HISTORY_ENABLED = os.getenv("RUN_HISTORY_ENABLED", "true").lower() == "true"
+RUN_HISTORY_PATH = os.getenv("RUN_HISTORY_PATH", os.path.join(OUTPUT_DIR, "run_history.sqlite"))
+EXPORT_OUTPUTS = os.getenv("EXPORT_OUTPUTS", "true").lower() == "true"
 
+# Batch mode (batch.py)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", "3"))
+BATCH_BACKOFF_SECONDS = float(os.getenv("BATCH_BACKOFF_SECONDS", "2.0"))
@@ -0,0 +1,142 @@
+"""Merge creative variants: drop near-duplicate copy and rank the rest against segment metrics."""
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+# Recommendation fields whose value names a segment directly
+FIELD_DIMENSIONS = ["campaign_type", "ad_format"]
+
+# Recommendation text searched for the other dimensions' segment values
+TEXT_FIELDS = ["headline", "primary_text", "targeting_suggestions"]
+
+# Segment values too generic to be recognized in free text
+GENERIC_SEGMENTS = {"all", "unknown"}
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of ``text``, lowercased with whitespace collapsed."""
+    text = " ".join(str(text).lower().split())
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two sets (1.0 for two empty sets)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def dedupe(items: Sequence[Dict[str, Any]], fields: Sequence[str],
+           threshold: float = 0.6) -> Tuple[List[Dict[str, Any]], int]:
+    """Keep the first of each group of items whose text is near-identical.
+
+    An item is a duplicate of an earlier kept one if any of ``fields`` has a
+    trigram Jaccard similarity of at least ``threshold`` to the same field.
+
+    Returns:
+        (kept items in their original order, number dropped)
+    """
+    kept: List[Dict[str, Any]] = []
+    seen: List[List[Set[str]]] = []
+    for item in items:
+        grams = [trigrams(item.get(field) or "") for field in fields]
+        if any(any(g and jaccard(g, other[i]) >= threshold for i, g in enumerate(grams)) for other in seen):
+            continue
+        kept.append(item)
+        seen.append(grams)
+    return kept, len(items) - len(kept)
+
+
+def dedupe_strings(values: Sequence[str], threshold: float = 0.6) -> List[str]:
+    """Drop strings near-identical to an earlier one (see ``dedupe``)."""
+    kept, _ = dedupe([{"text": value} for value in values], ["text"], threshold)
+    return [item["text"] for item in kept]
+
+
+def _mentions(text: str, value: str) -> bool:
+    return re.search(rf"(?<![\w-]){re.escape(value.lower())}(?![\w-])", text) is not None
+
+
+def score_recommendation(recommendation: Dict[str, Any], metrics: Optional[Dict[str, Any]],
+                         metric: str = "roas") -> Tuple[float, List[str]]:
+    """Score a creative by how its segments perform relative to the account.
+
+    Segments are the recommendation's campaign type and ad format, plus any
+    other segment value (product category, age group, gender) named in its
+    headline, copy or targeting.
+
+    Args:
+        recommendation: One creative recommendation
+        metrics: Metrics summary (see ``analytics.compute_metrics_summary``)
+        metric: Higher-is-better metric compared with the account's overall value
+
+    Returns:
+        (mean of segment metric / overall metric, or 1.0 if no segment
+        matched; matched segments as ``dimension=value``)
+    """
+    if not metrics or not metrics["overall"].get(metric):
+        return 1.0, []
+    overall = metrics["overall"][metric]
+    text = " ".join(
+        " ".join(map(str, value)) if isinstance(value, list) else str(value)
+        for value in (recommendation.get(field) or "" for field in TEXT_FIELDS)
+    ).lower()
+    ratios, matched = [], []
+    for dimension, segments in metrics["segments"].items():
+        field = str(recommendation.get(dimension) or "").strip().lower()
+        for segment in segments:
+            name = str(segment["segment"])
+            if name.lower() in GENERIC_SEGMENTS or segment.get(metric) is None:
+                continue
+            if dimension in FIELD_DIMENSIONS:
+                match = field == name.lower()
+            else:
+                match = _mentions(text, name)
+            if match:
+                ratios.append(segment[metric] / overall)
+                matched.append(f"{dimension}={name}")
+    if not ratios:
+        return 1.0, []
+    return round(sum(ratios) / len(ratios), 3), matched
+
+
+def merge_variants(variants: Sequence[Dict[str, Any]], metrics: Optional[Dict[str, Any]] = None,
+                   threshold: float = 0.6, max_recommendations: Optional[int] = None,
+                   metric: str = "roas") -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """Merge creatives generated independently into one result.
+
+    Recommendations whose headline or primary text is near-identical to an
+    earlier one are dropped; the rest are ranked best first by
+    ``score_recommendation`` (ties keep variant order) and annotated with
+    their ``score``, matched ``segments`` and source ``variant``. A/B tests
+    and best practices are deduplicated the same way.
+
+    Args:
+        variants: Creatives outputs, in generation order
+        metrics: Metrics summary to rank against (None = keep variant order)
+        threshold: Trigram Jaccard similarity at which copy counts as a duplicate
+        max_recommendations: Recommendations kept at most
+
+    Returns:
+        (merged creatives, counts of candidate and duplicate recommendations)
+    """
+    candidates = []
+    for index, variant in enumerate(variants, start=1):
+        for recommendation in variant.get("creative_recommendations", []):
+            candidates.append({**recommendation, "variant": index})
+    kept, duplicates = dedupe(candidates, ["headline", "primary_text"], threshold)
+    for recommendation in kept:
+        recommendation["score"], recommendation["segments"] = score_recommendation(recommendation, metrics, metric)
+    kept.sort(key=lambda recommendation: -recommendation["score"])
+
+    tests, _ = dedupe([test for variant in variants for test in variant.get("a_b_test_suggestions", [])],
+                      ["test_name", "hypothesis"], threshold)
+    practices = dedupe_strings([practice for variant in variants
+                                for practice in variant.get("creative_best_practices", [])], threshold)
+    merged = {
+        "creative_recommendations": kept[:max_recommendations] if max_recommendations else kept,
+        "a_b_test_suggestions": tests,
+        "creative_best_practices": practices
+    }
+    return merged, {"candidates": len(candidates), "duplicates": duplicates}
@@ -0,0 +1,240 @@
+"""Pre-aggregated cube of additive measures over the categorical dimensions, persisted to disk."""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from analytics import ADDITIVE_MEASURES, RATIO_METRICS, additive_measures, derive_ratios, has_metric_columns
+from data_cache import PYARROW_AVAILABLE, file_sha256
+from schema import DIMENSIONS, SCHEMA_VERSION
+
+if PYARROW_AVAILABLE:
+    import pyarrow.feather as feather
+
+# Bump when the cell layout changes so cubes written by an older version are rebuilt
+CUBE_VERSION = 1
+
+# Measures summed per cell; ratios are derived from them at query time
+MEASURES = ADDITIVE_MEASURES + ["rows"]
+
+# Values counted rather than measured, returned as ints
+COUNT_MEASURES = {"impressions", "clicks", "conversions", "rows"}
+
+
+class AggregateCube:
+    """Additive measures summed per combination of dimension values.
+
+    The cells are the finest breakdown (every dimension at once), so any
+    breakdown by a subset of the dimensions, filtered or not, is a group-by
+    over the cells. Their number depends on the dimensions' cardinalities,
+    not on the number of rows, and ratios are derived from the summed
+    measures exactly as ``analytics`` does over the rows.
+    """
+
+    def __init__(self, cells: pd.DataFrame, dimensions: List[str], rows: int):
+        """Initialize the cube.
+
+        Args:
+            cells: One row per combination of dimension values, with MEASURES
+            dimensions: Dimension columns of ``cells``
+            rows: Number of source rows aggregated
+        """
+        self.cells = cells
+        self.dimensions = dimensions
+        self.rows = rows
+
+    @classmethod
+    def build(cls, frames: Iterable[pd.DataFrame], dimensions: Optional[List[str]] = None) -> "AggregateCube":
+        """Aggregate ads data into a cube, one frame (or chunk) at a time.
+
+        Args:
+            frames: The data, whole or in chunks (e.g. ``DataLoader.iter_chunks()``)
+            dimensions: Dimensions to aggregate over (defaults to those of DIMENSIONS in the data)
+
+        Returns:
+            The cube
+
+        Raises:
+            ValueError: If the data lacks the metric columns or every dimension
+        """
+        cells = None
+        rows = 0
+        for df in frames:
+            if not has_metric_columns(df):
+                raise ValueError("The data lacks the metric columns needed to build a cube")
+            if dimensions is None:
+                dimensions = [dimension for dimension in DIMENSIONS if dimension in df.columns]
+                if not dimensions:
+                    raise ValueError(f"The data has none of the dimensions {', '.join(DIMENSIONS)}")
+            sums = additive_measures(df).groupby([df[d].astype(str) for d in dimensions], observed=True).sum()
+            cells = sums if cells is None else cells.add(sums, fill_value=0)
+            rows += len(df)
+        if cells is None:
+            raise ValueError("No rows to build a cube from")
+        cells = cells.reset_index()
+        for dimension in dimensions:
+            cells[dimension] = cells[dimension].astype("category")
+        return cls(cells, dimensions, rows)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def values(self, dimension: str) -> List[str]:
+        """Distinct values of a dimension."""
+        self._check_dimensions([dimension])
+        return sorted(self.cells[dimension].cat.categories)
+
+    def query(self, group_by: Optional[Sequence[str]] = None,
+              filters: Optional[Dict[str, Union[str, Sequence[str]]]] = None,
+              metrics: Optional[Sequence[str]] = None, sort_by: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Break the measures down by some dimensions, for some dimension values.
+
+        Args:
+            group_by: Dimensions to break down by (none = one total row)
+            filters: Dimension → value or list of values to keep
+            metrics: Measures and ratio metrics to return (defaults to all)
+            sort_by: Metric to sort by, best first (defaults to roas)
+            limit: Maximum number of rows returned
+
+        Returns:
+            One record per group with its dimension values and metrics; ratios
+            that divide by zero are None
+
+        Raises:
+            ValueError: On an unknown dimension or metric
+        """
+        group_by = list(group_by or [])
+        filters = dict(filters or {})
+        metrics = list(metrics or ["impressions", "clicks", "conversions", "spend_usd", "revenue_usd"]
+                       + list(RATIO_METRICS))
+        sort_by = sort_by or "roas"
+        self._check_dimensions(group_by + list(filters))
+        unknown = [m for m in metrics + [sort_by] if m not in MEASURES and m not in RATIO_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metric(s) {', '.join(unknown)}; "
+                             f"available: {', '.join(MEASURES + list(RATIO_METRICS))}")
+
+        cells = self.cells
+        if filters:
+            mask = np.ones(len(cells), dtype=bool)
+            for dimension, value in filters.items():
+                wanted = [value] if isinstance(value, str) else list(value)
+                mask &= cells[dimension].isin([str(v) for v in wanted]).to_numpy()
+            cells = cells[mask]
+
+        if group_by:
+            totals = cells.groupby(group_by, observed=True)[MEASURES].sum()
+        else:
+            totals = cells[MEASURES].sum().to_frame().T
+        if totals.empty:
+            return []
+        results = derive_ratios(totals)
+        # Best first: descending unless lower is better (costs)
+        results = results.sort_values(sort_by, ascending=not RATIO_METRICS.get(sort_by, True),
+                                      na_position="last")
+        if limit is not None:
+            results = results.head(limit)
+
+        records = []
+        for key, row in results.iterrows():
+            keys = key if isinstance(key, tuple) else (key,)
+            record: Dict[str, Any] = dict(zip(group_by, keys)) if group_by else {}
+            for metric in metrics:
+                value = row[metric]
+                if pd.isna(value):
+                    record[metric] = None
+                elif metric in COUNT_MEASURES:
+                    record[metric] = int(value)
+                else:
+                    record[metric] = round(float(value), 2)
+            records.append(record)
+        return records
+
+    def _check_dimensions(self, dimensions: List[str]):
+        unknown = [d for d in dimensions if d not in self.dimensions]
+        if unknown:
+            raise ValueError(f"Unknown dimension(s) {', '.join(unknown)}; available: {', '.join(self.dimensions)}")
+
+
+class CubeStore:
+    """Cubes persisted as Feather files, invalidated when their source file changes.
+
+    Like ``data_cache.ColumnarCache``, a ``.json`` sidecar records the source's
+    size, mtime and content hash; a touched but unchanged source keeps its cube.
+    """
+
+    def __init__(self, cache_dir: str):
+        """Initialize the store.
+
+        Args:
+            cache_dir: Directory to store cubes in
+        """
+        self.cache_dir = Path(cache_dir)
+
+    @property
+    def available(self) -> bool:
+        """Whether pyarrow is installed so cubes can be persisted."""
+        return PYARROW_AVAILABLE
+
+    def _paths(self, source: str):
+        resolved = str(Path(source).resolve())
+        key = hashlib.sha1(resolved.encode("utf-8")).hexdigest()[:16]
+        stem = f"{Path(source).stem}-{key}.cube"
+        return self.cache_dir / f"{stem}.feather", self.cache_dir / f"{stem}.json"
+
+    def load(self, source: str) -> Optional[AggregateCube]:
+        """Return the stored cube of ``source`` if it is still valid, else None."""
+        if not self.available:
+            return None
+        data_path, meta_path = self._paths(source)
+        if not data_path.exists() or not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        stat = os.stat(source)
+        if (meta.get("cube_version") != CUBE_VERSION or meta.get("schema_version") != SCHEMA_VERSION
+                or meta.get("size") != stat.st_size):
+            return None
+        if meta.get("mtime_ns") != stat.st_mtime_ns:
+            if meta.get("sha256") != file_sha256(source):
+                return None
+            meta["mtime_ns"] = stat.st_mtime_ns
+            self._write_meta(meta_path, meta)
+        return AggregateCube(feather.read_feather(str(data_path)), meta["dimensions"], meta["rows"])
+
+    def save(self, source: str, cube: AggregateCube):
+        """Store ``cube`` as the cube of ``source``."""
+        if not self.available:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data_path, meta_path = self._paths(source)
+        stat = os.stat(source)
+        meta = {
+            "source": str(Path(source).resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(source),
+            "schema_version": SCHEMA_VERSION,
+            "cube_version": CUBE_VERSION,
+            "dimensions": cube.dimensions,
+            "rows": cube.rows,
+            "cells": len(cube),
+        }
+        tmp_path = data_path.with_suffix(".feather.tmp")
+        feather.write_feather(cube.cells, str(tmp_path))
+        os.replace(tmp_path, data_path)
+        self._write_meta(meta_path, meta)
+
+    @staticmethod
+    def _write_meta(meta_path: Path, meta: Dict[str, Any]):
+        tmp_path = meta_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, meta_path)
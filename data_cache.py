@@ -0,0 +1,143 @@
+"""Local columnar (Feather/Arrow) cache of parsed CSV files."""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+import pandas as pd
+from schema import SCHEMA_VERSION
+
+# Optional pyarrow import
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Rows per Arrow record batch; streaming reads from the cache one batch at a time
+CACHE_BATCH_ROWS = 100_000
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ColumnarCache:
+    """Typed Feather copies of source CSVs, invalidated when the source changes.
+
+    Each source file gets a ``.feather`` copy and a ``.json`` sidecar recording
+    the source's size, mtime and content hash. A matching size and mtime is
+    trusted without re-hashing; if only the mtime changed, the content hash
+    decides whether the copy is still valid.
+    """
+
+    def __init__(self, cache_dir: str):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory to store cached copies in
+        """
+        self.cache_dir = Path(cache_dir)
+
+    @property
+    def available(self) -> bool:
+        """Whether pyarrow is installed so the cache can be used."""
+        return PYARROW_AVAILABLE
+
+    def _paths(self, source: str):
+        resolved = str(Path(source).resolve())
+        key = hashlib.sha1(resolved.encode("utf-8")).hexdigest()[:16]
+        stem = f"{Path(source).stem}-{key}"
+        return self.cache_dir / f"{stem}.feather", self.cache_dir / f"{stem}.json"
+
+    def lookup(self, source: str) -> Optional[Path]:
+        """Return the cached copy of ``source`` if it is still valid.
+
+        Args:
+            source: Path to the source CSV file
+
+        Returns:
+            Path to the Feather file, or None if missing or stale
+        """
+        if not self.available:
+            return None
+        data_path, meta_path = self._paths(source)
+        if not data_path.exists() or not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        stat = os.stat(source)
+        if meta.get("schema_version") != SCHEMA_VERSION or meta.get("size") != stat.st_size:
+            return None
+        if meta.get("mtime_ns") != stat.st_mtime_ns:
+            # Touched but possibly unchanged; fall back to the content hash
+            if meta.get("sha256") != file_sha256(source):
+                return None
+            meta["mtime_ns"] = stat.st_mtime_ns
+            self._write_meta(meta_path, meta)
+        return data_path
+
+    def read(self, source: str) -> Optional[pd.DataFrame]:
+        """Memory-map the cached copy of ``source`` if it is still valid."""
+        data_path = self.lookup(source)
+        if data_path is None:
+            return None
+        return feather.read_table(str(data_path), memory_map=True).to_pandas()
+
+    def iter_batches(self, source: str) -> Optional[Iterator[pd.DataFrame]]:
+        """Iterate over the cached copy record batch by record batch.
+
+        Returns:
+            Iterator of DataFrames, or None if there is no valid cached copy
+        """
+        data_path = self.lookup(source)
+        if data_path is None:
+            return None
+
+        def batches():
+            with pa.memory_map(str(data_path), "r") as source_file:
+                reader = pa.ipc.open_file(source_file)
+                for i in range(reader.num_record_batches):
+                    yield reader.get_batch(i).to_pandas()
+
+        return batches()
+
+    def write(self, source: str, df: pd.DataFrame):
+        """Store a typed copy of ``df`` as the cached version of ``source``.
+
+        The Feather file is written uncompressed so it can be memory-mapped.
+        """
+        if not self.available:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data_path, meta_path = self._paths(source)
+        stat = os.stat(source)
+        meta = {
+            "source": str(Path(source).resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(source),
+            "schema_version": SCHEMA_VERSION,
+            "rows": len(df),
+        }
+        tmp_path = data_path.with_suffix(".feather.tmp")
+        feather.write_feather(df, str(tmp_path), compression="uncompressed", chunksize=CACHE_BATCH_ROWS)
+        os.replace(tmp_path, data_path)
+        self._write_meta(meta_path, meta)
+
+    @staticmethod
+    def _write_meta(meta_path: Path, meta: Dict[str, Any]):
+        tmp_path = meta_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, meta_path)
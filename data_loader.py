@@ -1,56 +1,290 @@
 """Data loading and preprocessing module."""
 import pandas as pd
+import functools
 import json
-from typing import Dict, List, Any
+import threading
+from typing import Callable, Dict, List, Any, Iterator, Optional
 from pathlib import Path
+from streaming_stats import SummaryAccumulator, DEFAULT_SKETCH_CAPACITY
+from data_cache import ColumnarCache
+from schema import memory_mb, optimize_dtypes
+from analytics import SegmentAggregator, compute_metrics_summary
+from significance import compute_significance
+from cube import AggregateCube, CubeStore
+from prompt_budget import fit_summary_to_budget
+from instrumentation import NULL_INSTRUMENTATION
+
+
+def _synchronized(method: Callable) -> Callable:
+    """Run a method under its loader's lock, so threads sharing a loader fill its lazy caches once."""
+    @functools.wraps(method)
+    def wrapper(self: "DataLoader", *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class DataLoader:
     """Load and preprocess Facebook ads data."""
     
-    def __init__(self, data_path: str):
+    def __init__(self, data_path: str, chunksize: Optional[int] = None,
+                 sketch_capacity: int = DEFAULT_SKETCH_CAPACITY,
+                 cache_dir: Optional[str] = None, instrumentation: Any = None,
+                 optimize_dtypes: bool = True):
         """Initialize data loader.
         
         Args:
             data_path: Path to the CSV file containing FB ads data
+            chunksize: If set, stream the CSV in chunks of this many rows instead
+                of loading the whole file into memory
+            sketch_capacity: Values kept exactly per numeric column in streaming
+                mode. Quantiles of a file that fits in one chunk are exact; above
+                the capacity they are approximate and not interpolated between
+                values, so they can differ slightly from a full load
+            cache_dir: If set, keep a typed columnar copy of the CSV here and
+                reuse it while the source file is unchanged
+            instrumentation: Records timings of the loading steps (see ``instrumentation``)
+            optimize_dtypes: Convert repeated strings to categoricals, dates to
+                datetime64 and counters to smaller ints after parsing the CSV.
+                When off, loads keep the dtypes pandas parsed and bypass the
+                columnar cache, whose copy is always typed
         """
         self.data_path = data_path
+        self.chunksize = chunksize
+        self.sketch_capacity = sketch_capacity
+        self.cache = ColumnarCache(cache_dir) if cache_dir else None
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.optimize_dtypes = optimize_dtypes
+        self.memory_report: Dict[str, float] = {}
         self.df = None
+        self._summary = None
+        self._preview = None
+        self._metrics = None
+        self._significance: Dict[tuple, Optional[Dict[str, Any]]] = {}
+        self._cube: Optional[AggregateCube] = None
+        # Warm loaders are shared by the service's worker threads
+        self._lock = threading.RLock()
+    
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, label: str = "<dataframe>") -> "DataLoader":
+        """Create a loader around rows that are already in memory (e.g. one segment).
+
+        Args:
+            df: Ads data
+            label: Name used in place of the file path
+        """
+        loader = cls(label)
+        loader.df = df
+        return loader
+
+    @property
+    def streaming(self) -> bool:
+        """Whether the loader streams the file instead of holding it in memory."""
+        return self.chunksize is not None and self.df is None
         
+    @_synchronized
     def load_data(self) -> pd.DataFrame:
         """Load data from CSV file.
         
         Returns:
             DataFrame containing the ads data
         """
+        with self.instrumentation.stage("load_data") as record:
+            df = self._load_data()
+            record.set(rows=len(df), **self.memory_report)
+            return df
+    
+    def _load_data(self) -> pd.DataFrame:
         try:
+            # The cached copy is typed, so it only serves loads that optimize dtypes
+            use_cache = self.cache is not None and self.optimize_dtypes
+            cached = self.cache.read(self.data_path) if use_cache else None
+            if cached is not None:
+                self.df = cached
+                self.memory_report = {"memory_mb": round(memory_mb(self.df), 1)}
+                print(f"✓ Loaded {len(self.df)} rows from cache for {self.data_path} "
+                      f"({self.memory_report['memory_mb']:.1f} MiB in memory)")
+                return self.df
+            
             self.df = pd.read_csv(self.data_path)
-            print(f"✓ Loaded {len(self.df)} rows from {self.data_path}")
+            before = memory_mb(self.df)
+            if self.optimize_dtypes:
+                self.df = optimize_dtypes(self.df)
+            self.memory_report = {"memory_before_mb": round(before, 1), "memory_mb": round(memory_mb(self.df), 1)}
+            if use_cache and self.cache.available:
+                try:
+                    self.cache.write(self.data_path, self.df)
+                except Exception as e:
+                    print(f"⚠ Could not write data cache: {e}")
+            print(f"✓ Loaded {len(self.df)} rows from {self.data_path} "
+                  f"({before:.1f} MiB parsed → {self.memory_report['memory_mb']:.1f} MiB in memory)")
             return self.df
         except FileNotFoundError:
             raise FileNotFoundError(f"Data file not found: {self.data_path}")
         except Exception as e:
             raise Exception(f"Error loading data: {str(e)}")
     
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """Iterate over the CSV file in bounded chunks.
+        
+        Yields:
+            DataFrame chunks of at most ``chunksize`` rows
+        """
+        batches = self.cache.iter_batches(self.data_path) if self.cache else None
+        if batches is not None:
+            yield from batches
+            return
+        
+        try:
+            with pd.read_csv(self.data_path, chunksize=self.chunksize or 100_000) as reader:
+                yield from reader
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Data file not found: {self.data_path}")
+    
+    @_synchronized
+    def scan(self) -> Dict[str, Any]:
+        """Compute summary statistics in a single streaming pass over the file.
+        
+        Peak memory is bounded by the chunk size and the quantile sketches, not
+        by the file size. The first rows are kept for the data preview.
+        
+        Returns:
+            Dictionary containing summary statistics
+        """
+        with self.instrumentation.stage("scan") as record:
+            summary = self._scan()
+            record.set(rows=summary["total_campaigns"])
+            return summary
+    
+    def _scan(self) -> Dict[str, Any]:
+        accumulator = SummaryAccumulator(self.sketch_capacity)
+        segments = SegmentAggregator()
+        preview = None
+        # Kept only until a second chunk arrives, to give exact quantiles for a single-chunk file
+        first = None
+        try:
+            for chunk in self.iter_chunks():
+                if preview is None:
+                    preview, first = chunk.head(10), chunk
+                else:
+                    first = None
+                accumulator.update(chunk)
+                segments.update(chunk)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error loading data: {str(e)}")
+        
+        self._summary = accumulator.to_summary()
+        if first is not None and len(first.select_dtypes(include=["number"]).columns) > 0:
+            self._summary["numeric_summary"] = first.describe(include="number").to_dict()
+        self._preview = preview
+        self._metrics = segments.to_summary()
+        print(f"✓ Streamed {self._summary['total_campaigns']} rows from {self.data_path}")
+        return self._summary
+    
+    @_synchronized
     def get_summary_stats(self) -> Dict[str, Any]:
         """Get summary statistics of the dataset.
         
         Returns:
             Dictionary containing summary statistics
         """
+        if self.streaming:
+            return self._summary if self._summary is not None else self.scan()
+        
         if self.df is None:
             self.load_data()
         
         summary = {
             "total_campaigns": len(self.df),
             "columns": list(self.df.columns),
-            "numeric_summary": self.df.describe().to_dict() if len(self.df.select_dtypes(include=['number']).columns) > 0 else {},
+            "numeric_summary": self.df.describe(include="number").to_dict() if len(self.df.select_dtypes(include=['number']).columns) > 0 else {},
             "missing_values": self.df.isnull().sum().to_dict(),
             "data_types": self.df.dtypes.astype(str).to_dict()
         }
         
         return summary
     
+    @_synchronized
+    def get_metrics_summary(self) -> Optional[Dict[str, Any]]:
+        """Get aggregated performance metrics computed locally over every row.
+        
+        Returns:
+            Dictionary with overall and per-segment CTR, CPC, CPM, CPA,
+            conversion rate and ROAS, top/bottom campaigns and outliers, or
+            None if the data lacks the metric columns
+        """
+        if self.streaming:
+            if self._summary is None:
+                self.scan()
+            return self._metrics
+        
+        if self.df is None:
+            self.load_data()
+        
+        if self._metrics is None:
+            self._metrics = compute_metrics_summary(self.df)
+        return self._metrics
+    
+    @_synchronized
+    def get_significance_summary(self, **options: Any) -> Optional[Dict[str, Any]]:
+        """Get significance tests of segment and campaign differences, and anomalous campaigns.
+        
+        Args:
+            **options: Settings of ``significance.compute_significance`` (alpha,
+                resamples, z_threshold, ...); results are cached per settings
+        
+        Returns:
+            Output of ``significance.compute_significance``, or None in streaming
+            mode (the tests resample rows) or if the data lacks the metric columns
+        """
+        if self.streaming:
+            return None
+        
+        if self.df is None:
+            self.load_data()
+        
+        key = tuple(sorted(options.items()))
+        if key not in self._significance:
+            with self.instrumentation.stage("significance") as record:
+                summary = compute_significance(self.df, **options)
+                if summary:
+                    record.set(tests=summary["tests"],
+                               significant=summary["significant_count"] + summary["significant_campaign_count"])
+                self._significance[key] = summary
+        return self._significance[key]
+    
+    @_synchronized
+    def get_cube(self) -> AggregateCube:
+        """Get the pre-aggregated cube of the data for breakdown queries.
+        
+        With a cache directory the cube is stored next to the columnar copy and
+        reused while the source file is unchanged, so a new process answers
+        queries without reading the rows; otherwise it is built from the loaded
+        data (or one pass over the chunks in streaming mode).
+        
+        Returns:
+            Cube of additive measures over the categorical dimensions
+        """
+        if self._cube is not None:
+            return self._cube
+        
+        store = CubeStore(str(self.cache.cache_dir)) if self.cache and Path(self.data_path).is_file() else None
+        with self.instrumentation.stage("cube") as record:
+            cube = store.load(self.data_path) if store else None
+            record.set(from_disk=cube is not None)
+            if cube is None:
+                if self.df is None and not self.streaming:
+                    self.load_data()
+                cube = AggregateCube.build([self.df] if self.df is not None else self.iter_chunks())
+                if store:
+                    store.save(self.data_path, cube)
+            record.set(cells=len(cube), rows=cube.rows)
+        self._cube = cube
+        return cube
+    
+    @_synchronized
     def get_data_preview(self, n_rows: int = 5) -> List[Dict[str, Any]]:
         """Get a preview of the data.
         
@@ -60,10 +294,19 @@ class DataLoader:
         Returns:
             List of dictionaries representing rows
         """
+        if self.streaming:
+            # Match the dtypes a full load would infer (e.g. ints that are floats elsewhere)
+            dtypes = self.get_summary_stats()["data_types"]
+            if self._preview is None or len(self._preview) < n_rows:
+                self._preview = pd.read_csv(self.data_path, nrows=max(n_rows, 10))
+            preview = self._preview.head(n_rows)
+            preview = preview.astype({c: dtypes[c] for c in preview.columns if dtypes[c] != str(preview[c].dtype)})
+            return _preview_records(preview)
+        
         if self.df is None:
             self.load_data()
         
-        return self.df.head(n_rows).to_dict('records')
+        return _preview_records(self.df.head(n_rows))
     
     def get_data_for_analysis(self) -> str:
         """Get formatted data string for LLM analysis.
@@ -71,7 +314,11 @@ class DataLoader:
         Returns:
             Formatted string representation of the data
         """
-        if self.df is None:
+        with self.instrumentation.stage("get_data_for_analysis"):
+            return self._data_for_analysis()
+    
+    def _data_for_analysis(self) -> str:
+        if self.df is None and not self.streaming:
             self.load_data()
         
         # Convert DataFrame to a readable format
@@ -91,4 +338,34 @@ Full Dataset Statistics:
 {json.dumps(summary['numeric_summary'], indent=2)}
 """
         return data_str
+    
+    def get_compact_data_for_analysis(self, token_budget: Optional[int] = None,
+                                      model: Optional[str] = None) -> str:
+        """Get a compact data string for LLM analysis that fits a token budget.
+        
+        Uses TSV tables with rounded numbers instead of indented JSON, drops
+        all-zero columns from the sample, and shows fewer sample rows and
+        statistics until the text fits.
+        
+        Args:
+            token_budget: Maximum tokens for the returned text (None = most detailed)
+            model: Model whose tokenizer is used for counting
+            
+        Returns:
+            Compact string representation of the data
+        """
+        with self.instrumentation.stage("get_data_for_analysis", compact=True, token_budget=token_budget):
+            if self.df is None and not self.streaming:
+                self.load_data()
+            
+            return fit_summary_to_budget(self.get_summary_stats(), self.get_data_preview(10), token_budget, model)
+
 
+def _preview_records(preview: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows as JSON-serializable records, with parsed dates shown as date strings."""
+    dates = preview.select_dtypes(include=["datetime", "datetimetz"]).columns
+    if len(dates):
+        preview = preview.assign(**{
+            column: preview[column].astype(str).where(preview[column].notna(), None) for column in dates
+        })
+    return preview.to_dict('records')
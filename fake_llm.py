@@ -0,0 +1,207 @@
+"""Deterministic local stand-in for the chat model, for offline runs and benchmarks."""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Union
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from prompt_budget import count_message_tokens, count_tokens
+
+FAKE_INSIGHTS = {
+    "key_insights": [
+        {
+            "insight": "Video ads convert at a higher rate than static formats",
+            "metric": "conversion_rate_percent",
+            "value": "8.4",
+            "impact": "high",
+            "recommendation": "Shift budget from single image ads to video"
+        },
+        {
+            "insight": "The 18-24 age group has the highest cost per acquisition",
+            "metric": "cpa_usd",
+            "value": "12.3",
+            "impact": "medium",
+            "recommendation": "Tighten targeting or creative for 18-24"
+        }
+    ],
+    "performance_summary": {
+        "top_performers": ["Shapewear Conversion Campaign"],
+        "underperformers": ["Sleepwear Awareness Campaign"],
+        "trends": ["ROAS is stable week over week"]
+    },
+    "opportunities": [
+        {
+            "opportunity": "Scale retargeting for high-ROAS categories",
+            "potential_impact": "10-15% more revenue at similar spend",
+            "action_items": ["Raise retargeting budgets by 20%", "Refresh creatives every two weeks"]
+        }
+    ]
+}
+
+FAKE_CREATIVES = {
+    "creative_recommendations": [
+        {
+            "campaign_type": "Conversion",
+            "ad_format": "Video",
+            "headline": "Comfort you can feel all day",
+            "primary_text": "Soft, supportive and made to move with you.",
+            "call_to_action": "Shop Now",
+            "visual_elements": ["Lifestyle footage", "Close-up fabric shots"],
+            "targeting_suggestions": ["Women 25-44", "Lookalike of purchasers"],
+            "rationale": "Video drives the strongest conversion rate"
+        }
+    ],
+    "a_b_test_suggestions": [
+        {
+            "test_name": "Headline framing",
+            "hypothesis": "Comfort-led headlines outperform price-led ones",
+            "variants": [
+                {"variant_name": "Variant A", "description": "Comfort-led headline"},
+                {"variant_name": "Variant B", "description": "Price-led headline"}
+            ],
+            "success_metrics": ["ctr_percent", "conversion_rate_percent"]
+        }
+    ],
+    "creative_best_practices": ["Show the product in motion", "Keep the first three seconds on-brand"]
+}
+
+# Tool calls made round by round when tools are bound, before answering; the
+# second round repeats a call to exercise the per-run tool cache
+FAKE_TOOL_ROUNDS = [
+    [
+        {"name": "group_by_aggregate", "args": {"group_by": ["ad_format"]}},
+        {"name": "top_k", "args": {"metric": "roas", "k": 3}},
+    ],
+    [
+        {"name": "group_by_aggregate", "args": {"group_by": ["ad_format"]}},
+        {"name": "time_window_summary", "args": {"freq": "month"}},
+    ],
+]
+
+FAKE_REPORT = """## Executive Summary
+Performance is healthy overall, with video and retargeting leading on return on ad spend.
+
+## Key Findings
+- Video ads convert best across categories.
+- Younger audiences are the most expensive to acquire.
+
+## Recommendations
+1. Shift budget toward video.
+2. Refresh creatives for the 18-24 segment.
+"""
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that returns canned, stage-appropriate responses without a network call.
+
+    Simulates a first-token latency and a fixed output speed so pipeline
+    timings are realistic and repeatable.
+    """
+
+    model_name: str = "fake-chat-model"
+    temperature: float = 0.0
+    latency_seconds: float = 0.0
+    tokens_per_second: Optional[float] = None
+    # Characters per streamed chunk
+    chunk_chars: int = 16
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "latency_seconds": self.latency_seconds,
+                "tokens_per_second": self.tokens_per_second}
+
+    def respond(self, messages: List[BaseMessage]) -> str:
+        """Pick the canned response for the stage the messages belong to."""
+        system = messages[0].content if messages else ""
+        if "fix broken parts" in system:
+            return json.dumps({"fixes": []})
+        if "actionable insights" in system:
+            return json.dumps(FAKE_INSIGHTS)
+        if "creative strategist" in system:
+            return json.dumps(FAKE_CREATIVES)
+        return FAKE_REPORT
+
+    def bind_tools(self, tools: Sequence[Union[Dict[str, Any], type, Callable, BaseTool]],
+                   **kwargs: Any) -> Runnable:
+        """Bind tools so that the model calls them (see FAKE_TOOL_ROUNDS) before answering."""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    @staticmethod
+    def tool_calls(messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Tool calls of the next round, or none once the rounds are done or no tools are bound."""
+        if not tools:
+            return []
+        done = sum(1 for message in messages if getattr(message, "tool_calls", None))
+        if done >= len(FAKE_TOOL_ROUNDS):
+            return []
+        names = {tool["function"]["name"] for tool in tools}
+        return [dict(call, id=f"call_{done}_{i}", type="tool_call")
+                for i, call in enumerate(FAKE_TOOL_ROUNDS[done]) if call["name"] in names]
+
+    def _generation_seconds(self, text: str) -> float:
+        if not self.tokens_per_second:
+            return 0.0
+        return count_tokens(text, self.model_name) / self.tokens_per_second
+
+    def _message(self, messages: List[BaseMessage], text: str,
+                 tool_calls: Optional[List[Dict[str, Any]]] = None) -> AIMessage:
+        input_tokens = count_message_tokens(messages, self.model_name)
+        output_tokens = count_tokens(text, self.model_name)
+        if tool_calls:
+            output_tokens = count_message_tokens([AIMessage(content=text, tool_calls=tool_calls)],
+                                                 self.model_name)
+        return AIMessage(content=text, tool_calls=tool_calls or [], usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        })
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        calls = self.tool_calls(messages, kwargs.get("tools"))
+        text = "" if calls else self.respond(messages)
+        time.sleep(self.latency_seconds + self._generation_seconds(text))
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, text, calls))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         **kwargs: Any) -> ChatResult:
+        calls = self.tool_calls(messages, kwargs.get("tools"))
+        text = "" if calls else self.respond(messages)
+        await asyncio.sleep(self.latency_seconds + self._generation_seconds(text))
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, text, calls))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self.respond(messages)
+        time.sleep(self.latency_seconds)
+        for start in range(0, len(text), self.chunk_chars):
+            piece = text[start:start + self.chunk_chars]
+            time.sleep(self._generation_seconds(piece))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="", usage_metadata=self._message(messages, text).usage_metadata
+        ))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text = self.respond(messages)
+        await asyncio.sleep(self.latency_seconds)
+        for start in range(0, len(text), self.chunk_chars):
+            piece = text[start:start + self.chunk_chars]
+            await asyncio.sleep(self._generation_seconds(piece))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="", usage_metadata=self._message(messages, text).usage_metadata
+        ))
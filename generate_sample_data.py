@@ -1,102 +1,259 @@
 """Generate sample synthetic Facebook ads data for testing."""
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Tuple
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
 
+# Optional pyarrow import (needed for Parquet output; also formats CSV much faster)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
-def generate_sample_data(n_campaigns: int = 50, output_path: str = "synthetic_fb_ads_undergarments.csv"):
+# Campaign types
+CAMPAIGN_TYPES = np.array(["Awareness", "Conversion", "Engagement", "Retargeting", "Lookalike"])
+
+# Ad formats
+AD_FORMATS = np.array(["Single Image", "Carousel", "Video", "Collection", "Stories"])
+
+# Age groups
+AGE_GROUPS = np.array(["18-24", "25-34", "35-44", "45-54", "55+"])
+
+# Genders
+GENDERS = np.array(["All", "Male", "Female"])
+
+# Product categories
+CATEGORIES = np.array(["Bras", "Panties", "Shapewear", "Lingerie Sets", "Sleepwear"])
+
+# Every "<category> <type> Campaign" name, indexed by category * len(CAMPAIGN_TYPES) + type
+CAMPAIGN_NAMES = np.array([f"{c} {t} Campaign" for c in CATEGORIES for t in CAMPAIGN_TYPES])
+
+START_DATE = np.datetime64("2024-01-01")
+
+# Rows generated and written per chunk
+DEFAULT_CHUNK_ROWS = 500_000
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Elementwise division that yields 0 where the denominator is 0."""
+    out = np.zeros(len(numerator), dtype="float64")
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def generate_chunk(first_row: int, n_rows: int, seed: np.random.SeedSequence) -> pd.DataFrame:
+    """Generate ``n_rows`` campaigns numbered from ``first_row``, one column at a time.
+
+    Args:
+        first_row: Zero-based index of the first campaign (used for campaign IDs)
+        n_rows: Number of campaigns to generate
+        seed: Seed for this chunk's independent random stream
+
+    Returns:
+        DataFrame with the synthetic ads schema
+    """
+    rng = np.random.default_rng(seed)
+
+    campaign_type = rng.integers(0, len(CAMPAIGN_TYPES), n_rows)
+    ad_format = rng.integers(0, len(AD_FORMATS), n_rows)
+    category = rng.integers(0, len(CATEGORIES), n_rows)
+    age_group = rng.integers(0, len(AGE_GROUPS), n_rows)
+    gender = rng.integers(0, len(GENDERS), n_rows)
+
+    # Generate realistic performance metrics
+    impressions = rng.integers(10000, 500000, n_rows)
+    reach = (impressions * rng.uniform(0.6, 0.9, n_rows)).astype("int64")
+    clicks = (impressions * rng.uniform(0.01, 0.05, n_rows)).astype("int64")
+    conversions = (clicks * rng.uniform(0.02, 0.15, n_rows)).astype("int64")
+    spend = rng.uniform(50, 5000, n_rows)
+
+    # Calculate derived metrics
+    ctr = _safe_divide(clicks * 100.0, impressions)
+    cpc = _safe_divide(spend, clicks)
+    cpm = _safe_divide(spend * 1000, impressions)
+    conversion_rate = _safe_divide(conversions * 100.0, clicks)
+    cpa = _safe_divide(spend, conversions)
+    roas = rng.uniform(1.5, 8.0, n_rows)  # Return on ad spend
+
+    # Date range
+    start = START_DATE + rng.integers(0, 90, n_rows).astype("timedelta64[D]")
+    end = start + rng.integers(7, 30, n_rows).astype("timedelta64[D]")
+
+    is_video = AD_FORMATS[ad_format] == "Video"
+    ids = pd.Series(np.arange(first_row + 1, first_row + n_rows + 1)).astype(str).str.zfill(4)
+
+    return pd.DataFrame({
+        "campaign_id": "CAMP_" + ids,
+        "campaign_name": CAMPAIGN_NAMES[category * len(CAMPAIGN_TYPES) + campaign_type],
+        "campaign_type": CAMPAIGN_TYPES[campaign_type],
+        "ad_format": AD_FORMATS[ad_format],
+        "product_category": CATEGORIES[category],
+        "target_age_group": AGE_GROUPS[age_group],
+        "target_gender": GENDERS[gender],
+        "start_date": start.astype(str),
+        "end_date": end.astype(str),
+        "impressions": impressions,
+        "reach": reach,
+        "clicks": clicks,
+        "conversions": conversions,
+        "spend_usd": spend.round(2),
+        "ctr_percent": ctr.round(2),
+        "cpc_usd": cpc.round(2),
+        "cpm_usd": cpm.round(2),
+        "conversion_rate_percent": conversion_rate.round(2),
+        "cpa_usd": cpa.round(2),
+        "roas": roas.round(2),
+        "engagement_rate": rng.uniform(1.0, 5.0, n_rows).round(2),
+        "video_views": np.where(is_video, clicks, 0),
+        "video_completion_rate": np.where(is_video, rng.uniform(20, 80, n_rows).round(2), 0.0)
+    })
+
+
+def _chunk_specs(n_campaigns: int, seed: int, chunk_rows: int) -> List[Tuple[int, int, np.random.SeedSequence]]:
+    """Split the dataset into chunks, each with its own random stream spawned from ``seed``."""
+    starts = range(0, max(n_campaigns, 1), chunk_rows)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    return [(start, min(chunk_rows, n_campaigns - start), chunk_seed) for start, chunk_seed in zip(starts, seeds)]
+
+
+def _ordered_map(func: Callable[[Any], Any], items: List[Any], workers: int) -> Iterator[Any]:
+    """Map ``func`` over ``items`` in worker processes, yielding results in order.
+
+    At most ``2 * workers`` results are in flight, so memory stays bounded
+    even when the consumer is slower than the workers.
+    """
+    if workers <= 1 or len(items) <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        remaining = iter(items)
+        pending = deque(executor.submit(func, item) for item in islice(remaining, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            item = next(remaining, None)
+            if item is not None:
+                pending.append(executor.submit(func, item))
+            yield result
+
+
+def _generate_chunk(spec: Tuple[int, int, np.random.SeedSequence]) -> pd.DataFrame:
+    return generate_chunk(*spec)
+
+
+def _render_chunk(spec: Tuple[int, int, np.random.SeedSequence], file_format: str) -> Any:
+    """Generate a chunk and serialize it in the worker, so formatting runs in parallel too."""
+    df = generate_chunk(*spec)
+    if file_format == "parquet":
+        return pa.Table.from_pandas(df, preserve_index=False)
+    if PYARROW_AVAILABLE:
+        # Generated strings never contain commas or quotes, so nothing needs quoting
+        buffer = pa.BufferOutputStream()
+        pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buffer,
+                         pa_csv.WriteOptions(include_header=False, quoting_style="none"))
+        header = (",".join(df.columns) + "\n").encode("utf-8") if spec[0] == 0 else b""
+        return header + buffer.getvalue().to_pybytes()
+    return df.to_csv(index=False, header=spec[0] == 0).encode("utf-8")
+
+
+def iter_chunks(n_campaigns: int, seed: int = 42, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                workers: int = 1) -> Iterator[pd.DataFrame]:
+    """Yield the dataset in order, chunk by chunk.
+
+    Each chunk has its own random stream spawned from ``seed``, so the output
+    depends only on the seed and chunk size, not on the number of workers.
+
+    Args:
+        n_campaigns: Total number of campaigns
+        seed: Random seed
+        chunk_rows: Campaigns per chunk
+        workers: Processes generating chunks in parallel (1 = in this process)
+    """
+    yield from _ordered_map(_generate_chunk, _chunk_specs(n_campaigns, seed, chunk_rows), workers)
+
+
+def generate_sample_data(n_campaigns: int = 50, output_path: str = "synthetic_fb_ads_undergarments.csv",
+                         seed: int = 42, chunk_rows: int = DEFAULT_CHUNK_ROWS, workers: int = 1,
+                         file_format: Optional[str] = None) -> Optional[pd.DataFrame]:
     """Generate synthetic Facebook ads data.
-    
+
     Args:
         n_campaigns: Number of campaigns to generate
-        output_path: Path to save the CSV file
+        output_path: Path to save the file
+        seed: Random seed; the same seed and chunk size give the same data
+        chunk_rows: Campaigns generated and written at a time, bounding memory
+        workers: Processes generating chunks in parallel
+        file_format: ``"csv"`` or ``"parquet"`` (inferred from the extension by default)
+
+    Returns:
+        The generated DataFrame if it fit in a single chunk, otherwise None
     """
-    np.random.seed(42)
-    random.seed(42)
-    
-    # Campaign types
-    campaign_types = ["Awareness", "Conversion", "Engagement", "Retargeting", "Lookalike"]
-    
-    # Ad formats
-    ad_formats = ["Single Image", "Carousel", "Video", "Collection", "Stories"]
-    
-    # CTAs
-    ctas = ["Shop Now", "Learn More", "Sign Up", "Download", "Get Started"]
-    
-    # Age groups
-    age_groups = ["18-24", "25-34", "35-44", "45-54", "55+"]
-    
-    # Genders
-    genders = ["All", "Male", "Female"]
-    
-    # Product categories
-    categories = ["Bras", "Panties", "Shapewear", "Lingerie Sets", "Sleepwear"]
-    
-    data = []
-    start_date = datetime(2024, 1, 1)
-    
-    for i in range(n_campaigns):
-        campaign_id = f"CAMP_{i+1:04d}"
-        campaign_type = random.choice(campaign_types)
-        ad_format = random.choice(ad_formats)
-        category = random.choice(categories)
-        age_group = random.choice(age_groups)
-        gender = random.choice(genders)
-        
-        # Generate realistic performance metrics
-        impressions = np.random.randint(10000, 500000)
-        reach = int(impressions * np.random.uniform(0.6, 0.9))
-        clicks = int(impressions * np.random.uniform(0.01, 0.05))
-        conversions = int(clicks * np.random.uniform(0.02, 0.15))
-        spend = np.random.uniform(50, 5000)
-        
-        # Calculate derived metrics
-        ctr = (clicks / impressions * 100) if impressions > 0 else 0
-        cpc = (spend / clicks) if clicks > 0 else 0
-        cpm = (spend / impressions * 1000) if impressions > 0 else 0
-        conversion_rate = (conversions / clicks * 100) if clicks > 0 else 0
-        cpa = (spend / conversions) if conversions > 0 else 0
-        roas = np.random.uniform(1.5, 8.0)  # Return on ad spend
-        
-        # Date range
-        days_ago = np.random.randint(0, 90)
-        start = start_date + timedelta(days=days_ago)
-        end = start + timedelta(days=np.random.randint(7, 30))
-        
-        data.append({
-            "campaign_id": campaign_id,
-            "campaign_name": f"{category} {campaign_type} Campaign",
-            "campaign_type": campaign_type,
-            "ad_format": ad_format,
-            "product_category": category,
-            "target_age_group": age_group,
-            "target_gender": gender,
-            "start_date": start.strftime("%Y-%m-%d"),
-            "end_date": end.strftime("%Y-%m-%d"),
-            "impressions": impressions,
-            "reach": reach,
-            "clicks": clicks,
-            "conversions": conversions,
-            "spend_usd": round(spend, 2),
-            "ctr_percent": round(ctr, 2),
-            "cpc_usd": round(cpc, 2),
-            "cpm_usd": round(cpm, 2),
-            "conversion_rate_percent": round(conversion_rate, 2),
-            "cpa_usd": round(cpa, 2),
-            "roas": round(roas, 2),
-            "engagement_rate": round(np.random.uniform(1.0, 5.0), 2),
-            "video_views": clicks if ad_format == "Video" else 0,
-            "video_completion_rate": round(np.random.uniform(20, 80), 2) if ad_format == "Video" else 0
-        })
-    
-    df = pd.DataFrame(data)
-    df.to_csv(output_path, index=False)
+    file_format = file_format or ("parquet" if Path(output_path).suffix == ".parquet" else "csv")
+    if file_format == "parquet" and not PYARROW_AVAILABLE:
+        raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+
+    specs = _chunk_specs(n_campaigns, seed, chunk_rows)
+    if len(specs) == 1:
+        df = generate_chunk(*specs[0])
+        if file_format == "parquet":
+            df.to_parquet(output_path, index=False)
+        else:
+            df.to_csv(output_path, index=False)
+    else:
+        df = None
+        chunks = _ordered_map(partial(_render_chunk, file_format=file_format), specs, workers)
+        if file_format == "parquet":
+            writer = None
+            try:
+                for table in chunks:
+                    if writer is None:
+                        writer = pq.ParquetWriter(output_path, table.schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            with open(output_path, "wb") as f:
+                for data in chunks:
+                    f.write(data)
+
     print(f"✓ Generated {n_campaigns} synthetic campaigns and saved to {output_path}")
-    print(f"  Columns: {', '.join(df.columns)}")
+    if df is not None:
+        print(f"  Columns: {', '.join(df.columns)}")
     return df
 
 
-if __name__ == "__main__":
-    generate_sample_data(n_campaigns=50)
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Generate synthetic Facebook ads data")
+    parser.add_argument("--rows", type=int, default=50, help="Number of campaigns to generate")
+    parser.add_argument("--output", default="synthetic_fb_ads_undergarments.csv",
+                        help="Output file (.csv or .parquet)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="Campaigns generated and written per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating chunks in parallel")
+    parser.add_argument("--format", dest="file_format", choices=["csv", "parquet"],
+                        help="Output format (default: from the file extension)")
+    return parser.parse_args(argv)
 
+
+if __name__ == "__main__":
+    args = parse_args()
+    generate_sample_data(
+        n_campaigns=args.rows,
+        output_path=args.output,
+        seed=args.seed,
+        chunk_rows=args.chunk_rows,
+        workers=args.workers,
+        file_format=args.file_format
+    )
@@ -0,0 +1,64 @@
+"""Measure startup and import cost with ``python -X importtime``."""
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+# Cold start allowed for `main.py --help` and `validate_setup.py`, including interpreter startup
+STARTUP_BUDGET_SECONDS = 0.3
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def profile_command(args: List[str]) -> Dict[str, Any]:
+    """Run a Python command in a fresh interpreter and collect its import times.
+
+    Args:
+        args: Arguments after ``python -X importtime`` (e.g. ``["main.py", "--help"]``)
+
+    Returns:
+        Wall time of the whole process, total import time and the import time
+        of each top-level package (its own modules only, not what it imports)
+    """
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=PROJECT_DIR,
+                               capture_output=True, text=True)
+    wall = time.perf_counter() - started
+
+    packages: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:"):].split("|", 2))
+        if not self_us.isdigit():
+            continue  # header line
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+    return {
+        "wall_seconds": wall,
+        "import_seconds": sum(packages.values()),
+        "packages": dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)),
+        "returncode": completed.returncode
+    }
+
+
+def print_import_profile(top: int = 12) -> bool:
+    """Print CLI cold-start time against the budget and the slowest imports of a full run.
+
+    Returns:
+        Whether cold start is within STARTUP_BUDGET_SECONDS
+    """
+    startup = profile_command(["main.py", "--help"])
+    within_budget = startup["wall_seconds"] <= STARTUP_BUDGET_SECONDS
+    print(f"CLI cold start (main.py --help): {startup['wall_seconds'] * 1000:.0f} ms "
+          f"(imports {startup['import_seconds'] * 1000:.0f} ms), "
+          f"budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms {'✓' if within_budget else '✗ over budget'}")
+
+    # A real run also loads the OpenAI client on the first model call
+    analysis = profile_command(["-c", "import agent, langchain_openai"])
+    print(f"\nImports for a full analysis: {analysis['import_seconds'] * 1000:.0f} ms")
+    print(f"{'package':<24} {'ms':>8} {'share':>7}")
+    for package, seconds in list(analysis["packages"].items())[:top]:
+        print(f"{package:<24} {seconds * 1000:>8.1f} {seconds / analysis['import_seconds']:>7.1%}")
+    return within_budget
@@ -0,0 +1,388 @@
+"""Incremental ingestion of appended ad exports into a local store of daily aggregates."""
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import pandas as pd
+from analytics import DIMENSIONS, RATIO_METRICS, additive_measures, derive_ratios, has_metric_columns
+
+# Column each row is attributed to when building daily aggregates
+DATE_COLUMN = "start_date"
+
+# Bytes hashed at the start of the file and just before the last read position
+# to detect whether the file was appended to or rewritten
+FINGERPRINT_BYTES = 64 * 1024
+
+MEASURE_COLUMNS = ["impressions", "clicks", "conversions", "spend_usd", "revenue_usd", "rows"]
+
+
+class _LimitedReader(io.RawIOBase):
+    """File-like view of ``raw`` that stops after ``limit`` bytes."""
+
+    def __init__(self, raw, limit: int):
+        self._raw = raw
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining <= 0:
+            return 0
+        data = self._raw.read(min(len(buffer), self._remaining))
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _hash_range(path: str, start: int, end: int) -> str:
+    start = max(start, 0)
+    with open(path, "rb") as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(max(end - start, 0))).hexdigest()
+
+
+def _complete_lines_end(path: str, size: int) -> int:
+    """Offset just past the last newline, so a row still being written is left for next time."""
+    with open(path, "rb") as f:
+        position = size
+        while position > 0:
+            step = min(64 * 1024, position)
+            f.seek(position - step)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                return position - step + newline + 1
+            position -= step
+    return 0
+
+
+class IncrementalStore:
+    """SQLite store of per-day (and per-day, per-segment) sums for each source file.
+
+    Each source keeps a byte offset and a ``start_date``/``end_date``
+    watermark. When the file has only been appended to, ingestion seeks
+    straight to the offset, so work scales with the new rows. If the file was
+    rewritten, it is rescanned: the watermark day is re-aggregated from the
+    file (a same-day re-export may have added rows to it) and later days are
+    added. Earlier days are kept as stored; corrections to them in a
+    re-export are not picked up.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the store, creating the database if needed.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # The async pipeline runs data stages in worker threads
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        measures = ", ".join(f"{m} REAL NOT NULL DEFAULT 0" for m in MEASURE_COLUMNS)
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                header TEXT NOT NULL,
+                byte_offset INTEGER NOT NULL,
+                head_sha TEXT NOT NULL,
+                tail_sha TEXT NOT NULL,
+                start_watermark TEXT,
+                end_watermark TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS daily (
+                source TEXT NOT NULL,
+                day TEXT NOT NULL,
+                {measures},
+                PRIMARY KEY (source, day)
+            );
+            CREATE TABLE IF NOT EXISTS daily_segments (
+                source TEXT NOT NULL,
+                day TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                {measures},
+                PRIMARY KEY (source, day, dimension, segment)
+            );
+        """)
+        self._conn.commit()
+
+    def _state(self, source: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT header, byte_offset, head_sha, tail_sha, start_watermark, end_watermark "
+            "FROM sources WHERE source = ?", (source,)
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ["header", "byte_offset", "head_sha", "tail_sha", "start_watermark", "end_watermark"]
+        return dict(zip(keys, row))
+
+    def _is_append_of(self, path: str, state: Dict[str, Any], size: int) -> bool:
+        offset = state["byte_offset"]
+        if size < offset:
+            return False
+        head_end = min(FINGERPRINT_BYTES, offset)
+        return (_hash_range(path, 0, head_end) == state["head_sha"]
+                and _hash_range(path, offset - FINGERPRINT_BYTES, offset) == state["tail_sha"])
+
+    def _read_new_rows(self, path: str, start: int, end: int, header: Optional[List[str]],
+                       chunksize: int) -> Iterator[pd.DataFrame]:
+        with open(path, "rb") as raw:
+            raw.seek(start)
+            reader = io.BufferedReader(_LimitedReader(raw, end - start))
+            if header is None:
+                chunks = pd.read_csv(reader, chunksize=chunksize)
+            else:
+                chunks = pd.read_csv(reader, chunksize=chunksize, header=None, names=header)
+            with chunks:
+                yield from chunks
+
+    def ingest(self, path: str, chunksize: int = 100_000) -> Dict[str, Any]:
+        """Aggregate rows added to ``path`` since the last ingest.
+
+        Args:
+            path: CSV file to ingest
+            chunksize: Rows read per chunk
+
+        Returns:
+            Dictionary with the number of rows aggregated (on a rescan, including
+            the re-aggregated watermark day), bytes read and whether a full
+            rescan was needed
+        """
+        with self._lock:
+            return self._ingest(path, chunksize)
+
+    def _ingest(self, path: str, chunksize: int) -> Dict[str, Any]:
+        source = str(Path(path).resolve())
+        size = os.path.getsize(path)
+        end = _complete_lines_end(path, size)
+        state = self._state(source)
+
+        if state is not None and self._is_append_of(path, state, size):
+            start, header, mode = state["byte_offset"], state["header"].split("\t"), "append"
+        else:
+            # New or rewritten file: read everything, keep the watermark day and later
+            start, header, mode = 0, None, "full" if state is None else "rescan"
+        watermark = state["start_watermark"] if state is not None and mode == "rescan" else None
+        if watermark is not None:
+            # Re-aggregated from the rewritten file below
+            for table in ("daily", "daily_segments"):
+                self._conn.execute(f"DELETE FROM {table} WHERE source = ? AND day >= ?", (source, watermark))
+
+        new_rows = 0
+        start_watermark = state["start_watermark"] if state else None
+        end_watermark = state["end_watermark"] if state else None
+        columns = header
+        if end > start:
+            for chunk in self._read_new_rows(path, start, end, header, chunksize):
+                columns = list(chunk.columns)
+                if not has_metric_columns(chunk) or DATE_COLUMN not in chunk.columns:
+                    raise ValueError(f"{path} lacks the columns needed for incremental analysis")
+                days = pd.to_datetime(chunk[DATE_COLUMN], errors="coerce")
+                if watermark is not None:
+                    keep = days >= pd.Timestamp(watermark)
+                    chunk, days = chunk[keep], days[keep]
+                chunk, days = chunk[days.notna()], days[days.notna()]
+                if chunk.empty:
+                    continue
+                self._add_chunk(source, chunk, days.dt.strftime("%Y-%m-%d"))
+                new_rows += len(chunk)
+                start_watermark = max(filter(None, [start_watermark, days.max().strftime("%Y-%m-%d")]))
+                if "end_date" in chunk.columns:
+                    ends = pd.to_datetime(chunk["end_date"], errors="coerce").dropna()
+                    if len(ends):
+                        end_watermark = max(filter(None, [end_watermark, ends.max().strftime("%Y-%m-%d")]))
+
+        if columns is None:
+            columns = list(pd.read_csv(path, nrows=0).columns) if end else []
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sources (source, header, byte_offset, head_sha, tail_sha, "
+            "start_watermark, end_watermark, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (source, "\t".join(columns), end,
+             _hash_range(path, 0, min(FINGERPRINT_BYTES, end)),
+             _hash_range(path, end - FINGERPRINT_BYTES, end),
+             start_watermark, end_watermark, time.time())
+        )
+        self._conn.commit()
+        print(f"✓ Ingested {new_rows} new rows ({end - start} bytes, {mode}) from {path}; "
+              f"watermark {start_watermark}")
+        return {"new_rows": new_rows, "bytes_read": end - start, "mode": mode,
+                "start_watermark": start_watermark, "end_watermark": end_watermark}
+
+    def _add_chunk(self, source: str, chunk: pd.DataFrame, days: pd.Series):
+        measures = additive_measures(chunk)
+        placeholders = ", ".join("?" for _ in MEASURE_COLUMNS)
+        updates = ", ".join(f"{m} = {m} + excluded.{m}" for m in MEASURE_COLUMNS)
+
+        daily = measures.groupby(days.values).sum()
+        self._conn.executemany(
+            f"INSERT INTO daily (source, day, {', '.join(MEASURE_COLUMNS)}) VALUES (?, ?, {placeholders}) "
+            f"ON CONFLICT (source, day) DO UPDATE SET {updates}",
+            [(source, day, *row) for day, row in zip(daily.index, daily[MEASURE_COLUMNS].itertuples(index=False))]
+        )
+
+        for dimension in DIMENSIONS:
+            if dimension not in chunk.columns:
+                continue
+            # NumPy keys: with pandas' string arrays, a two-row chunk would be read as two labels
+            segments = measures.groupby([days.to_numpy(), chunk[dimension].astype(str).to_numpy()]).sum()
+            self._conn.executemany(
+                f"INSERT INTO daily_segments (source, day, dimension, segment, {', '.join(MEASURE_COLUMNS)}) "
+                f"VALUES (?, ?, ?, ?, {placeholders}) "
+                f"ON CONFLICT (source, day, dimension, segment) DO UPDATE SET {updates}",
+                [(source, day, dimension, segment, *row)
+                 for (day, segment), row in zip(segments.index, segments[MEASURE_COLUMNS].itertuples(index=False))]
+            )
+
+    def daily_totals(self, path: str) -> pd.DataFrame:
+        """Return per-day sums for ``path`` indexed by day."""
+        with self._lock:
+            return pd.read_sql_query(
+                f"SELECT day, {', '.join(MEASURE_COLUMNS)} FROM daily WHERE source = ? ORDER BY day",
+                self._conn, params=(str(Path(path).resolve()),), index_col="day"
+            )
+
+    def delta_summary(self, path: str, top_k: int = 3) -> Optional[Dict[str, Any]]:
+        """Compare the latest day and week against the ones before.
+
+        Args:
+            path: Ingested CSV file
+            top_k: Number of biggest segment movers to report per dimension
+
+        Returns:
+            Dictionary with history coverage, day-over-day and week-over-week
+            metric changes, and the segments that moved most week over week;
+            None if nothing has been ingested
+        """
+        source = str(Path(path).resolve())
+        daily = self.daily_totals(path)
+        if daily.empty:
+            return None
+        days = pd.to_datetime(daily.index)
+        latest = days.max()
+
+        def window(frame: pd.DataFrame, frame_days: pd.DatetimeIndex, first, last) -> pd.Series:
+            mask = (frame_days >= first) & (frame_days <= last)
+            return frame[mask][MEASURE_COLUMNS].sum()
+
+        windows = {
+            "latest_day": (latest, latest),
+            "previous_day": (latest - timedelta(days=1), latest - timedelta(days=1)),
+            "last_7_days": (latest - timedelta(days=6), latest),
+            "previous_7_days": (latest - timedelta(days=13), latest - timedelta(days=7)),
+        }
+        totals = derive_ratios(pd.DataFrame({
+            name: window(daily, days, first, last) for name, (first, last) in windows.items()
+        }).T)
+
+        summary = {
+            "history": {
+                "first_day": daily.index[0],
+                "latest_day": daily.index[-1],
+                "days": len(daily),
+                "rows": int(daily["rows"].sum()),
+            },
+            "windows": {name: _round(row) for name, row in totals.iterrows()},
+            "day_over_day": _changes(totals.loc["latest_day"], totals.loc["previous_day"]),
+            "week_over_week": _changes(totals.loc["last_7_days"], totals.loc["previous_7_days"]),
+            "segment_movers": {}
+        }
+
+        with self._lock:
+            segments = pd.read_sql_query(
+                f"SELECT day, dimension, segment, {', '.join(MEASURE_COLUMNS)} FROM daily_segments "
+                "WHERE source = ? AND day >= ?",
+                self._conn, params=(source, (latest - timedelta(days=13)).strftime("%Y-%m-%d"))
+            )
+        if not segments.empty:
+            segment_days = pd.to_datetime(segments["day"])
+            current = segments[segment_days >= windows["last_7_days"][0]]
+            previous = segments[segment_days < windows["last_7_days"][0]]
+            for dimension in segments["dimension"].unique():
+                now = derive_ratios(current[current["dimension"] == dimension].groupby("segment")[MEASURE_COLUMNS].sum())
+                before = derive_ratios(previous[previous["dimension"] == dimension].groupby("segment")[MEASURE_COLUMNS].sum())
+                spend_change = now["spend_usd"].sub(before["spend_usd"], fill_value=0)
+                movers = spend_change.abs().sort_values(ascending=False).head(top_k).index
+                summary["segment_movers"][dimension] = [
+                    {"segment": segment,
+                     **{f"{metric}_change": _change(now[metric].get(segment), before[metric].get(segment))
+                        for metric in ("spend_usd", "conversions", "roas", "cpa_usd")}}
+                    for segment in movers
+                ]
+        return summary
+
+
+# Measures reported as whole numbers
+COUNT_COLUMNS = {"rows", "impressions", "clicks", "conversions"}
+
+
+def _format_number(metric: str, value: Any) -> str:
+    if value is None or pd.isna(value):
+        return ""
+    return str(int(value)) if metric in COUNT_COLUMNS else str(round(float(value), 2))
+
+
+def _round(row: pd.Series) -> Dict[str, Any]:
+    return {key: None if pd.isna(value) else round(float(value), 2) for key, value in row.items()}
+
+
+def _change(current: Any, previous: Any) -> Dict[str, Any]:
+    current = None if current is None or pd.isna(current) else float(current)
+    previous = None if previous is None or pd.isna(previous) else float(previous)
+    change = {"current": None if current is None else round(current, 2),
+              "previous": None if previous is None else round(previous, 2),
+              "percent_change": None}
+    if current is not None and previous:
+        change["percent_change"] = round((current - previous) / abs(previous) * 100, 1)
+    return change
+
+
+def _changes(current: pd.Series, previous: pd.Series) -> Dict[str, Dict[str, Any]]:
+    metrics = ["impressions", "clicks", "conversions", "spend_usd"] + list(RATIO_METRICS)
+    return {metric: _change(current[metric], previous[metric]) for metric in metrics}
+
+
+def format_daily_history(daily: pd.DataFrame, days: int = 14) -> str:
+    """Render the most recent daily aggregates as a compact TSV table."""
+    if daily.empty:
+        return "No rows ingested yet."
+    recent = derive_ratios(daily.tail(days))
+    columns = ["rows", "impressions", "clicks", "conversions", "spend_usd",
+               "ctr_percent", "conversion_rate_percent", "cpa_usd", "roas"]
+    lines = [f"Daily aggregates by {DATE_COLUMN} (last {len(recent)} of {len(daily)} days, TSV):",
+             "\t".join(["day"] + columns)]
+    for day, row in recent.iterrows():
+        lines.append("\t".join([day] + [_format_number(c, row[c]) for c in columns]))
+    return "\n".join(lines)
+
+
+def format_delta_summary(summary: Optional[Dict[str, Any]]) -> str:
+    """Render a delta summary as compact text for an LLM prompt."""
+    if not summary:
+        return ""
+    history = summary["history"]
+    lines = [f"History: {history['days']} days ({history['first_day']} to {history['latest_day']}), "
+             f"{history['rows']} rows ingested"]
+    for title, key in (("Day over day (latest day vs previous day)", "day_over_day"),
+                       ("Week over week (last 7 days vs previous 7 days)", "week_over_week")):
+        lines.append(f"\n{title}:")
+        lines.append("metric\tcurrent\tprevious\tchange_%")
+        for metric, change in summary[key].items():
+            cells = [_format_number(metric, change["current"]), _format_number(metric, change["previous"]),
+                     _format_number("percent_change", change["percent_change"])]
+            lines.append("\t".join([metric] + cells))
+    for dimension, movers in summary["segment_movers"].items():
+        if not movers:
+            continue
+        lines.append(f"\nBiggest week-over-week spend movers by {dimension}:")
+        for mover in movers:
+            parts = [f"{key[:-len('_change')]} {change['previous']}→{change['current']}"
+                     for key, change in mover.items() if key != "segment"]
+            lines.append(f"- {mover['segment']}: " + ", ".join(parts))
+    return "\n".join(lines)
@@ -0,0 +1,208 @@
+"""Local per-stage instrumentation: wall/CPU time, memory, tokens and retries."""
+import contextvars
+import json
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+from io_utils import atomic_write
+
+# Optional resource import (not available on Windows)
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+METRIC_PREFIX = "fb_analyst_stage"
+
+# Counters summed per stage in the Prometheus export
+COUNTERS = ["calls", "wall_seconds", "cpu_seconds", "prompt_tokens", "completion_tokens",
+            "llm_calls", "cache_hits", "retries"]
+
+_current_record: contextvars.ContextVar[Optional["StageRecord"]] = contextvars.ContextVar(
+    "current_stage_record", default=None
+)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB."""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class StageRecord:
+    """Counters collected while one stage runs."""
+
+    def __init__(self, stage: str, labels: Dict[str, Any]):
+        self.stage = stage
+        self.labels = labels
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+        self.cache_hits = 0
+        self.retries = 0
+
+    def set(self, **labels: Any):
+        """Attach extra labels (e.g. row counts) to the record."""
+        self.labels.update(labels)
+
+
+class Instrumentation:
+    """Records per-stage metrics and writes them to a JSONL or Prometheus text file.
+
+    Nested stages each get their own record; LLM calls are attributed to the
+    innermost stage running in the current thread or task.
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        """Initialize instrumentation.
+
+        Args:
+            path: Output file
+            fmt: ``"jsonl"`` (one line per stage run) or ``"prometheus"`` (text
+                exposition format, rewritten with running totals); inferred from
+                the extension if omitted
+        """
+        self.path = Path(path)
+        self.format = fmt or ("prometheus" if self.path.suffix in (".prom", ".txt") else "jsonl")
+        if self.format not in ("jsonl", "prometheus"):
+            raise ValueError(f"Unknown metrics format: {self.format}")
+        self.run_id = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._peak_rss: Dict[str, float] = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    @contextmanager
+    def stage(self, name: str, **labels: Any) -> Iterator[StageRecord]:
+        """Measure the enclosed block as one run of stage ``name``."""
+        record = StageRecord(name, labels)
+        token = _current_record.set(record)
+        rss_before = peak_rss_mb()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        error = None
+        try:
+            yield record
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            _current_record.reset(token)
+            self._write(record, wall, cpu, rss_before, peak_rss_mb(), error)
+
+    def record_llm_call(self, usage: Optional[Dict[str, Any]] = None, cached: bool = False):
+        """Add one LLM call (and its token usage, if reported) to the current stage."""
+        record = _current_record.get()
+        if record is None:
+            return
+        record.llm_calls += 1
+        record.cache_hits += int(cached)
+        if usage:
+            record.prompt_tokens += int(usage.get("input_tokens") or 0)
+            record.completion_tokens += int(usage.get("output_tokens") or 0)
+
+    def record_retry(self):
+        """Count a retry in the current stage."""
+        record = _current_record.get()
+        if record is not None:
+            record.retries += 1
+
+    def _write(self, record: StageRecord, wall: float, cpu: float, rss_before: Optional[float],
+               rss_after: Optional[float], error: Optional[str]):
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "run_id": self.run_id,
+            "stage": record.stage,
+            "wall_seconds": round(wall, 6),
+            "cpu_seconds": round(cpu, 6),
+            # The process high-water mark, and how much this stage raised it
+            "peak_rss_mb": round(rss_after, 1) if rss_after is not None else None,
+            "peak_rss_growth_mb": round(rss_after - rss_before, 1) if rss_after is not None else None,
+            "prompt_tokens": record.prompt_tokens,
+            "completion_tokens": record.completion_tokens,
+            "llm_calls": record.llm_calls,
+            "cache_hits": record.cache_hits,
+            "retries": record.retries,
+            "error": error,
+            **record.labels
+        }
+        with self._lock:
+            if self.format == "jsonl":
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+                return
+            totals = self._totals.setdefault(record.stage, dict.fromkeys(COUNTERS, 0))
+            totals["calls"] += 1
+            for counter in COUNTERS[1:]:
+                totals[counter] += entry[counter]
+            if rss_after is not None:
+                self._peak_rss[record.stage] = max(self._peak_rss.get(record.stage, 0.0), rss_after)
+            self._write_prometheus()
+
+    def _write_prometheus(self):
+        lines = []
+        for counter in COUNTERS:
+            metric = f"{METRIC_PREFIX}_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for stage, totals in sorted(self._totals.items()):
+                lines.append(f'{metric}{{stage="{stage}"}} {totals[counter]:g}')
+        if self._peak_rss:
+            metric = f"{METRIC_PREFIX}_peak_rss_bytes"
+            lines.append(f"# TYPE {metric} gauge")
+            for stage, mb in sorted(self._peak_rss.items()):
+                lines.append(f'{metric}{{stage="{stage}"}} {int(mb * 1024 * 1024)}')
+        with atomic_write(str(self.path)) as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class _NullRecord:
+    def set(self, **labels: Any):
+        pass
+
+
+class _NullStage:
+    def __enter__(self) -> _NullRecord:
+        return _NULL_RECORD
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NULL_RECORD = _NullRecord()
+_NULL_STAGE = _NullStage()
+
+
+class NullInstrumentation:
+    """Instrumentation that records nothing; every call is a constant-time no-op."""
+
+    enabled = False
+
+    def stage(self, name: str, **labels: Any) -> _NullStage:
+        return _NULL_STAGE
+
+    def record_llm_call(self, usage: Optional[Dict[str, Any]] = None, cached: bool = False):
+        pass
+
+    def record_retry(self):
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+def create_instrumentation(path: Optional[str], fmt: Optional[str] = None):
+    """Return file-backed instrumentation for ``path``, or the no-op instance if it is empty."""
+    return Instrumentation(path, fmt) if path else NULL_INSTRUMENTATION
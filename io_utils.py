@@ -0,0 +1,40 @@
+"""File helpers for writing outputs safely."""
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", encoding: str = "utf-8",
+                 keep_partial: bool = False) -> Iterator[IO]:
+    """Write a file via a temporary sibling that replaces ``path`` on success.
+
+    Readers never see a half-written file at ``path``: it holds either the
+    previous contents or the complete new ones.
+
+    Args:
+        path: Destination file
+        mode: ``"w"`` for text or ``"wb"`` for bytes
+        encoding: Text encoding (ignored in binary mode)
+        keep_partial: On failure, leave ``<path>.tmp`` in place so whatever
+            was written can still be inspected
+
+    Yields:
+        Open file object for the temporary file
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(target.name + ".tmp")
+    f = open(tmp_path, mode, encoding=None if "b" in mode else encoding)
+    try:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+    except BaseException:
+        f.close()
+        if not keep_partial:
+            tmp_path.unlink(missing_ok=True)
+        raise
+    f.close()
+    os.replace(tmp_path, target)
@@ -0,0 +1,228 @@
+"""Load test of the analysis service with a local fake LLM: requests per second and latency percentiles."""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from benchmark import BENCH_DIR, dataset_path, git_revision
+from io_utils import atomic_write
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile (``q`` in 0-100) of ``values``."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def free_port() -> int:
+    """An unused local TCP port."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(args: argparse.Namespace, port: int, log_path: str) -> subprocess.Popen:
+    """Start ``service.py`` with the fake chat model in a child process."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "offline-load-test")
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "service.py"),
+               "--host", "127.0.0.1", "--port", str(port), "--workers", str(args.workers),
+               "--queue-size", str(args.queue_size), "--fake-llm-latency", str(args.latency),
+               "--no-llm-cache"]
+    if args.cold:
+        command += ["--warm-datasets", "0"]
+    with open(log_path, "w", encoding="utf-8") as log:
+        return subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def wait_until_healthy(client: Any, url: str, timeout: float = 60.0):
+    """Poll ``/health`` until the service answers."""
+    import httpx
+
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            if (await client.get(f"{url}/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"Service at {url} did not become healthy within {timeout:.0f}s")
+        await asyncio.sleep(0.2)
+
+
+async def run_job(client: Any, url: str, data_path: str, mode: str, poll_interval: float) -> Dict[str, Any]:
+    """Submit one job, retrying while the queue is full, and wait for it to finish.
+
+    Returns:
+        Record with end-to-end latency, rejections and the service's queue/run timings
+    """
+    started = time.perf_counter()
+    rejected = 0
+    while True:
+        response = await client.post(f"{url}/jobs", json={"data_path": data_path, "mode": mode})
+        if response.status_code != 503:
+            break
+        rejected += 1
+        await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+    if response.status_code != 202:
+        return {"status": "error", "error": response.text, "rejected": rejected,
+                "latency_seconds": time.perf_counter() - started}
+
+    job_id = response.json()["job_id"]
+    while True:
+        await asyncio.sleep(poll_interval)
+        job = (await client.get(f"{url}/jobs/{job_id}")).json()
+        if job["status"] in ("done", "failed"):
+            break
+    return {
+        "status": job["status"],
+        "error": job.get("error"),
+        "rejected": rejected,
+        "latency_seconds": time.perf_counter() - started,
+        "queue_seconds": job.get("queue_seconds"),
+        "run_seconds": job.get("run_seconds"),
+        "warm_data": job.get("warm_data")
+    }
+
+
+async def load_test(url: str, data_path: str, requests: int, concurrency: int, mode: str,
+                    poll_interval: float) -> Dict[str, Any]:
+    """Keep ``concurrency`` jobs in flight until ``requests`` jobs have finished.
+
+    Returns:
+        Throughput, latency percentiles and per-status counts
+    """
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=None) as client:
+        await wait_until_healthy(client, url)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded():
+            async with semaphore:
+                return await run_job(client, url, data_path, mode, poll_interval)
+
+        started = time.perf_counter()
+        records = await asyncio.gather(*(bounded() for _ in range(requests)))
+        wall = time.perf_counter() - started
+        health = (await client.get(f"{url}/health")).json()
+
+    done = [r for r in records if r["status"] == "done"]
+    latencies = [r["latency_seconds"] for r in done]
+
+    def rounded(value: Optional[float]) -> Optional[float]:
+        return round(value, 3) if value is not None else None
+
+    return {
+        "requests": requests,
+        "completed": len(done),
+        "failed": len(records) - len(done),
+        "rejected_submissions": sum(r["rejected"] for r in records),
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(done) / wall, 2) if wall else None,
+        "latency_p50_seconds": rounded(percentile(latencies, 50)),
+        "latency_p99_seconds": rounded(percentile(latencies, 99)),
+        "latency_max_seconds": rounded(max(latencies)) if latencies else None,
+        "queue_p50_seconds": rounded(percentile([r["queue_seconds"] for r in done], 50)),
+        "run_p50_seconds": rounded(percentile([r["run_seconds"] for r in done], 50)),
+        "warm_jobs": sum(bool(r["warm_data"]) for r in done),
+        "errors": sorted({r["error"] for r in records if r.get("error")}),
+        "service": health
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Load-test the analysis service with a local fake LLM")
+    parser.add_argument("--url", help="Test an already running service instead of starting one")
+    parser.add_argument("--requests", type=int, default=100, help="Jobs to run in total")
+    parser.add_argument("--concurrency", type=int, default=16, help="Jobs in flight from the client at once")
+    parser.add_argument("--rows", type=int, default=1_000, help="Rows in the generated dataset")
+    parser.add_argument("--data-path", help="Dataset to analyze instead of a generated one")
+    parser.add_argument("--mode", choices=["async", "sequential"], default="async",
+                        help="Pipeline each job runs")
+    parser.add_argument("--workers", type=int, default=4, help="Service workers (started service only)")
+    parser.add_argument("--queue-size", type=int, default=64, help="Service queue size (started service only)")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Simulated seconds per fake LLM call (started service only)")
+    parser.add_argument("--cold", action="store_true",
+                        help="Disable warm datasets so every job loads its data (started service only)")
+    parser.add_argument("--poll-interval", type=float, default=0.02, help="Seconds between job status polls")
+    parser.add_argument("--output-dir", default=BENCH_DIR, help="Where results and datasets are stored")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Load test execution function."""
+    args = parse_args(argv)
+    output_dir = Path(args.output_dir)
+    data_path = os.path.abspath(args.data_path or dataset_path(output_dir / "data", args.rows))
+
+    process = None
+    url = args.url
+    if url is None:
+        log_path = os.path.join(tempfile.gettempdir(), f"fb_analyst_service_{os.getpid()}.log")
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        process = start_service(args, port, log_path)
+        print(f"▶ Started service on {url} (log: {log_path})")
+    url = url.rstrip("/")
+
+    print(f"▶ {args.requests} {args.mode} jobs, {args.concurrency} in flight, on {data_path}...")
+    try:
+        result = asyncio.run(load_test(url, data_path, args.requests, args.concurrency, args.mode,
+                                       args.poll_interval))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    run = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "url": args.url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mode": args.mode,
+            "data_path": data_path,
+            "workers": None if args.url else args.workers,
+            "queue_size": None if args.url else args.queue_size,
+            "latency_seconds": None if args.url else args.latency,
+            "warm_datasets": None if args.url else not args.cold
+        },
+        **result
+    }
+    print(f"\n  {result['completed']}/{result['requests']} completed in {result['wall_seconds']:.2f}s "
+          f"→ {result['requests_per_second']} req/s")
+    print(f"  latency p50 {result['latency_p50_seconds']}s, p99 {result['latency_p99_seconds']}s, "
+          f"max {result['latency_max_seconds']}s (queue p50 {result['queue_p50_seconds']}s, "
+          f"run p50 {result['run_p50_seconds']}s)")
+    print(f"  {result['rejected_submissions']} submissions rejected by a full queue, "
+          f"{result['warm_jobs']} jobs on warm data")
+    for error in result["errors"]:
+        print(f"  ✗ {error}")
+
+    result_path = output_dir / f"load_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    with atomic_write(result_path) as f:
+        json.dump(run, f, indent=2)
+    print(f"\n✓ Saved load test results to {result_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,227 @@
 """Main entry point for the agentic FB analyst."""
+import argparse
+import asyncio
 import json
 import os
+import sys
+import time
 from pathlib import Path
-from config import DATA_PATH, OUTPUT_DIR
-from agent import AgenticFBAnalyst
+from config import DATA_PATH, OUTPUT_DIR, RUN_HISTORY_ENABLED, RUN_HISTORY_PATH, EXPORT_OUTPUTS
+from schema import DIMENSIONS
+from io_utils import atomic_write
+from instrumentation import create_instrumentation
 
 
-def save_outputs(insights: dict, creatives: dict, report: str):
+def save_outputs(insights: dict, creatives: dict, report: str, output_dir: str = OUTPUT_DIR,
+                 include_report: bool = True):
     """Save generated outputs to files.
     
     Args:
         insights: Insights dictionary
         creatives: Creatives dictionary
         report: Markdown report string
+        output_dir: Directory to write the files to
+        include_report: Write report.md (skip it when it was already streamed to disk)
     """
-    output_path = Path(OUTPUT_DIR)
-    output_path.mkdir(exist_ok=True)
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
     
     # Save insights.json
     insights_path = output_path / "insights.json"
-    with open(insights_path, 'w', encoding='utf-8') as f:
+    with atomic_write(insights_path) as f:
         json.dump(insights, f, indent=2, ensure_ascii=False)
     print(f"✓ Saved insights to {insights_path}")
     
     # Save creatives.json
     creatives_path = output_path / "creatives.json"
-    with open(creatives_path, 'w', encoding='utf-8') as f:
+    with atomic_write(creatives_path) as f:
         json.dump(creatives, f, indent=2, ensure_ascii=False)
     print(f"✓ Saved creatives to {creatives_path}")
     
     # Save report.md
-    report_path = output_path / "report.md"
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write(report)
-    print(f"✓ Saved report to {report_path}")
+    if include_report:
+        report_path = output_path / "report.md"
+        with atomic_write(report_path) as f:
+            f.write(report)
+        print(f"✓ Saved report to {report_path}")
 
 
-def main():
+def record_history(analyst, results: dict, account: str, path: str = RUN_HISTORY_PATH) -> int:
+    """Append a run to the run history.
+    
+    Args:
+        analyst: The ``AgenticFBAnalyst`` that produced ``results``
+        results: Output of the analysis run
+        account: Account name the run is filed under
+        path: Run history database
+    
+    Returns:
+        Id of the recorded run
+    """
+    from run_history import RunHistory
+    # Incremental runs have no full metrics summary; their deltas are in the results
+    overall = None
+    if analyst.incremental_store is None:
+        overall = (analyst.data_loader.get_metrics_summary() or {}).get("overall")
+    history = RunHistory(path)
+    try:
+        run_id = history.record(account, results, analyst.data_loader.data_path, overall)
+    finally:
+        history.close()
+    print(f"✓ Recorded run {run_id} of {account} in {path}")
+    return run_id
+
+
+def print_query(rows: list, seconds: float):
+    """Print cube query results as a tab-separated table."""
+    if not rows:
+        print("No rows match the query.")
+    else:
+        columns = list(rows[0])
+        print("\t".join(columns))
+        for row in rows:
+            print("\t".join("" if row[c] is None else str(row[c]) for c in columns))
+    print(f"\n⏱ {len(rows)} row(s) in {seconds * 1000:.1f} ms")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Agentic Facebook Ads Analyst")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run independent LLM calls concurrently and report critical-path latency"
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        dest="use_llm_cache",
+        action="store_false",
+        help="Bypass the local LLM response cache and always call the model"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only ingest rows appended since the last run and analyze day/week deltas"
+    )
+    parser.add_argument(
+        "--stream-report",
+        action="store_true",
+        help="Stream the report to the console and output/report.md as it is generated"
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Record per-stage timings, memory and token counts to a JSONL file (.prom for Prometheus text)"
+    )
+    parser.add_argument(
+        "--map-reduce",
+        metavar="DIMENSION",
+        choices=DIMENSIONS,
+        help="Generate insights per segment of DIMENSION in parallel and merge them "
+             f"(one of: {', '.join(DIMENSIONS)})"
+    )
+    parser.add_argument(
+        "--agent",
+        action="store_true",
+        help="Let the insights model fetch the data slices it needs through tools instead of a data summary"
+    )
+    parser.add_argument(
+        "--creative-variants",
+        metavar="N",
+        type=int,
+        help="Generate N creatives outputs concurrently, drop near-duplicate copy and rank the rest "
+             "against segment ROAS (default: CREATIVE_VARIANTS)"
+    )
+    parser.add_argument(
+        "--no-history",
+        dest="history",
+        action="store_false",
+        default=RUN_HISTORY_ENABLED,
+        help="Do not append this run to the run history (RUN_HISTORY_PATH)"
+    )
+    parser.add_argument(
+        "--no-export",
+        dest="export",
+        action="store_false",
+        default=EXPORT_OUTPUTS,
+        help="Do not write insights.json, creatives.json and report.md to output/ (still written with --resume, which reads them)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse stage outputs in output/ whose inputs are unchanged since they were written"
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        dest="semantic_cache",
+        action="store_true",
+        default=None,
+        help="Reuse insights/creatives of previously analyzed accounts with near-identical data"
+    )
+    parser.add_argument(
+        "--query",
+        metavar="DIMENSIONS",
+        help="Answer a breakdown from the pre-aggregated cube instead of running the analysis: "
+             "comma-separated dimensions to group by ('' for totals), e.g. ad_format,target_age_group"
+    )
+    parser.add_argument(
+        "--where",
+        metavar="DIMENSION=VALUE[,VALUE]",
+        action="append",
+        default=[],
+        help="Keep only these dimension values in --query (repeatable)"
+    )
+    parser.add_argument(
+        "--sort-by",
+        metavar="METRIC",
+        help="Metric to sort --query results by, best first (default: roas)"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Maximum number of --query rows"
+    )
+    parser.add_argument(
+        "--import-profile",
+        action="store_true",
+        help="Report CLI cold-start time and the slowest imports of a full run, then exit"
+    )
+    args = parser.parse_args(argv)
+    if args.stream_report and args.use_async:
+        parser.error("--stream-report cannot be combined with --async")
+    if args.stream_report and not (args.export or args.resume):
+        # The streamed report is written to output/report.md, which --no-export promises not to write
+        parser.error("--stream-report cannot be combined with --no-export (or EXPORT_OUTPUTS=false)")
+    if args.map_reduce and args.incremental:
+        parser.error("--map-reduce cannot be combined with --incremental")
+    if args.agent and (args.incremental or args.map_reduce):
+        parser.error("--agent cannot be combined with --incremental or --map-reduce")
+    if args.creative_variants is not None and args.creative_variants < 1:
+        parser.error("--creative-variants must be at least 1")
+    if args.where and args.query is None:
+        parser.error("--where requires --query")
+    if args.query is not None:
+        args.group_by = [d.strip() for d in args.query.split(",") if d.strip()]
+        args.filters = {}
+        for condition in args.where:
+            dimension, separator, values = condition.partition("=")
+            if not separator or not values:
+                parser.error(f"--where expects DIMENSION=VALUE[,VALUE], got {condition!r}")
+            args.filters[dimension.strip()] = [v.strip() for v in values.split(",")]
+        unknown = [d for d in args.group_by + list(args.filters) if d not in DIMENSIONS]
+        if unknown:
+            parser.error(f"unknown dimension(s) {', '.join(unknown)} (one of: {', '.join(DIMENSIONS)})")
+    return args
+
+
+def main(argv=None):
     """Main execution function."""
+    args = parse_args(argv)
+    if args.import_profile:
+        from import_profile import print_import_profile
+        sys.exit(0 if print_import_profile() else 1)
+    
     print("=" * 60)
     print("Agentic Facebook Ads Analyst")
     print("=" * 60)
@@ -48,15 +232,69 @@ def main():
         print("Please ensure the synthetic_fb_ads_undergarments.csv file is in the project root.")
         return
     
-    # Initialize analyst
-    analyst = AgenticFBAnalyst(DATA_PATH)
+    if args.query is not None:
+        # Cube queries need no model client
+        from agent import create_data_loader
+        cube = create_data_loader(DATA_PATH).get_cube()
+        started = time.perf_counter()
+        try:
+            rows = cube.query(args.group_by, args.filters, sort_by=args.sort_by, limit=args.limit)
+        except ValueError as e:
+            print(f"\n❌ Error: {e}")
+            return
+        print_query(rows, time.perf_counter() - started)
+        return
     
-    # Run full analysis
-    results = analyst.run_full_analysis()
+    # Initialize analyst (imported here so --help and argument errors stay fast)
+    from agent import AgenticFBAnalyst
+    analyst = AgenticFBAnalyst(
+        DATA_PATH,
+        use_llm_cache=args.use_llm_cache,
+        incremental=args.incremental,
+        instrumentation=create_instrumentation(args.metrics) if args.metrics else None,
+        map_reduce_dimension=args.map_reduce,
+        # Each stage's output is written as soon as it completes, so a failed run keeps its progress
+        checkpoint_dir=OUTPUT_DIR if args.export or args.resume else None,
+        resume=args.resume,
+        semantic_cache=args.semantic_cache,
+        agent_tools=args.agent,
+        creative_variants=args.creative_variants
+    )
     
-    # Save outputs
-    print(f"\n💾 Saving outputs to {OUTPUT_DIR}/...")
-    save_outputs(results["insights"], results["creatives"], results["report"])
+    # Run full analysis
+    if args.export or args.resume:
+        print(f"\n💾 Outputs are saved to {OUTPUT_DIR}/ as each stage completes")
+    if args.use_async:
+        results = asyncio.run(analyst.arun_full_analysis())
+    elif args.stream_report:
+        results = analyst.run_full_analysis(report_path=os.path.join(OUTPUT_DIR, "report.md"))
+    else:
+        results = analyst.run_full_analysis()
+    if args.history:
+        record_history(analyst, results, Path(DATA_PATH).stem)
+    if results["resumed_stages"]:
+        print(f"\n↻ Reused from the previous run: {', '.join(results['resumed_stages'])}")
+    if "semantic_cache" in results:
+        for stage, stats in results["semantic_cache"]["stages"].items():
+            nearest = ("nothing comparable cached" if stats["similarity"] is None
+                       else f"nearest similarity {stats['similarity']}")
+            print(f"≈ Semantic cache {stage}: {'hit' if stats['hit'] else 'miss'} ({nearest}, threshold {stats['threshold']})")
+    if "creative_variants" in results:
+        variants = results["creative_variants"]
+        print(f"\n🎨 Creative variants: {variants['variants']} in {variants['wall_seconds']:.2f}s "
+              f"(per variant: {', '.join(f'{s:.2f}s' for s in variants['seconds'])}); "
+              f"{variants['duplicates']} of {variants['candidates']} recommendations dropped as near-duplicates, "
+              f"{variants['kept']} kept")
+    if "tools" in results:
+        tools = results["tools"]
+        print(f"\n🔧 Tool calls: {tools['calls']}/{tools['max_calls']} ({tools['cache_hits']} from cache, "
+              f"{tools['errors']} error(s)), {tools['result_tokens']} result tokens")
+    if results["routing"]:
+        print("\n🔀 Model calls per stage:")
+        for stage, stats in results["routing"].items():
+            fallbacks = f", {stats['fallbacks']} fallback(s)" if stats["fallbacks"] else ""
+            print(f"  {stage}: {stats['calls']} call(s) on {', '.join(stats['models'])}, "
+                  f"{stats['seconds']:.2f}s, ${stats['cost_usd']:.4f}{fallbacks}")
     
     print("\n" + "=" * 60)
     print("Analysis complete! Check the output/ directory for results.")
@@ -0,0 +1,109 @@
+"""Partitioning and per-segment result storage for map-reduce insights."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+
+
+def partition(df: pd.DataFrame, dimension: str) -> List[Tuple[str, pd.DataFrame]]:
+    """Split the frame into one segment per value of ``dimension``.
+
+    Args:
+        df: Ads data
+        dimension: Column to partition by (e.g. ``product_category``)
+
+    Returns:
+        (segment value, rows) pairs sorted by segment value; missing values
+        form their own ``"(missing)"`` segment
+    """
+    if dimension not in df.columns:
+        raise ValueError(f"Cannot partition by {dimension!r}: no such column")
+    keys = df[dimension].astype("string").fillna("(missing)")
+    return [(str(segment), rows) for segment, rows in df.groupby(keys, sort=True, observed=True)]
+
+
+def segment_fingerprint(rows: pd.DataFrame, *parts: Any) -> str:
+    """Hash a segment's rows together with anything else its result depends on.
+
+    Row hashing is vectorized, so fingerprinting is far cheaper than
+    summarizing the segment or calling the model.
+
+    Args:
+        rows: Segment rows
+        *parts: Extra inputs such as the model name and prompt template
+
+    Returns:
+        Hex digest that changes when any row or part changes
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([list(rows.columns), *parts], default=str).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class SegmentInsightStore:
+    """SQLite store of the latest insights per segment, reused while the segment is unchanged."""
+
+    def __init__(self, path: str):
+        """Initialize the store, creating the database if needed.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS segment_insights (
+                source TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                insights TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (source, dimension, segment)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, source: str, dimension: str, segment: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the stored insights if the segment's fingerprint still matches."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, insights FROM segment_insights "
+                "WHERE source = ? AND dimension = ? AND segment = ?",
+                (source, dimension, segment)
+            ).fetchone()
+        if row is None or row[0] != fingerprint:
+            return None
+        return json.loads(row[1])
+
+    def put(self, source: str, dimension: str, segment: str, fingerprint: str, insights: Dict[str, Any]):
+        """Store the insights for a segment, replacing any older version."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO segment_insights VALUES (?, ?, ?, ?, ?, ?)",
+                (source, dimension, segment, fingerprint, json.dumps(insights, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def prune(self, source: str, dimension: str, segments: List[str]):
+        """Delete stored segments of ``source`` that no longer exist in the data."""
+        with self._lock:
+            placeholders = ",".join("?" * len(segments)) or "NULL"
+            self._conn.execute(
+                f"DELETE FROM segment_insights WHERE source = ? AND dimension = ? "
+                f"AND segment NOT IN ({placeholders})",
+                (source, dimension, *segments)
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,70 @@
+"""Pydantic models for the structured outputs of the insights and creatives stages."""
+from typing import Any, List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+
+class _Output(BaseModel):
+    # Keep fields the model adds beyond the schema instead of rejecting them
+    model_config = ConfigDict(extra="allow")
+
+
+class KeyInsight(_Output):
+    insight: str
+    metric: Optional[str] = None
+    value: Any = None
+    impact: Optional[Literal["high", "medium", "low"]] = None
+    recommendation: Optional[str] = None
+
+    @field_validator("impact", mode="before")
+    @classmethod
+    def _normalize_impact(cls, value: Any) -> Any:
+        return value.strip().lower() if isinstance(value, str) else value
+
+
+class PerformanceSummary(_Output):
+    top_performers: List[Any] = Field(default_factory=list)
+    underperformers: List[Any] = Field(default_factory=list)
+    trends: List[Any] = Field(default_factory=list)
+
+
+class Opportunity(_Output):
+    opportunity: str
+    potential_impact: Optional[str] = None
+    action_items: List[str] = Field(default_factory=list)
+
+
+class InsightsOutput(_Output):
+    """Output of the insights stage."""
+    key_insights: List[KeyInsight]
+    performance_summary: PerformanceSummary = Field(default_factory=PerformanceSummary)
+    opportunities: List[Opportunity] = Field(default_factory=list)
+
+
+class CreativeRecommendation(_Output):
+    campaign_type: Optional[str] = None
+    ad_format: Optional[str] = None
+    headline: str
+    primary_text: str
+    call_to_action: Optional[str] = None
+    visual_elements: List[str] = Field(default_factory=list)
+    targeting_suggestions: List[str] = Field(default_factory=list)
+    rationale: Optional[str] = None
+
+
+class ABTestVariant(_Output):
+    variant_name: str
+    description: Optional[str] = None
+
+
+class ABTestSuggestion(_Output):
+    test_name: str
+    hypothesis: Optional[str] = None
+    variants: List[ABTestVariant] = Field(default_factory=list)
+    success_metrics: List[str] = Field(default_factory=list)
+
+
+class CreativesOutput(_Output):
+    """Output of the creatives stage."""
+    creative_recommendations: List[CreativeRecommendation]
+    a_b_test_suggestions: List[ABTestSuggestion] = Field(default_factory=list)
+    creative_best_practices: List[str] = Field(default_factory=list)
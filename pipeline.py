@@ -0,0 +1,118 @@
+"""Dependency-graph runner for async analysis stages."""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Sequence
+
+
+class Stage:
+    """A named unit of async work that depends on the results of other stages."""
+
+    def __init__(self, name: str, func: Callable[..., Awaitable[Any]], deps: Sequence[str] = ()):
+        """Initialize a stage.
+
+        Args:
+            name: Unique stage name
+            func: Coroutine function called with each dependency's result as a keyword argument
+            deps: Names of the stages whose results this stage needs
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+
+class StageResult:
+    """Outcome and timing of a completed stage."""
+
+    def __init__(self, name: str, value: Any, started: float, finished: float):
+        """Initialize a stage result.
+
+        Args:
+            name: Stage name
+            value: Value returned by the stage
+            started: Start time in seconds since the pipeline started
+            finished: Finish time in seconds since the pipeline started
+        """
+        self.name = name
+        self.value = value
+        self.started = started
+        self.finished = finished
+
+    @property
+    def duration(self) -> float:
+        """Wall time spent in the stage itself."""
+        return self.finished - self.started
+
+
+async def run_stages(stages: List[Stage]) -> AsyncIterator[StageResult]:
+    """Run stages as soon as their dependencies finish, yielding results as they complete.
+
+    If any stage fails, the remaining stages are cancelled and the error is raised.
+
+    Args:
+        stages: Stages to run; every dependency must name another stage in the list
+
+    Yields:
+        StageResult for each stage in completion order
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    origin = time.perf_counter()
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(stage: Stage) -> StageResult:
+        inputs = {}
+        for dep in stage.deps:
+            inputs[dep] = (await tasks[dep]).value
+        started = time.perf_counter() - origin
+        value = await stage.func(**inputs)
+        return StageResult(stage.name, value, started, time.perf_counter() - origin)
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.ensure_future(run(stage))
+
+    try:
+        for next_done in asyncio.as_completed(list(tasks.values())):
+            yield await next_done
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        # Let cancelled stages unwind before returning, so none is left pending
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+
+def summarize_timings(stages: List[Stage], results: Dict[str, StageResult]) -> Dict[str, Any]:
+    """Summarize where the wall time of a concurrent run went.
+
+    The critical path is traced backwards from the last stage to finish,
+    following whichever dependency finished last at each step. The sum of
+    stage durations is not a sequential baseline: the async stages differ
+    from ``run_full_analysis`` (e.g. the report is written section by
+    section); run ``benchmark.py`` with and without ``--async`` for that.
+
+    Args:
+        stages: Stages that were run
+        results: Results keyed by stage name
+
+    Returns:
+        Dictionary with per-stage durations, the critical path and its latency,
+        the sum of all stage durations and the average number of stages in flight
+    """
+    by_name = {stage.name: stage for stage in stages}
+    last = max(results.values(), key=lambda r: r.finished)
+    path = [last.name]
+    while by_name[path[-1]].deps:
+        path.append(max(by_name[path[-1]].deps, key=lambda dep: results[dep].finished))
+    path.reverse()
+
+    total = sum(r.duration for r in results.values())
+    return {
+        "stages": {name: round(r.duration, 3) for name, r in results.items()},
+        "critical_path": path,
+        "critical_path_seconds": round(last.finished, 3),
+        "sum_of_stage_seconds": round(total, 3),
+        "concurrency": round(total / last.finished, 2) if last.finished > 0 else None,
+    }
@@ -0,0 +1,158 @@
+"""Token counting and compact, token-budgeted serialization of data for prompts."""
+import json
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+# Optional tiktoken import
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Rough characters-per-token ratio used when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+# Fixed per-message overhead of the chat format
+TOKENS_PER_MESSAGE = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: Optional[str]):
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("o200k_base")
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken downloads encodings on first use; offline we estimate instead
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count the tokens in ``text`` with the model's local tokenizer.
+
+    Falls back to a characters-per-token estimate if tiktoken is missing or
+    its encoding files are not available offline.
+    """
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_message_tokens(messages: Sequence[Any], model: Optional[str] = None) -> int:
+    """Count the tokens in a list of chat messages, including the arguments of their tool calls."""
+    total = 0
+    for message in messages:
+        total += count_tokens(message.content, model) + TOKENS_PER_MESSAGE
+        for call in getattr(message, "tool_calls", None) or []:
+            total += count_tokens(call["name"] + json.dumps(call["args"]), model)
+    return total
+
+
+def _format_value(value: Any, decimals: int) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, float):
+        rounded = round(value, decimals)
+        return str(int(rounded)) if rounded.is_integer() else f"{rounded:.{decimals}f}".rstrip("0")
+    return str(value)
+
+
+def _is_zero(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == 0
+
+
+def compact_table(records: List[Dict[str, Any]], decimals: int = 2) -> str:
+    """Render records as a tab-separated table with rounded numbers.
+
+    Columns that are zero in every row are dropped. In mostly-zero columns
+    (e.g. ``video_views`` outside video ads) zeros are left blank.
+
+    Args:
+        records: Rows as dictionaries
+        decimals: Decimal places for floats
+
+    Returns:
+        TSV text with a header row
+    """
+    if not records:
+        return ""
+    columns = [c for c in records[0] if not all(_is_zero(r.get(c)) for r in records)]
+    sparse = {c for c in columns if sum(_is_zero(r.get(c)) for r in records) * 2 > len(records)}
+
+    lines = ["\t".join(columns)]
+    for record in records:
+        cells = []
+        for column in columns:
+            value = record.get(column)
+            cells.append("" if column in sparse and _is_zero(value) else _format_value(value, decimals))
+        lines.append("\t".join(cells))
+    return "\n".join(lines)
+
+
+def compact_stats(numeric_summary: Dict[str, Dict[str, float]], statistics: Sequence[str],
+                  decimals: int = 2) -> str:
+    """Render ``describe()`` output as a TSV table with one row per column.
+
+    Args:
+        numeric_summary: Mapping of column to statistics, as from ``describe().to_dict()``
+        statistics: Statistics to include, in order (e.g. ``["mean", "min", "max"]``)
+        decimals: Decimal places for floats
+
+    Returns:
+        TSV text with a header row
+    """
+    lines = ["\t".join(["column"] + list(statistics))]
+    for column, stats in numeric_summary.items():
+        lines.append("\t".join([column] + [_format_value(stats.get(s), decimals) for s in statistics]))
+    return "\n".join(lines)
+
+
+# Progressively smaller renderings tried until one fits the budget:
+# (preview rows, statistics shown)
+COMPACTION_LEVELS = [
+    (10, ["mean", "std", "min", "25%", "50%", "75%", "max"]),
+    (5, ["mean", "std", "min", "25%", "50%", "75%", "max"]),
+    (5, ["mean", "std", "min", "max"]),
+    (3, ["mean", "min", "max"]),
+    (0, ["mean", "min", "max"]),
+    (0, ["mean"]),
+]
+
+
+def render_compact_summary(summary: Dict[str, Any], preview: List[Dict[str, Any]],
+                           preview_rows: int, statistics: Sequence[str]) -> str:
+    """Render the dataset summary compactly at one compaction level."""
+    missing = {c: n for c, n in summary["missing_values"].items() if n}
+    parts = [
+        "Dataset Summary:",
+        f"- Total campaigns/ads: {summary['total_campaigns']}",
+        f"- Columns: {', '.join(summary['columns'])}",
+        f"- Missing values: {missing if missing else 'none'}",
+    ]
+    if preview_rows and preview:
+        parts += ["", f"Sample Data (first {min(preview_rows, len(preview))} rows, TSV):",
+                  compact_table(preview[:preview_rows])]
+    if summary["numeric_summary"]:
+        parts += ["", "Full Dataset Statistics (TSV):",
+                  compact_stats(summary["numeric_summary"], statistics)]
+    return "\n".join(parts)
+
+
+def fit_summary_to_budget(summary: Dict[str, Any], preview: List[Dict[str, Any]],
+                          token_budget: Optional[int], model: Optional[str] = None) -> str:
+    """Pick the most detailed compact rendering that fits ``token_budget`` tokens.
+
+    If even the smallest rendering is over budget, it is returned anyway.
+    """
+    rendered = ""
+    for preview_rows, statistics in COMPACTION_LEVELS:
+        rendered = render_compact_summary(summary, preview, preview_rows, statistics)
+        if token_budget is None or count_tokens(rendered, model) <= token_budget:
+            return rendered
+    return rendered
@@ -0,0 +1,220 @@
+"""Per-stage model routing with fallback, and per-stage latency and cost accounting."""
+import asyncio
+import importlib.util
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# USD per million (input, output) tokens; override or extend with MODEL_PRICES_JSON
+DEFAULT_MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+
+def base_stage(stage: str) -> str:
+    """Stage a call is routed as: ``"insights[Bras]"`` and ``"insights repair"`` route as ``"insights"``."""
+    return stage.split("[")[0].split()[0]
+
+
+def fallback_errors() -> Tuple[type, ...]:
+    """Errors that send a call to the fallback model: rate limits and timeouts."""
+    errors: List[type] = [asyncio.TimeoutError, TimeoutError]
+    if importlib.util.find_spec("openai") is not None:
+        import openai
+        errors += [openai.RateLimitError, openai.APITimeoutError]
+    return tuple(errors)
+
+
+class Route:
+    """The model chosen for one call, the fallback behind it and why it was chosen."""
+
+    def __init__(self, stage: str, model: str, fallback: Optional[str], reason: str):
+        self.stage = stage
+        self.model = model
+        self.fallback = fallback
+        self.reason = reason
+
+
+class ModelRouter:
+    """Choose a chat model per stage and fall back to a secondary one on rate limits or timeouts.
+
+    Structured extraction stages can run on a cheaper model than the report;
+    prompts above a size threshold go to a model configured for long inputs.
+    One router (and its clients) can be shared by many analysts.
+    """
+
+    def __init__(self, stage_models: Dict[str, str], default_model: str, fallback_model: Optional[str] = None,
+                 large_prompt_tokens: Optional[int] = None, large_prompt_model: Optional[str] = None,
+                 client_factory: Optional[Callable[[str], Any]] = None,
+                 prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        """Initialize the router.
+
+        Args:
+            stage_models: Model per stage (``insights``, ``creatives``, ``report``)
+            default_model: Model for stages without an entry
+            fallback_model: Model retried once after a rate limit or timeout; a
+                stage already on it falls back to ``default_model`` instead
+            large_prompt_tokens: Prompts above this many tokens go to
+                ``large_prompt_model`` (None or 0 = no size rule)
+            large_prompt_model: Model for large prompts
+            client_factory: Creates the chat model client for a model name
+            prices: USD per million (input, output) tokens, merged over DEFAULT_MODEL_PRICES
+        """
+        self.stage_models = dict(stage_models)
+        self.default_model = default_model
+        self.fallback_model = fallback_model or None
+        self.large_prompt_tokens = large_prompt_tokens or None
+        self.large_prompt_model = large_prompt_model
+        self.client_factory = client_factory
+        self.prices = {**DEFAULT_MODEL_PRICES, **{m: tuple(p) for m, p in (prices or {}).items()}}
+        self._clients: Dict[Tuple[str, bool], Any] = {}
+
+    @classmethod
+    def single(cls, llm: Any) -> "ModelRouter":
+        """Router that sends every stage to one existing client, without fallback."""
+        model = getattr(llm, "model_name", None) or "default"
+        router = cls({}, model)
+        router._clients[(model, False)] = llm
+        return router
+
+    def model_for(self, stage: str) -> str:
+        """Configured model of a stage, before the prompt-size rule."""
+        return self.stage_models.get(base_stage(stage), self.default_model)
+
+    def route(self, stage: str, prompt_tokens: int = 0) -> Route:
+        """Choose the model for a call.
+
+        Args:
+            stage: Stage name (variants like ``"insights repair"`` route as their base stage)
+            prompt_tokens: Size of the prompt
+
+        Returns:
+            Route with the model, its fallback and the reason for the choice
+        """
+        model, reason = self.model_for(stage), "stage"
+        if (self.large_prompt_tokens and self.large_prompt_model and self.client_factory
+                and prompt_tokens > self.large_prompt_tokens):
+            model, reason = self.large_prompt_model, f"prompt > {self.large_prompt_tokens} tokens"
+        fallback = None
+        if self.client_factory is not None:
+            fallback = self.fallback_model if self.fallback_model != model else self.default_model
+            if fallback == model:
+                fallback = None
+        return Route(stage, model, fallback, reason)
+
+    def client(self, model: str, json_mode: bool = False) -> Any:
+        """Chat model client for ``model``, created on first use and shared afterwards."""
+        key = (model, json_mode)
+        if key not in self._clients:
+            if json_mode:
+                base = self.client(model)
+                self._clients[key] = base.bind(response_format={"type": "json_object"}) \
+                    if hasattr(base, "bind") else base
+            elif self.client_factory is None:
+                # A single injected client serves every model name
+                self._clients[key] = next(iter(self._clients.values()))
+            else:
+                self._clients[key] = self.client_factory(model)
+        return self._clients[key]
+
+    def _bound(self, model: str, json_mode: bool, tools: Optional[List[Dict[str, Any]]]) -> Any:
+        """Client for ``model``, with ``tools`` bound if given (tool calling replaces JSON mode)."""
+        return self.client(model).bind_tools(tools) if tools else self.client(model, json_mode)
+
+    def invoke(self, route: Route, messages: List[Any], json_mode: bool = False,
+               tools: Optional[List[Dict[str, Any]]] = None) -> Tuple[Any, str]:
+        """Call the routed model, retrying once on the fallback after a rate limit or timeout.
+
+        Args:
+            tools: OpenAI-format specs of tools the model may call
+
+        Returns:
+            (response, model that produced it)
+        """
+        try:
+            return self._bound(route.model, json_mode, tools).invoke(messages), route.model
+        except fallback_errors() as e:
+            if not route.fallback:
+                raise
+            self._announce_fallback(route, e)
+            return self._bound(route.fallback, json_mode, tools).invoke(messages), route.fallback
+
+    async def ainvoke(self, route: Route, messages: List[Any], json_mode: bool = False,
+                      tools: Optional[List[Dict[str, Any]]] = None) -> Tuple[Any, str]:
+        """Async version of ``invoke``."""
+        try:
+            return await self._bound(route.model, json_mode, tools).ainvoke(messages), route.model
+        except fallback_errors() as e:
+            if not route.fallback:
+                raise
+            self._announce_fallback(route, e)
+            return await self._bound(route.fallback, json_mode, tools).ainvoke(messages), route.fallback
+
+    def stream(self, route: Route, messages: List[Any]) -> Iterator[Any]:
+        """Stream from the routed model, falling back if it fails before the first chunk.
+
+        After a fallback, ``route.model`` names the model that produced the stream.
+        """
+        started = False
+        try:
+            for chunk in self.client(route.model).stream(messages):
+                started = True
+                yield chunk
+        except fallback_errors() as e:
+            if started or not route.fallback:
+                raise
+            self._announce_fallback(route, e)
+            route.model, route.fallback = route.fallback, None
+            yield from self.client(route.model).stream(messages)
+
+    @staticmethod
+    def _announce_fallback(route: Route, error: Exception):
+        print(f"⚠ {route.stage}: {type(error).__name__} on {route.model}, falling back to {route.fallback}")
+
+    def cost(self, model: str, usage: Optional[Dict[str, Any]]) -> Optional[float]:
+        """Cost in USD of a call, or None if the model's price or the usage is unknown."""
+        price = self.prices.get(model)
+        if price is None or not usage:
+            return None
+        return (int(usage.get("input_tokens") or 0) * price[0]
+                + int(usage.get("output_tokens") or 0) * price[1]) / 1e6
+
+
+class RoutingStats:
+    """Latency, tokens and cost of model calls per stage, to tune the routing with real numbers."""
+
+    def __init__(self, router: ModelRouter):
+        self.router = router
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, stage: str, model: str, seconds: float, usage: Optional[Dict[str, Any]] = None,
+               fallback: bool = False):
+        """Add one model call to the stage's latency, token and cost totals."""
+        stats = self.stages.setdefault(stage, {
+            "calls": 0, "fallbacks": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0,
+            "cost_usd": 0.0, "models": {}
+        })
+        stats["calls"] += 1
+        stats["fallbacks"] += int(fallback)
+        stats["seconds"] += seconds
+        stats["models"][model] = stats["models"].get(model, 0) + 1
+        if usage:
+            stats["input_tokens"] += int(usage.get("input_tokens") or 0)
+            stats["output_tokens"] += int(usage.get("output_tokens") or 0)
+        cost = self.router.cost(model, usage)
+        if cost is not None:
+            stats["cost_usd"] += cost
+
+    def reset(self):
+        """Forget the calls of a previous run."""
+        self.stages = {}
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage totals with rounded latency and cost."""
+        return {
+            stage: {**stats, "seconds": round(stats["seconds"], 3), "cost_usd": round(stats["cost_usd"], 6),
+                    "models": dict(stats["models"])}
+            for stage, stats in self.stages.items()
+        }
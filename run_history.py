@@ -0,0 +1,366 @@
+"""Append-only history of analysis runs in SQLite, with a CLI to list, query, diff and export them."""
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from config import RUN_HISTORY_PATH
+from creative_variants import jaccard, trigrams
+
+# Results keys stored as the run's outputs rather than its metrics
+OUTPUT_KEYS = ("insights", "creatives", "report")
+
+# Overall metrics compared by ``diff_runs``
+DIFF_METRICS = ["spend_usd", "revenue_usd", "roas", "ctr_percent", "conversion_rate_percent", "cpa_usd"]
+
+# Insight text at least this similar (trigram Jaccard) is the same insight in two runs
+MATCH_THRESHOLD = 0.6
+
+
+class RunHistory:
+    """SQLite store of every run's insights, creatives, report, metrics and input fingerprint.
+
+    Rows are only ever inserted. Each key insight also gets a row of its own,
+    indexed by account, date and impact, so questions across months of runs
+    are answered by an index lookup instead of parsing one JSON file per run.
+    """
+
+    def __init__(self, path: str = RUN_HISTORY_PATH):
+        """Initialize the store, creating the database if needed.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account TEXT NOT NULL,
+                source TEXT,
+                run_date TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                input_fingerprint TEXT,
+                roas REAL,
+                spend_usd REAL,
+                insight_count INTEGER NOT NULL,
+                recommendation_count INTEGER NOT NULL,
+                insights TEXT NOT NULL,
+                creatives TEXT NOT NULL,
+                metrics TEXT NOT NULL,
+                report TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_account_date ON runs (account, run_date);
+            CREATE INDEX IF NOT EXISTS idx_runs_date ON runs (run_date);
+            CREATE INDEX IF NOT EXISTS idx_runs_fingerprint ON runs (input_fingerprint);
+            CREATE TABLE IF NOT EXISTS run_insights (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                account TEXT NOT NULL,
+                run_date TEXT NOT NULL,
+                impact TEXT,
+                metric TEXT,
+                value TEXT,
+                insight TEXT,
+                recommendation TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_run_insights_run ON run_insights (run_id);
+            CREATE INDEX IF NOT EXISTS idx_run_insights_account ON run_insights (account, run_date);
+            CREATE INDEX IF NOT EXISTS idx_run_insights_impact ON run_insights (impact, run_date);
+            CREATE TRIGGER IF NOT EXISTS runs_no_update BEFORE UPDATE ON runs
+                BEGIN SELECT RAISE(ABORT, 'run history is append-only'); END;
+            CREATE TRIGGER IF NOT EXISTS runs_no_delete BEFORE DELETE ON runs
+                BEGIN SELECT RAISE(ABORT, 'run history is append-only'); END;
+        """)
+        self._conn.commit()
+
+    def record(self, account: str, results: Dict[str, Any], source: str = "",
+               overall: Optional[Dict[str, Any]] = None, run_date: Optional[str] = None) -> int:
+        """Append a run.
+
+        Args:
+            account: Account the run analyzed
+            results: Output of ``run_full_analysis``/``arun_full_analysis``
+            source: Path of the analyzed data
+            overall: Overall metrics of the data (``metrics_summary["overall"]``)
+            run_date: ISO date of the run (defaults to today)
+
+        Returns:
+            Id of the new run
+        """
+        run_date = run_date or date.today().isoformat()
+        insights = results.get("insights") or {}
+        creatives = results.get("creatives") or {}
+        key_insights = insights.get("key_insights", [])
+        metrics = {key: value for key, value in results.items() if key not in OUTPUT_KEYS}
+        metrics["overall"] = overall or {}
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (account, source, run_date, created_at, input_fingerprint, roas, spend_usd, "
+                "insight_count, recommendation_count, insights, creatives, metrics, report) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (account, source, run_date, time.time(), results.get("input_fingerprint"),
+                 (overall or {}).get("roas"), (overall or {}).get("spend_usd"), len(key_insights),
+                 len(creatives.get("creative_recommendations", [])),
+                 json.dumps(insights, ensure_ascii=False), json.dumps(creatives, ensure_ascii=False),
+                 json.dumps(metrics, ensure_ascii=False, default=str), results.get("report"))
+            )
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO run_insights (run_id, account, run_date, impact, metric, value, insight, recommendation) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, account, run_date, str(item.get("impact", "")).lower(), item.get("metric"),
+                  None if item.get("value") is None else str(item.get("value")), item.get("insight"),
+                  item.get("recommendation")) for item in key_insights]
+            )
+            self._conn.commit()
+        return run_id
+
+    def list_runs(self, account: Optional[str] = None, since: Optional[str] = None,
+                  until: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Summaries of the latest runs, newest first, without their outputs."""
+        conditions, params = self._filters(account, since, until)
+        rows = self._conn.execute(
+            "SELECT id, run_date, account, roas, spend_usd, insight_count, recommendation_count, input_fingerprint "
+            f"FROM runs{_where(conditions)} ORDER BY run_date DESC, id DESC LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """A run with its outputs and metrics, or None if there is no such run."""
+        row = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = dict(row)
+        for key in ("insights", "creatives", "metrics"):
+            run[key] = json.loads(run[key])
+        return run
+
+    def latest(self, account: str, before: Optional[int] = None) -> Optional[int]:
+        """Id of the account's latest run (before run ``before``, if given)."""
+        row = self._conn.execute(
+            "SELECT id FROM runs WHERE account = ? AND id < ? ORDER BY id DESC LIMIT 1",
+            (account, before if before is not None else 2 ** 63 - 1)
+        ).fetchone()
+        return row["id"] if row else None
+
+    def insights(self, account: Optional[str] = None, impact: Optional[str] = None, metric: Optional[str] = None,
+                 since: Optional[str] = None, until: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Key insights across runs, newest first."""
+        conditions, params = self._filters(account, since, until)
+        if impact:
+            conditions.append("impact = ?")
+            params.append(impact.lower())
+        if metric:
+            conditions.append("metric = ?")
+            params.append(metric)
+        rows = self._conn.execute(
+            "SELECT run_id, run_date, account, impact, metric, value, insight, recommendation "
+            f"FROM run_insights{_where(conditions)} ORDER BY run_date DESC, run_id DESC LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _filters(account: Optional[str], since: Optional[str], until: Optional[str]) -> Tuple[List[str], List[Any]]:
+        conditions, params = [], []
+        if account:
+            conditions.append("account = ?")
+            params.append(account)
+        if since:
+            conditions.append("run_date >= ?")
+            params.append(since)
+        if until:
+            conditions.append("run_date <= ?")
+            params.append(until)
+        return conditions, params
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def _where(conditions: List[str]) -> str:
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _match(before: List[str], after: List[str]) -> Dict[int, int]:
+    """Pair each text of ``after`` with the most similar unpaired text of ``before``."""
+    pairs: Dict[int, int] = {}
+    grams = [trigrams(text) for text in before]
+    for j, text in enumerate(after):
+        candidate = trigrams(text)
+        scores = [(jaccard(candidate, g), i) for i, g in enumerate(grams) if i not in pairs.values()]
+        if scores:
+            score, i = max(scores)
+            if score >= MATCH_THRESHOLD:
+                pairs[j] = i
+    return pairs
+
+
+def diff_runs(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare two runs (see ``RunHistory.get``).
+
+    Key insights and creative headlines are matched by text similarity, so
+    reworded findings count as the same one.
+
+    Returns:
+        Whether the inputs changed, overall metric changes, and added,
+        removed and changed insights and added and removed headlines
+    """
+    old_overall = before["metrics"].get("overall", {})
+    new_overall = after["metrics"].get("overall", {})
+    metrics = {}
+    for metric in DIFF_METRICS:
+        old, new = old_overall.get(metric), new_overall.get(metric)
+        if old is None or new is None or old == new:
+            continue
+        metrics[metric] = {"before": old, "after": new,
+                           "change_percent": round((new - old) / abs(old) * 100, 1) if old else None}
+
+    old_insights = before["insights"].get("key_insights", [])
+    new_insights = after["insights"].get("key_insights", [])
+    pairs = _match([i.get("insight", "") for i in old_insights], [i.get("insight", "") for i in new_insights])
+    changed = []
+    for j, i in pairs.items():
+        old, new = old_insights[i], new_insights[j]
+        fields = {key: {"before": old.get(key), "after": new.get(key)} for key in ("value", "impact")
+                  if old.get(key) != new.get(key)}
+        if fields:
+            changed.append({"insight": new.get("insight"), **fields})
+
+    old_headlines = [r.get("headline", "") for r in before["creatives"].get("creative_recommendations", [])]
+    new_headlines = [r.get("headline", "") for r in after["creatives"].get("creative_recommendations", [])]
+    headline_pairs = _match(old_headlines, new_headlines)
+    return {
+        "before": before["id"],
+        "after": after["id"],
+        "inputs_changed": before["input_fingerprint"] != after["input_fingerprint"],
+        "metrics": metrics,
+        "insights_added": [new_insights[j] for j in range(len(new_insights)) if j not in pairs],
+        "insights_removed": [old_insights[i] for i in range(len(old_insights)) if i not in pairs.values()],
+        "insights_changed": changed,
+        "headlines_added": [new_headlines[j] for j in range(len(new_headlines)) if j not in headline_pairs],
+        "headlines_removed": [old_headlines[i] for i in range(len(old_headlines))
+                              if i not in headline_pairs.values()]
+    }
+
+
+def export_run(run: Dict[str, Any], output_dir: str):
+    """Write a stored run as insights.json, creatives.json and report.md, like ``main.save_outputs``."""
+    from main import save_outputs
+    save_outputs(run["insights"], run["creatives"], run["report"] or "", output_dir=output_dir,
+                 include_report=run["report"] is not None)
+
+
+def _print_table(rows: List[Dict[str, Any]]):
+    if not rows:
+        print("No runs match.")
+        return
+    columns = list(rows[0])
+    print("\t".join(columns))
+    for row in rows:
+        print("\t".join("" if row[c] is None else str(row[c]) for c in columns))
+
+
+def print_diff(diff: Dict[str, Any]):
+    """Print a run diff for people."""
+    print(f"Run {diff['before']} → {diff['after']} "
+          f"({'inputs changed' if diff['inputs_changed'] else 'same inputs'})")
+    if diff["metrics"]:
+        print("\nMetrics:")
+        for metric, change in diff["metrics"].items():
+            percent = f" ({change['change_percent']:+.1f}%)" if change["change_percent"] is not None else ""
+            print(f"  {metric}: {change['before']} → {change['after']}{percent}")
+    for key, sign in (("insights_added", "+"), ("insights_removed", "-")):
+        for insight in diff[key]:
+            print(f"{sign} [{insight.get('impact')}] {insight.get('insight')} ({insight.get('metric')}={insight.get('value')})")
+    for insight in diff["insights_changed"]:
+        fields = ", ".join(f"{k}: {v['before']} → {v['after']}" for k, v in insight.items() if k != "insight")
+        print(f"~ {insight['insight']} ({fields})")
+    for key, sign in (("headlines_added", "+"), ("headlines_removed", "-")):
+        for headline in diff[key]:
+            print(f"{sign} headline: {headline}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Query and compare stored analysis runs")
+    parser.add_argument("--db", default=RUN_HISTORY_PATH, help="Run history database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    listing = commands.add_parser("list", help="List runs, newest first")
+    insights = commands.add_parser("insights", help="Key insights across runs, newest first")
+    for command in (listing, insights):
+        command.add_argument("--account", help="Only this account")
+        command.add_argument("--since", metavar="YYYY-MM-DD", help="Only runs on or after this date")
+        command.add_argument("--until", metavar="YYYY-MM-DD", help="Only runs on or before this date")
+    listing.add_argument("--limit", type=int, default=20, help="Maximum number of runs")
+    insights.add_argument("--impact", choices=["high", "medium", "low"], help="Only insights of this impact")
+    insights.add_argument("--metric", help="Only insights about this metric")
+    insights.add_argument("--limit", type=int, default=50, help="Maximum number of insights")
+
+    show = commands.add_parser("show", help="Print a run's outputs and metrics as JSON")
+    show.add_argument("run_id", type=int)
+
+    diff = commands.add_parser("diff", help="Compare two runs (default: a run and the account's previous run)")
+    diff.add_argument("run_id", type=int)
+    diff.add_argument("other_id", type=int, nargs="?", help="Later run to compare with")
+    diff.add_argument("--json", action="store_true", help="Print the diff as JSON")
+
+    export = commands.add_parser("export", help="Write a run as insights.json, creatives.json and report.md")
+    export.add_argument("run_id", type=int)
+    export.add_argument("output_dir")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run history CLI."""
+    args = parse_args(argv)
+    if not Path(args.db).exists():
+        print(f"❌ Error: No run history at {args.db}")
+        return
+    history = RunHistory(args.db)
+    try:
+        if args.command == "list":
+            _print_table(history.list_runs(args.account, args.since, args.until, args.limit))
+        elif args.command == "insights":
+            _print_table(history.insights(args.account, args.impact, args.metric, args.since, args.until, args.limit))
+        else:
+            run = history.get(args.run_id)
+            if run is None:
+                print(f"❌ Error: No run {args.run_id}")
+                return
+            if args.command == "show":
+                print(json.dumps(run, indent=2, ensure_ascii=False))
+            elif args.command == "export":
+                export_run(run, args.output_dir)
+            else:
+                if args.other_id is None:
+                    # One run given: compare the account's previous run with it
+                    previous = history.latest(run["account"], before=run["id"])
+                    if previous is None:
+                        print(f"❌ Error: Run {run['id']} is the first run of {run['account']}")
+                        return
+                    before, after = history.get(previous), run
+                else:
+                    before, after = run, history.get(args.other_id)
+                    if after is None:
+                        print(f"❌ Error: No run {args.other_id}")
+                        return
+                diff = diff_runs(before, after)
+                if args.json:
+                    print(json.dumps(diff, indent=2, ensure_ascii=False))
+                else:
+                    print_diff(diff)
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Column dtype schema for Facebook ads exports."""
+from typing import TYPE_CHECKING, Dict
+
+# pandas is imported on first use so the CLI can read these constants without loading it
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Bump when the schema changes so typed caches written with an older schema are discarded
+SCHEMA_VERSION = 2
+
+# Explicit dtypes for the known ad export columns. Names and targeting
+# dimensions repeat across rows and load as categoricals; campaign IDs are
+# unique, so a categorical would only add codes and they stay strings.
+# Counters fit in 32-bit ints and dates parse to datetime64. Monetary and
+# rate columns stay float64: float32 cannot hold two-decimal values exactly
+# and would change the statistics sent to the LLM.
+AD_COLUMN_DTYPES: Dict[str, str] = {
+    "campaign_name": "category",
+    "campaign_type": "category",
+    "ad_format": "category",
+    "product_category": "category",
+    "target_age_group": "category",
+    "target_gender": "category",
+    "start_date": "datetime64[ns]",
+    "end_date": "datetime64[ns]",
+    "impressions": "int32",
+    "reach": "int32",
+    "clicks": "int32",
+    "conversions": "int32",
+    "video_views": "int32",
+    "spend_usd": "float64",
+    "ctr_percent": "float64",
+    "cpc_usd": "float64",
+    "cpm_usd": "float64",
+    "conversion_rate_percent": "float64",
+    "cpa_usd": "float64",
+    "roas": "float64",
+    "engagement_rate": "float64",
+    "video_completion_rate": "float64",
+}
+
+
+# Categorical dimensions metrics are broken down by
+DIMENSIONS = ["campaign_type", "ad_format", "product_category", "target_age_group", "target_gender"]
+
+
+def apply_schema(df: "pd.DataFrame", schema: Dict[str, str] = AD_COLUMN_DTYPES) -> "pd.DataFrame":
+    """Cast known columns to their schema dtypes.
+
+    Columns that are missing or cannot be cast losslessly (e.g. integer
+    counters containing nulls or values out of range) are left unchanged.
+
+    Args:
+        df: DataFrame to convert
+        schema: Mapping of column name to target dtype
+
+    Returns:
+        DataFrame with converted columns
+    """
+    import pandas as pd
+
+    for column, dtype in schema.items():
+        if column not in df.columns or str(df[column].dtype) == dtype:
+            continue
+        if dtype.startswith("datetime64"):
+            converted = pd.to_datetime(df[column], errors="coerce", format="ISO8601")
+            # Keep the strings if any value is not an ISO date
+            if not (converted.isna() & df[column].notna()).any():
+                df[column] = converted
+            continue
+        try:
+            converted = df[column].astype(dtype)
+        except (TypeError, ValueError):
+            continue
+        if dtype != "category" and not (converted == df[column]).all():
+            continue
+        df[column] = converted
+    return df
+
+
+def optimize_dtypes(df: "pd.DataFrame", schema: Dict[str, str] = AD_COLUMN_DTYPES,
+                    max_category_ratio: float = 0.5) -> "pd.DataFrame":
+    """Shrink a freshly parsed frame.
+
+    Known columns get their schema dtypes; other integer columns are
+    downcast to the smallest integer type that holds them, and other string
+    columns become categoricals when they have at most ``max_category_ratio``
+    distinct values per row.
+
+    Args:
+        df: DataFrame as returned by ``pd.read_csv``
+        schema: Mapping of column name to target dtype
+        max_category_ratio: Distinct-to-total ratio below which strings become categoricals
+
+    Returns:
+        DataFrame with converted columns
+    """
+    import pandas as pd
+
+    df = apply_schema(df, schema)
+    for column in df.columns:
+        if column in schema:
+            continue
+        series = df[column]
+        if pd.api.types.is_integer_dtype(series.dtype):
+            df[column] = pd.to_numeric(series, downcast="integer")
+        elif ((pd.api.types.is_string_dtype(series.dtype) or pd.api.types.is_object_dtype(series.dtype))
+              and series.nunique() <= max_category_ratio * len(series)):
+            df[column] = series.astype("category")
+    return df
+
+
+def memory_mb(df: "pd.DataFrame") -> float:
+    """Memory held by a frame in MiB, including the strings in object columns."""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
@@ -0,0 +1,284 @@
+"""Semantic cache: reuse stage outputs across accounts whose data is numerically near-identical."""
+import copy
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from analytics import RATIO_METRICS
+
+# describe() statistics used as features; counts depend on account size, not on its shape
+SUMMARY_STATS = ["mean", "std", "25%", "50%", "75%"]
+
+# Wording that marks an insight as being about the whole account rather than a segment
+ACCOUNT_LEVEL = re.compile(r"\b(overall|account|across all|all campaigns|blended|total)\b", re.IGNORECASE)
+
+# Segment values too generic to be recognized in insight text
+GENERIC_SEGMENTS = {"all", "unknown"}
+
+# Metric names models write in insights, normalized (see ``metric_key``), and the metrics-summary key they mean
+METRIC_ALIASES = {
+    "ctr": "ctr_percent",
+    "click_through_rate": "ctr_percent",
+    "conversion_rate": "conversion_rate_percent",
+    "cvr": "conversion_rate_percent",
+    "cpc": "cpc_usd",
+    "cost_per_click": "cpc_usd",
+    "cpm": "cpm_usd",
+    "cost_per_mille": "cpm_usd",
+    "cpa": "cpa_usd",
+    "cost_per_acquisition": "cpa_usd",
+    "cost_per_conversion": "cpa_usd",
+    "return_on_ad_spend": "roas",
+    "spend": "spend_usd",
+    "ad_spend": "spend_usd",
+    "revenue": "revenue_usd",
+}
+
+
+def summary_features(numeric_summary: Dict[str, Dict[str, Any]],
+                     metrics: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """Build the feature vector of a dataset from its locally computed statistics.
+
+    Args:
+        numeric_summary: ``describe()`` statistics per numeric column
+        metrics: Metrics summary (see ``analytics.compute_metrics_summary``);
+            adds the overall ratios and each segment's spend share and ratios
+
+    Returns:
+        Mapping of feature name to value; missing and non-finite values are left out
+    """
+    features: Dict[str, float] = {}
+
+    def add(name: str, value: Any):
+        if isinstance(value, (int, float)) and math.isfinite(value):
+            features[name] = float(value)
+
+    for column, stats in numeric_summary.items():
+        for stat in SUMMARY_STATS:
+            add(f"{column}.{stat}", stats.get(stat))
+    if metrics:
+        overall = metrics["overall"]
+        for metric in RATIO_METRICS:
+            add(f"overall.{metric}", overall.get(metric))
+        total_spend = overall.get("spend_usd") or 0
+        for dimension, segments in metrics["segments"].items():
+            for segment in segments:
+                prefix = f"{dimension}={segment['segment']}"
+                if total_spend:
+                    add(f"{prefix}.spend_share", segment.get("spend_usd", 0) / total_spend)
+                for metric in RATIO_METRICS:
+                    add(f"{prefix}.{metric}", segment.get(metric))
+    return features
+
+
+def similarity(matrix: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """Similarity of each row of ``matrix`` to ``vector``: 1 minus the mean relative difference.
+
+    Features are compared relative to their own magnitude, so spend in dollars
+    and CTR in percent weigh the same. 1.0 means identical; 0.95 means the
+    features differ by 5% on average.
+    """
+    scale = np.maximum(np.maximum(np.abs(matrix), np.abs(vector)), 1e-9)
+    return 1.0 - (np.abs(matrix - vector) / scale).mean(axis=1)
+
+
+def metric_key(name: Any) -> Optional[str]:
+    """Metrics-summary key of a metric named in an insight (``"CTR (%)"`` → ``"ctr_percent"``)."""
+    if not name:
+        return None
+    key = re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+    return METRIC_ALIASES.get(key, key)
+
+
+def _named_segments(text: str, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Segment records of ``metrics`` whose value is named in ``text``."""
+    named = []
+    for segments in metrics["segments"].values():
+        for segment in segments:
+            value = str(segment["segment"])
+            if value.lower() in GENERIC_SEGMENTS:
+                continue
+            if re.search(rf"(?<![\w-]){re.escape(value)}(?![\w-])", text, re.IGNORECASE):
+                named.append(segment)
+    return named
+
+
+def adapt_insights(insights: Dict[str, Any], metrics: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Lightly adapt insights reused from another account to this one.
+
+    A key insight about one segment (its text names exactly one segment
+    value) gets that segment's value of its metric in this account; one
+    that is explicitly account-level and names no segment gets the overall
+    value. The insight's metric name is matched to the summary's keys with
+    ``metric_key``. Any other insight keeps its value and is marked ``reused`` so it
+    is not mistaken for a number grounded in this account. The top
+    performers and underperformers are replaced with this account's own
+    campaigns; the narrative is kept as is.
+    """
+    if not metrics:
+        return insights
+    adapted = copy.deepcopy(insights)
+    overall = metrics["overall"]
+    for insight in adapted.get("key_insights", []):
+        metric = metric_key(insight.get("metric"))
+        text = str(insight.get("insight", ""))
+        named = _named_segments(text, metrics)
+        if len(named) == 1:
+            value = named[0].get(metric)
+        elif not named and ACCOUNT_LEVEL.search(text):
+            value = overall.get(metric)
+        else:
+            value = None
+        if value is None:
+            insight["reused"] = True
+        else:
+            insight["value"] = str(value)
+    summary = adapted.get("performance_summary")
+    if isinstance(summary, dict):
+        for key in ("top_performers", "underperformers"):
+            if metrics.get(key):
+                summary[key] = [record["campaign"] for record in metrics[key]]
+    return adapted
+
+
+class SemanticMatch:
+    """Nearest cached output for a lookup and how similar its data was."""
+
+    def __init__(self, output: Any, similarity: float, source: str, hit: bool):
+        self.output = output
+        self.similarity = similarity
+        self.source = source
+        self.hit = hit
+
+
+class SemanticCache:
+    """SQLite store of stage outputs with an in-memory nearest-neighbor index over their feature vectors.
+
+    Entries are grouped by namespace (stage, model and prompt settings) and by
+    feature layout (the same columns and segment values), and the nearest
+    neighbor is searched within that group with one vectorized pass.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        """Initialize the cache, creating the database if needed.
+
+        Args:
+            path: Path to the SQLite database file
+            max_entries: Least recently used entries are evicted beyond this count
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.lookups = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._index: Dict[Tuple[str, str], Tuple[List[int], np.ndarray]] = {}
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT NOT NULL,
+                layout TEXT NOT NULL,
+                features TEXT NOT NULL,
+                output TEXT NOT NULL,
+                source TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_semantic_group ON semantic_entries (namespace, layout)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_semantic_accessed ON semantic_entries (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _layout(features: Dict[str, float]) -> Tuple[str, List[str]]:
+        """Hash of the feature names, and the names in vector order."""
+        names = sorted(features)
+        return hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest(), names
+
+    def _group(self, namespace: str, layout: str, size: int) -> Tuple[List[int], np.ndarray]:
+        """Entry ids and feature matrix of a group, loaded from the database on first use."""
+        key = (namespace, layout)
+        if key not in self._index:
+            rows = self._conn.execute(
+                "SELECT id, features FROM semantic_entries WHERE namespace = ? AND layout = ?",
+                (namespace, layout)
+            ).fetchall()
+            matrix = np.array([json.loads(features) for _, features in rows], dtype=float).reshape(-1, size)
+            self._index[key] = ([row_id for row_id, _ in rows], matrix)
+        return self._index[key]
+
+    def lookup(self, namespace: str, features: Dict[str, float], threshold: float) -> Optional[SemanticMatch]:
+        """Find the cached output whose features are nearest to ``features``.
+
+        Args:
+            namespace: Stage and settings the output must have been produced with
+            features: Feature vector of the current data (see ``summary_features``)
+            threshold: Minimum similarity for the match to count as a hit
+
+        Returns:
+            Nearest match (``hit`` tells whether it passed the threshold), or
+            None if nothing comparable is cached
+        """
+        layout, names = self._layout(features)
+        vector = np.array([features[name] for name in names], dtype=float)
+        with self._lock:
+            self.lookups += 1
+            ids, matrix = self._group(namespace, layout, len(names))
+            if not ids:
+                return None
+            scores = similarity(matrix, vector)
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < threshold:
+                return SemanticMatch(None, score, "", False)
+            output, source = self._conn.execute(
+                "SELECT output, source FROM semantic_entries WHERE id = ?", (ids[best],)
+            ).fetchone()
+            self._conn.execute("UPDATE semantic_entries SET accessed_at = ? WHERE id = ?", (time.time(), ids[best]))
+            self._conn.commit()
+            self.hits += 1
+        return SemanticMatch(json.loads(output), score, source, True)
+
+    def put(self, namespace: str, features: Dict[str, float], output: Any, source: str = ""):
+        """Store a stage output with the feature vector of the data it was produced from."""
+        layout, names = self._layout(features)
+        vector = [features[name] for name in names]
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO semantic_entries (namespace, layout, features, output, source, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, layout, json.dumps(vector), json.dumps(output, ensure_ascii=False), source, now, now)
+            )
+            key = (namespace, layout)
+            if key in self._index:
+                ids, matrix = self._index[key]
+                self._index[key] = (ids + [cursor.lastrowid], np.vstack([matrix, np.array(vector, dtype=float)]))
+            evicted = self._conn.execute(
+                "DELETE FROM semantic_entries WHERE id IN (SELECT id FROM semantic_entries "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+            if evicted:
+                self._index.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups in this process that were hits."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
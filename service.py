@@ -0,0 +1,426 @@
+"""Long-running analysis service: a bounded job queue, a worker pool and warm datasets over local HTTP.
+
+Endpoints (JSON in and out):
+    POST /jobs              {"data_path": "...", "mode": "async"|"sequential"} → 202 with the job id,
+                            or 503 when the queue is full
+    GET  /jobs/<id>         job status and queue/run timings
+    GET  /jobs/<id>/result  insights, creatives, report and run statistics once the job is done
+    GET  /health            queue depth, workers and warm dataset counts
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from config import (
+    DATA_CHUNKSIZE,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_WORKERS,
+    SERVICE_QUEUE_SIZE,
+    SERVICE_WARM_DATASETS,
+    SERVICE_JOB_HISTORY,
+    SERVICE_DATA_ROOT,
+    SIGNIFICANCE_ENABLED
+)
+
+JOB_MODES = ["async", "sequential"]
+MAX_BODY_BYTES = 64 * 1024
+
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class Job:
+    """One queued analysis and its outcome."""
+
+    def __init__(self, data_path: str, mode: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.data_path = data_path
+        self.mode = mode
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.results: Optional[Dict[str, Any]] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.warm_data = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status record returned by ``GET /jobs/<id>``."""
+        record = {
+            "job_id": self.id,
+            "status": self.status,
+            "data_path": self.data_path,
+            "mode": self.mode,
+            "submitted_at": self.submitted_at,
+            "warm_data": self.warm_data
+        }
+        if self.started_at is not None:
+            record["queue_seconds"] = round(self.started_at - self.submitted_at, 3)
+        if self.finished_at is not None:
+            record["run_seconds"] = round(self.finished_at - self.started_at, 3)
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class WarmDatasets:
+    """Loaded datasets kept in memory, least recently used first out.
+
+    A file is reloaded when its size or modification time changes. Loaders
+    are shared by every worker, so each version of a file is parsed (and its
+    metrics computed) once however many jobs use it; a loader's lazy results
+    are filled under its own lock.
+    """
+
+    def __init__(self, capacity: int):
+        """Initialize the cache.
+
+        Args:
+            capacity: Datasets kept in memory (0 = every job loads its own data)
+        """
+        self.capacity = capacity
+        self._loaders: "OrderedDict[str, Tuple[Tuple[int, int], Any]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def version(path: str) -> Tuple[int, int]:
+        """Modification time and size of a file, which change when it is rewritten."""
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    async def get(self, path: str) -> Tuple[Any, bool]:
+        """Return a loaded ``DataLoader`` for the current version of ``path``.
+
+        Returns:
+            (loader, whether it was already warm)
+        """
+        from agent import create_data_loader
+
+        lock = self._locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            version = self.version(path)
+            entry = self._loaders.get(path)
+            if entry is not None and entry[0] == version:
+                self._loaders.move_to_end(path)
+                self.hits += 1
+                return entry[1], True
+            self.misses += 1
+            loader = create_data_loader(path)
+            await asyncio.to_thread(_warm_up, loader)
+            self._loaders[path] = (version, loader)
+            self._loaders.move_to_end(path)
+            while len(self._loaders) > self.capacity:
+                evicted, _ = self._loaders.popitem(last=False)
+                self._locks.pop(evicted, None)
+            return loader, False
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+
+def _warm_up(loader: Any):
+    """Load the data and compute its metrics and significance tests once, off the event loop."""
+    from agent import significance_options
+
+    loader.load_data()
+    loader.get_metrics_summary()
+    if SIGNIFICANCE_ENABLED:
+        loader.get_significance_summary(**significance_options())
+
+
+class AnalysisService:
+    """Run analysis jobs from a bounded queue on a pool of workers that keep their state warm.
+
+    The model router (and its HTTP connection pool) is created once. Each
+    worker keeps an analyst per dataset version, and datasets stay loaded in
+    ``WarmDatasets``, so a repeated job only pays for its model calls.
+    """
+
+    def __init__(self, workers: int = SERVICE_WORKERS, queue_size: int = SERVICE_QUEUE_SIZE,
+                 warm_datasets: int = SERVICE_WARM_DATASETS, job_history: int = SERVICE_JOB_HISTORY,
+                 data_root: Optional[str] = SERVICE_DATA_ROOT or None, llm: Any = None,
+                 use_llm_cache: bool = True):
+        """Initialize the service.
+
+        Args:
+            workers: Jobs analyzed at once
+            queue_size: Jobs waiting at most; further submissions are rejected with 503
+            warm_datasets: Datasets kept loaded in memory (ignored when DATA_CHUNKSIZE
+                streams files instead of loading them)
+            job_history: Finished jobs whose status and results are kept
+            data_root: If set, only files inside this directory can be analyzed
+            llm: Chat model client for every stage (e.g. a fake model); the
+                configured per-stage router is used if omitted
+            use_llm_cache: Reuse cached LLM responses for identical prompts
+        """
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.datasets = WarmDatasets(0 if DATA_CHUNKSIZE else warm_datasets)
+        self.job_history = job_history
+        self.data_root = Path(data_root).resolve() if data_root else None
+        self.llm = llm
+        self.use_llm_cache = use_llm_cache
+        self.router = None
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._http_clients = []
+        self._worker_tasks = []
+
+    async def start(self):
+        """Create the shared model clients and start the workers."""
+        # Imported here so a bad command line fails before the slow imports
+        from agent import create_router
+        import httpx
+
+        if self.llm is None:
+            limits = httpx.Limits(max_connections=self.workers * 4, max_keepalive_connections=self.workers * 4)
+            self._http_clients = [httpx.Client(limits=limits), httpx.AsyncClient(limits=limits)]
+            self.router = create_router(http_client=self._http_clients[0], http_async_client=self._http_clients[1])
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers and close the shared connection pools."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        for client in self._http_clients:
+            if hasattr(client, "aclose"):
+                await client.aclose()
+            else:
+                client.close()
+
+    def submit(self, data_path: str, mode: str = "async") -> Job:
+        """Queue an analysis job.
+
+        Raises:
+            ValueError: If the mode is unknown or the path is outside the data root
+            FileNotFoundError: If the data file does not exist
+            asyncio.QueueFull: If the queue is full
+        """
+        if mode not in JOB_MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(JOB_MODES)}")
+        path = Path(data_path).resolve()
+        if self.data_root is not None and self.data_root not in path.parents:
+            raise ValueError(f"{data_path} is outside the service data root")
+        if not path.is_file():
+            raise FileNotFoundError(f"Data file not found: {data_path}")
+        job = Job(str(path), mode)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        self.jobs[job.id] = job
+        self._prune_history()
+        return job
+
+    def _prune_history(self):
+        """Forget the oldest finished jobs beyond the history limit."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ("done", "failed")]
+        for job_id in finished[:max(len(finished) - self.job_history, 0)]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        """Take jobs off the queue, reusing an analyst per dataset version."""
+        analysts: "OrderedDict[Tuple[str, Any], Any]" = OrderedDict()
+        while True:
+            job = await self.queue.get()
+            job.status, job.started_at = "running", time.time()
+            self.running += 1
+            try:
+                analyst = await self._analyst(analysts, job)
+                if job.mode == "async":
+                    job.results = await analyst.arun_full_analysis()
+                else:
+                    job.results = await asyncio.to_thread(analyst.run_full_analysis)
+                job.status = "done"
+                self.completed += 1
+            except Exception as e:
+                job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+                self.failed += 1
+                print(f"❌ job {job.id} ({job.data_path}): {job.error}")
+            finally:
+                job.finished_at = time.time()
+                self.running -= 1
+                self.queue.task_done()
+
+    async def _analyst(self, analysts: "OrderedDict[Tuple[str, Any], Any]", job: Job) -> Any:
+        """The worker's analyst for the job's dataset, created on first use."""
+        from agent import AgenticFBAnalyst
+
+        loader = None
+        if self.datasets.capacity:
+            loader, job.warm_data = await self.datasets.get(job.data_path)
+        key = (job.data_path, id(loader))
+        analyst = analysts.get(key)
+        if analyst is None:
+            analyst = AgenticFBAnalyst(job.data_path, use_llm_cache=self.use_llm_cache, llm=self.llm,
+                                       router=self.router, data_loader=loader)
+            analysts[key] = analyst
+            # Analysts of datasets that are no longer warm would pin their frames
+            while len(analysts) > max(self.datasets.capacity, 1):
+                analysts.popitem(last=False)
+        analysts.move_to_end(key)
+        return analyst
+
+    def health(self) -> Dict[str, Any]:
+        """Queue, worker and cache counters returned by ``GET /health``."""
+        return {
+            "workers": self.workers,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "warm_datasets": len(self.datasets),
+            "warm_hits": self.datasets.hits,
+            "warm_misses": self.datasets.misses
+        }
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any, Dict[str, str]]:
+        """Route one HTTP request.
+
+        Returns:
+            (status code, JSON payload, extra headers)
+        """
+        parts = [part for part in target.split("?")[0].split("/") if part]
+        if parts == ["health"] and method == "GET":
+            return 200, self.health(), {}
+        if parts == ["jobs"] and method == "POST":
+            try:
+                request = json.loads(body or b"{}")
+                job = self.submit(request["data_path"], request.get("mode", "async"))
+            except (ValueError, KeyError, TypeError) as e:
+                return 400, {"error": f"Invalid job request: {e}"}, {}
+            except FileNotFoundError as e:
+                return 404, {"error": str(e)}, {}
+            except asyncio.QueueFull:
+                return 503, {"error": "Job queue is full"}, {"Retry-After": "1"}
+            return 202, job.to_dict(), {"Location": f"/jobs/{job.id}"}
+        if len(parts) in (2, 3) and parts[0] == "jobs" and method == "GET":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return 404, {"error": f"Unknown job {parts[1]}"}, {}
+            if len(parts) == 2:
+                return 200, job.to_dict(), {}
+            if parts[2] != "result":
+                return 404, {"error": f"Unknown resource {target}"}, {}
+            if job.status != "done":
+                return 409, {**job.to_dict(), "error": job.error or f"Job is {job.status}"}, {}
+            return 200, {**job.to_dict(), **job.results}, {}
+        if parts in (["health"], ["jobs"]) or (parts[:1] == ["jobs"] and len(parts) in (2, 3)):
+            return 405, {"error": f"{method} not allowed on {target}"}, {}
+        return 404, {"error": f"Unknown resource {target}"}, {}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one connection, keeping it open between requests."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    status, payload, extra = 413, {"error": "Request body too large"}, {}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload, extra = await self.dispatch(method, target, body)
+                writer.write(_http_response(status, payload, extra, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Malformed requests and dropped clients just end the connection
+            pass
+        finally:
+            writer.close()
+
+
+def _http_response(status: int, payload: Any, headers: Dict[str, str], keep_alive: bool) -> bytes:
+    """Serialize a JSON response."""
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    lines = [
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        *(f"{name}: {value}" for name, value in headers.items())
+    ]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def serve(service: AnalysisService, host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+    """Run the service until cancelled."""
+    await service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"✓ Analysis service listening on http://{host}:{port} "
+          f"({service.workers} workers, queue of {service.queue.maxsize}, "
+          f"{service.datasets.capacity} warm datasets)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Serve analysis jobs over local HTTP with warm state")
+    parser.add_argument("--host", default=SERVICE_HOST, help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="Jobs analyzed at once")
+    parser.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE,
+                        help="Jobs waiting at most before submissions are rejected")
+    parser.add_argument("--warm-datasets", type=int, default=SERVICE_WARM_DATASETS,
+                        help="Datasets kept loaded in memory")
+    parser.add_argument("--no-llm-cache", dest="use_llm_cache", action="store_false",
+                        help="Bypass the local LLM response cache")
+    parser.add_argument("--fake-llm-latency", type=float, metavar="SECONDS",
+                        help="Answer with the local fake chat model instead of OpenAI (for load tests)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Service execution function."""
+    args = parse_args(argv)
+    llm = None
+    if args.fake_llm_latency is not None:
+        from fake_llm import FakeChatModel
+        llm = FakeChatModel(latency_seconds=args.fake_llm_latency)
+    service = AnalysisService(
+        workers=args.workers,
+        queue_size=args.queue_size,
+        warm_datasets=args.warm_datasets,
+        llm=llm,
+        use_llm_cache=args.use_llm_cache
+    )
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n✓ Analysis service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Statistical significance of segment and campaign differences, and robust anomaly detection."""
+import importlib.util
+import math
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from analytics import CAMPAIGN_KEYS, RATIO_METRICS, additive_measures, derive_ratios, has_metric_columns
+from schema import DIMENSIONS
+
+# Rate metrics tested with two-proportion z-tests: metric → (successes, trials)
+PROPORTION_METRICS = {
+    "ctr_percent": ("clicks", "impressions"),
+    "conversion_rate_percent": ("conversions", "clicks"),
+}
+
+# Largest index matrix drawn at once while bootstrapping
+MAX_BOOTSTRAP_ELEMENTS = 4_000_000
+
+# Larger segments are bootstrapped over this many random buckets of rows
+MAX_BOOTSTRAP_UNITS = 5_000
+
+# SciPy is optional; without it p-values are computed one test at a time
+SCIPY_AVAILABLE = importlib.util.find_spec("scipy") is not None
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    """Complementary error function per element (SciPy's ufunc when installed)."""
+    if SCIPY_AVAILABLE:
+        from scipy.special import erfc
+        return erfc(x)
+    # A Python-level loop, one call per test; install SciPy for large campaign counts
+    return np.array([math.erfc(value) for value in np.ravel(x)], dtype=float).reshape(np.shape(x))
+
+
+def proportion_z_test(successes_a: np.ndarray, trials_a: np.ndarray, successes_b: np.ndarray,
+                      trials_b: np.ndarray) -> np.ndarray:
+    """Two-sided two-proportion z-tests, one per element.
+
+    Returns:
+        p-values; 1.0 where a side has no trials or the pooled rate is 0 or 1
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate_a = successes_a / trials_a
+        rate_b = successes_b / trials_b
+        pooled = (successes_a + successes_b) / (trials_a + trials_b)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / trials_a + 1 / trials_b))
+        z = (rate_a - rate_b) / se
+    z = np.where(np.isfinite(z), z, 0.0)
+    return _erfc(np.abs(z) / math.sqrt(2))
+
+
+def benjamini_hochberg(p_values: np.ndarray) -> np.ndarray:
+    """Benjamini-Hochberg adjusted p-values (q-values), controlling the false discovery rate."""
+    n = len(p_values)
+    if n == 0:
+        return p_values
+    order = np.argsort(p_values)
+    ranked = p_values[order] * n / np.arange(1, n + 1)
+    adjusted = np.minimum.accumulate(ranked[::-1])[::-1]
+    q_values = np.empty(n)
+    q_values[order] = np.minimum(adjusted, 1.0)
+    return q_values
+
+
+def bootstrap_ratio(numerator: np.ndarray, denominator: np.ndarray, resamples: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """Bootstrap replicates of a ratio of sums (e.g. revenue / spend = ROAS).
+
+    Rows are resampled with replacement for many replicates at once, in
+    blocks that keep the index matrix under MAX_BOOTSTRAP_ELEMENTS. Beyond
+    MAX_BOOTSTRAP_UNITS rows, rows are first summed into that many random
+    buckets of equal size and the buckets are resampled instead; the sums of
+    independent rows keep the variance of the totals while the cost stops
+    growing with the row count.
+
+    Returns:
+        One ratio per replicate (NaN where the resampled denominator is 0)
+    """
+    n = len(numerator)
+    if n > MAX_BOOTSTRAP_UNITS:
+        buckets = rng.permutation(n) % MAX_BOOTSTRAP_UNITS
+        numerator = np.bincount(buckets, weights=numerator, minlength=MAX_BOOTSTRAP_UNITS)
+        denominator = np.bincount(buckets, weights=denominator, minlength=MAX_BOOTSTRAP_UNITS)
+        n = MAX_BOOTSTRAP_UNITS
+    replicates = np.empty(resamples)
+    block = max(1, MAX_BOOTSTRAP_ELEMENTS // max(n, 1))
+    for start in range(0, resamples, block):
+        size = min(block, resamples - start)
+        rows = rng.integers(0, n, size=(size, n))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            replicates[start:start + size] = numerator[rows].sum(axis=1) / denominator[rows].sum(axis=1)
+    return replicates
+
+
+def robust_z(values: np.ndarray) -> np.ndarray:
+    """Robust z-scores from the median and the median absolute deviation.
+
+    Returns:
+        Scores comparable to standard z-scores; 0 where the MAD is 0 or the value is missing
+    """
+    median = np.nanmedian(values)
+    mad = np.nanmedian(np.abs(values - median))
+    if not np.isfinite(mad) or mad == 0:
+        return np.zeros(len(values))
+    scores = 0.6745 * (values - median) / mad
+    return np.where(np.isfinite(scores), scores, 0.0)
+
+
+def compute_significance(df: pd.DataFrame, dimensions: Optional[List[str]] = None, alpha: float = 0.05,
+                         resamples: int = 1000, z_threshold: float = 3.5, min_effect: float = 0.05,
+                         seed: int = 0, min_rows: int = 2, max_records: int = 200) -> Optional[Dict[str, Any]]:
+    """Test which differences between segments and campaigns are real, and flag anomalous campaigns.
+
+    - CTR and conversion rate: two-proportion z-tests between every pair of
+      segments of each dimension, and between each campaign and the rest of
+      the account
+    - ROAS: bootstrap confidence intervals of each segment and of every
+      pairwise difference, from batched row resampling
+    - All p-values are adjusted together with Benjamini-Hochberg
+
+    The seed is fixed, so the same data always gives the same result (and the
+    same prompt).
+
+    Args:
+        df: Ads data
+        dimensions: Dimensions whose segments are compared (defaults to DIMENSIONS)
+        alpha: False discovery rate, and 1 - confidence level of the intervals
+        resamples: Bootstrap replicates per segment
+        z_threshold: Robust z-score beyond which a campaign metric is anomalous
+        min_effect: Smallest relative difference reported; on large accounts
+            even negligible differences are statistically significant
+        seed: Seed of the bootstrap random generator
+        min_rows: Segments with fewer rows get no bootstrap interval
+        max_records: Most significant findings of segments and of campaigns,
+            and most extreme anomalies, kept (the counts always cover all of them)
+
+    Returns:
+        Dictionary with the number of tests, significant segment and campaign
+        findings sorted by q-value, ROAS intervals per segment and anomalies,
+        or None if the frame lacks the metric columns
+    """
+    if not has_metric_columns(df) or df.empty:
+        return None
+    rng = np.random.default_rng(seed)
+    measures = additive_measures(df)
+    revenue = measures["revenue_usd"].to_numpy()
+    spend = measures["spend_usd"].to_numpy()
+    tests: List[pd.DataFrame] = []
+    intervals: Dict[str, List[Dict[str, Any]]] = {}
+    low_pct, high_pct = 100 * alpha / 2, 100 * (1 - alpha / 2)
+
+    for dimension in dimensions or DIMENSIONS:
+        if dimension not in df.columns:
+            continue
+        keys = df[dimension].astype(str)
+        sums = measures.groupby(keys, observed=True).sum()
+        if len(sums) < 2:
+            continue
+        ratios = derive_ratios(sums)
+        names = sums.index.to_numpy()
+        a, b = np.triu_indices(len(sums), k=1)
+
+        for metric, (successes, trials) in PROPORTION_METRICS.items():
+            s, t = sums[successes].to_numpy(), sums[trials].to_numpy()
+            tests.append(_test_frame(dimension, metric, names[a], names[b], ratios[metric].to_numpy()[a],
+                                     ratios[metric].to_numpy()[b], proportion_z_test(s[a], t[a], s[b], t[b]),
+                                     "two-proportion z-test"))
+
+        # One set of replicates per segment; every pairwise difference reuses them
+        positions = keys.groupby(keys, observed=True).indices
+        replicates = np.column_stack([
+            bootstrap_ratio(revenue[positions[name]], spend[positions[name]], resamples, rng)
+            if len(positions[name]) >= min_rows else np.full(resamples, np.nan)
+            for name in names
+        ])
+        ci = np.nanpercentile(replicates, [low_pct, high_pct], axis=0) \
+            if np.isfinite(replicates).any() else np.full((2, len(names)), np.nan)
+        intervals[dimension] = [
+            {"segment": name, "roas": _round(ratios["roas"].iloc[k]),
+             "roas_ci": [_round(ci[0, k]), _round(ci[1, k])]}
+            for k, name in enumerate(names)
+        ]
+        diffs = replicates[:, a] - replicates[:, b]
+        valid = np.isfinite(diffs).all(axis=0)
+        if valid.any():
+            diffs, pa, pb = diffs[:, valid], a[valid], b[valid]
+            diff_ci = np.percentile(diffs, [low_pct, high_pct], axis=0)
+            # Share of replicates on the other side of 0, floored at one replicate
+            p_values = np.clip(2 * np.minimum((diffs <= 0).mean(axis=0), (diffs >= 0).mean(axis=0)),
+                               1 / resamples, 1.0)
+            frame = _test_frame(dimension, "roas", names[pa], names[pb], ratios["roas"].to_numpy()[pa],
+                                ratios["roas"].to_numpy()[pb], p_values, "bootstrap")
+            frame["ci_low"], frame["ci_high"] = diff_ci[0], diff_ci[1]
+            tests.append(frame)
+
+    campaign_keys = [df[key].astype(str) for key in CAMPAIGN_KEYS if key in df.columns]
+    campaigns = None
+    if campaign_keys:
+        campaigns = measures.groupby(campaign_keys, observed=True).sum()
+        campaigns.index = [" / ".join(key) if isinstance(key, tuple) else key for key in campaigns.index]
+        if len(campaigns) > 1:
+            rest = measures.sum() - campaigns
+            campaign_ratios, rest_ratios = derive_ratios(campaigns), derive_ratios(rest)
+            for metric, (successes, trials) in PROPORTION_METRICS.items():
+                tests.append(_test_frame(
+                    "campaign vs rest", metric, campaigns.index.to_numpy(),
+                    np.full(len(campaigns), "rest of account"), campaign_ratios[metric].to_numpy(),
+                    rest_ratios[metric].to_numpy(),
+                    proportion_z_test(campaigns[successes].to_numpy(), campaigns[trials].to_numpy(),
+                                      rest[successes].to_numpy(), rest[trials].to_numpy()),
+                    "two-proportion z-test"
+                ))
+
+    results = pd.concat(tests, ignore_index=True) if tests else _test_frame("", "", [], [], [], [], [], "")
+    results["q_value"] = benjamini_hochberg(results["p_value"].to_numpy())
+    results["effect"] = (results["value_a"] - results["value_b"]).abs() \
+        / results[["value_a", "value_b"]].abs().max(axis=1)
+    significant = results[(results["q_value"] < alpha) & (results["effect"] >= min_effect)] \
+        .sort_values(["q_value", "effect"], ascending=[True, False])
+    by_campaign = significant["comparison"] == "campaign vs rest"
+    anomaly_count, anomalies = _anomalies(campaigns, z_threshold, max_records) \
+        if campaigns is not None else (0, [])
+
+    return {
+        "alpha": alpha,
+        "min_effect": min_effect,
+        "resamples": resamples,
+        "tests": len(results),
+        "significant_count": int((~by_campaign).sum()),
+        "significant": _findings(significant[~by_campaign], max_records),
+        "significant_campaign_count": int(by_campaign.sum()),
+        "significant_campaigns": _findings(significant[by_campaign], max_records),
+        "segment_intervals": intervals,
+        "anomaly_count": anomaly_count,
+        "anomalies": anomalies
+    }
+
+
+def _test_frame(comparison: str, metric: str, a: Any, b: Any, value_a: Any, value_b: Any, p_values: Any,
+                test: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "comparison": comparison, "metric": metric, "a": a, "b": b, "value_a": value_a, "value_b": value_b,
+        "p_value": np.asarray(p_values, dtype=float), "test": test, "ci_low": np.nan, "ci_high": np.nan
+    })
+
+
+def _round(value: Any, digits: int = 2) -> Optional[float]:
+    return round(float(value), digits) if value is not None and np.isfinite(value) else None
+
+
+def _findings(significant: pd.DataFrame, limit: int) -> List[Dict[str, Any]]:
+    return [_finding(row) for row in significant.head(limit).itertuples(index=False)]
+
+
+def _finding(row: Any) -> Dict[str, Any]:
+    finding = {
+        "comparison": row.comparison,
+        "metric": row.metric,
+        "a": row.a,
+        "b": row.b,
+        "value_a": _round(row.value_a),
+        "value_b": _round(row.value_b),
+        "q_value": float(f"{row.q_value:.2g}"),
+        "test": row.test
+    }
+    if np.isfinite(row.ci_low):
+        finding["difference_ci"] = [_round(row.ci_low), _round(row.ci_high)]
+    return finding
+
+
+def _anomalies(campaigns: pd.DataFrame, z_threshold: float, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+    """Campaign metrics whose robust z-score is beyond ``z_threshold``.
+
+    Returns:
+        (number of anomalies, the ``limit`` most extreme ones)
+    """
+    if len(campaigns) < 3:
+        return 0, []
+    ratios = derive_ratios(campaigns)
+    metrics = list(RATIO_METRICS)
+    values = ratios[metrics].to_numpy(dtype=float)
+    scores = np.column_stack([robust_z(values[:, k]) for k in range(len(metrics))])
+    rows, columns = np.nonzero(np.abs(scores) > z_threshold)
+    order = np.argsort(-np.abs(scores[rows, columns]), kind="stable")[:limit]
+    anomalies = []
+    for row, column in zip(rows[order], columns[order]):
+        good = (scores[row, column] > 0) == RATIO_METRICS[metrics[column]]
+        anomalies.append({
+            "campaign": ratios.index[row],
+            "metric": metrics[column],
+            "value": _round(values[row, column]),
+            "robust_z": _round(scores[row, column]),
+            "assessment": "unusually good" if good else "unusually poor"
+        })
+    return len(rows), anomalies
+
+
+def format_significance(summary: Optional[Dict[str, Any]], max_findings: int = 10,
+                        max_anomalies: int = 10) -> str:
+    """Render the significant findings and anomalies as compact text for an LLM prompt.
+
+    Args:
+        summary: Output of ``compute_significance``
+        max_findings: Maximum number of segment and of campaign differences to list
+        max_anomalies: Maximum number of anomalies to list
+
+    Returns:
+        Text listing only differences that passed the tests (empty if there is no summary)
+    """
+    if not summary:
+        return ""
+    confidence = f"{1 - summary['alpha']:.0%}"
+    significant = summary["significant_count"] + summary["significant_campaign_count"]
+    lines = [f"Statistically significant differences ({significant} of {summary['tests']} tests, "
+             f"Benjamini-Hochberg q < {summary['alpha']}, relative difference ≥ {summary['min_effect']:.0%}; "
+             f"differences not listed are within noise or negligible)"]
+    sections = [
+        ("Between segments:", summary["significant"], summary["significant_count"]),
+        ("Campaigns vs the rest of the account:", summary["significant_campaigns"],
+         summary["significant_campaign_count"])
+    ]
+    for title, findings, count in sections:
+        lines.append(title)
+        for finding in findings[:max_findings]:
+            interval = ""
+            if "difference_ci" in finding:
+                interval = f", {confidence} CI of difference {finding['difference_ci']}"
+            q_value = f"q={finding['q_value']}" if finding["q_value"] >= 0.001 else "q<0.001"
+            compared = f"{finding['a']} vs {finding['b']}" if finding["comparison"] == "campaign vs rest" \
+                else f"{finding['comparison']}: {finding['a']} vs {finding['b']}"
+            lines.append(f"- {compared}: {finding['metric']} {finding['value_a']} vs {finding['value_b']} "
+                         f"({q_value}{interval})")
+        if not findings:
+            lines.append("- none")
+        elif count > max_findings:
+            lines.append(f"- … {count - max_findings} more with larger q-values")
+
+    if summary["anomalies"]:
+        lines.append("\nAnomalous campaigns (robust z-score):")
+        for anomaly in summary["anomalies"][:max_anomalies]:
+            lines.append(f"- {anomaly['campaign']}: {anomaly['metric']}={anomaly['value']} "
+                         f"(z={anomaly['robust_z']}, {anomaly['assessment']})")
+        if summary["anomaly_count"] > max_anomalies:
+            lines.append(f"- … {summary['anomaly_count'] - max_anomalies} less extreme")
+    return "\n".join(lines)
@@ -0,0 +1,239 @@
+"""Mergeable one-pass accumulators for computing summary statistics over chunks."""
+import math
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+
+
+# Quantiles reported by DataFrame.describe()
+DESCRIBE_PERCENTILES = (0.25, 0.5, 0.75)
+
+# Values held per quantile sketch level before compaction kicks in.
+# Columns with fewer non-null values than this get exact quantiles.
+DEFAULT_SKETCH_CAPACITY = 100_000
+
+
+class QuantileSketch:
+    """Bounded-memory, mergeable quantile sketch (KLL-style compactor).
+
+    Values are buffered exactly until a level holds more than ``capacity``
+    items; the level is then sorted and every other item is promoted to the
+    next level with double weight. Memory stays at roughly
+    ``capacity * log2(n / capacity)`` values no matter how many are added.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_SKETCH_CAPACITY, seed: int = 0):
+        """Initialize the sketch.
+
+        Args:
+            capacity: Maximum number of values held per level
+            seed: Seed for the compaction offset so results are reproducible
+        """
+        self.capacity = capacity
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def is_exact(self) -> bool:
+        """Whether no compaction has happened yet."""
+        return len(self.levels) == 1
+
+    def update(self, values: np.ndarray):
+        """Add a batch of non-null values to the sketch."""
+        if len(values) == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values.astype(np.float64, copy=False)])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        """Merge another sketch into this one."""
+        for height, level in enumerate(other.levels):
+            if height >= len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            self.levels[height] = np.concatenate([self.levels[height], level])
+        self._compress()
+
+    def _compress(self):
+        height = 0
+        while height < len(self.levels):
+            level = self.levels[height]
+            if len(level) > self.capacity:
+                level = np.sort(level)
+                # Keep one item back when the level has odd length so the
+                # promoted half represents an exact pairing.
+                leftover = level[-1:] if len(level) % 2 else level[:0]
+                paired = level[:len(level) - len(leftover)]
+                promoted = paired[int(self._rng.integers(2))::2]
+                self.levels[height] = leftover
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[height + 1] = np.concatenate([self.levels[height + 1], promoted])
+            height += 1
+
+    def quantile(self, q: float) -> float:
+        """Return the (approximate) q-th quantile.
+
+        Uses linear interpolation, matching pandas, while the sketch is exact.
+        """
+        if self.is_exact:
+            if len(self.levels[0]) == 0:
+                return math.nan
+            return float(np.percentile(self.levels[0], q * 100))
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level), 2.0 ** height) for height, level in enumerate(self.levels)
+        ])
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+        cumulative = np.cumsum(weights)
+        idx = int(np.searchsorted(cumulative, q * cumulative[-1]))
+        return float(values[min(idx, len(values) - 1)])
+
+
+class NumericColumnAccumulator:
+    """Running count, mean, variance, min, max and quantiles for one column."""
+
+    def __init__(self, sketch_capacity: int = DEFAULT_SKETCH_CAPACITY):
+        """Initialize an empty accumulator.
+
+        Args:
+            sketch_capacity: Capacity of the underlying quantile sketch
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(sketch_capacity)
+
+    def update(self, series: pd.Series):
+        """Fold a chunk of values into the running statistics."""
+        values = series.dropna().to_numpy(dtype=np.float64)
+        if len(values) == 0:
+            return
+        total = values.sum()
+        mean = total / len(values)
+        self._merge_moments(len(values), mean, ((values - mean) ** 2).sum(), values.min(), values.max())
+        self.total += float(total)
+        self.sketch.update(values)
+
+    def merge(self, other: "NumericColumnAccumulator"):
+        """Merge another accumulator into this one."""
+        self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        self.total += other.total
+        self.sketch.merge(other.sketch)
+
+    def _merge_moments(self, count: int, mean: float, m2: float, min_value: float, max_value: float):
+        # Chan et al. parallel update of mean and sum of squared deviations
+        if count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = count, mean, m2
+        else:
+            total = self.count + count
+            delta = mean - self.mean
+            self.mean = self.mean + delta * count / total
+            self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / total
+            self.count = total
+        self.min = min(self.min, min_value)
+        self.max = max(self.max, max_value)
+
+    def describe(self) -> Dict[str, float]:
+        """Return statistics keyed like ``DataFrame.describe()``."""
+        if self.count == 0:
+            stats = {"count": 0.0, "mean": math.nan, "std": math.nan, "min": math.nan}
+            stats.update({f"{int(q * 100)}%": math.nan for q in DESCRIBE_PERCENTILES})
+            stats["max"] = math.nan
+            return stats
+
+        stats = {
+            "count": float(self.count),
+            # Sum / count rather than the running mean so integer columns
+            # match a full load exactly
+            "mean": self.total / self.count,
+            "std": float(math.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else math.nan,
+            "min": float(self.min),
+        }
+        for q in DESCRIBE_PERCENTILES:
+            stats[f"{int(q * 100)}%"] = self.sketch.quantile(q)
+        stats["max"] = float(self.max)
+        return stats
+
+
+def _is_numeric(dtype) -> bool:
+    # Matches the columns DataFrame.describe() picks by default (bools excluded)
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _merge_dtypes(left: Optional[np.dtype], right: np.dtype) -> np.dtype:
+    if left is None or left == right:
+        return right
+    if _is_numeric(left) and _is_numeric(right):
+        return np.result_type(left, right)
+    return np.dtype(object)
+
+
+class SummaryAccumulator:
+    """Accumulate the summary returned by ``DataLoader.get_summary_stats`` chunk by chunk."""
+
+    def __init__(self, sketch_capacity: int = DEFAULT_SKETCH_CAPACITY):
+        """Initialize an empty summary.
+
+        Args:
+            sketch_capacity: Capacity of each numeric column's quantile sketch
+        """
+        self.sketch_capacity = sketch_capacity
+        self.total_rows = 0
+        self.columns: List[str] = []
+        self.missing: Dict[str, int] = {}
+        self.dtypes: Dict[str, np.dtype] = {}
+        self.numeric: Dict[str, NumericColumnAccumulator] = {}
+
+    def update(self, chunk: pd.DataFrame):
+        """Fold a DataFrame chunk into the summary."""
+        self.total_rows += len(chunk)
+        missing = chunk.isnull().sum()
+        for column in chunk.columns:
+            if column not in self.missing:
+                self.columns.append(column)
+                self.missing[column] = 0
+            self.missing[column] += int(missing[column])
+            self.dtypes[column] = _merge_dtypes(self.dtypes.get(column), chunk[column].dtype)
+
+            if not _is_numeric(self.dtypes[column]):
+                # Column turned out to be non-numeric; describe() would skip it
+                self.numeric.pop(column, None)
+                continue
+            if column not in self.numeric:
+                self.numeric[column] = NumericColumnAccumulator(self.sketch_capacity)
+            self.numeric[column].update(chunk[column])
+
+    def merge(self, other: "SummaryAccumulator"):
+        """Merge another summary (e.g. from a different file shard) into this one."""
+        self.total_rows += other.total_rows
+        for column in other.columns:
+            if column not in self.missing:
+                self.columns.append(column)
+                self.missing[column] = 0
+            self.missing[column] += other.missing[column]
+            self.dtypes[column] = _merge_dtypes(self.dtypes.get(column), other.dtypes[column])
+            if not _is_numeric(self.dtypes[column]):
+                self.numeric.pop(column, None)
+            elif column in other.numeric:
+                if column in self.numeric:
+                    self.numeric[column].merge(other.numeric[column])
+                else:
+                    self.numeric[column] = other.numeric[column]
+
+    def to_summary(self) -> Dict[str, Any]:
+        """Return a dictionary shaped like ``DataLoader.get_summary_stats``."""
+        numeric_columns = [c for c in self.columns if c in self.numeric]
+        return {
+            "total_campaigns": self.total_rows,
+            "columns": list(self.columns),
+            "numeric_summary": {c: self.numeric[c].describe() for c in numeric_columns},
+            "missing_values": dict(self.missing),
+            "data_types": {c: str(self.dtypes[c]) for c in self.columns}
+        }
@@ -0,0 +1,263 @@
+"""Tolerant parsing, schema validation and targeted repair of JSON model output."""
+import copy
+import json
+import typing
+from typing import Any, Dict, List, Optional, Tuple, Type
+from langchain_core.messages import BaseMessage
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, ValidationError
+
+# Largest piece of broken text sent to a repair call
+REPAIR_FRAGMENT_CHARS = 2000
+
+
+def strip_code_fences(content: str) -> str:
+    """Return the JSON part of a response, dropping markdown fences and leading prose."""
+    if "```" in content:
+        inner = content.split("```json")[1] if "```json" in content else content.split("```")[1]
+        content = inner.split("```")[0]
+    start = content.find("{")
+    return content[start:] if start != -1 else content.strip()
+
+
+def close_truncated_json(text: str) -> Tuple[Optional[str], int]:
+    """Cut broken or truncated JSON back to its last complete element and close it.
+
+    Scans once, remembering the last point where every element before it was
+    complete (after an opening bracket, before a comma, after a closing
+    bracket). On a syntax error or end of input, the text is cut there and the
+    brackets still open are closed.
+
+    Args:
+        text: JSON text starting with ``{``
+
+    Returns:
+        (repaired text or None if nothing could be salvaged, offset of the cut)
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    safe: Optional[Tuple[int, Tuple[str, ...]]] = None
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+            safe = (i + 1, tuple(stack))
+        elif ch in "}]":
+            if not stack or "{[".index(stack[-1]) != "}]".index(ch):
+                break
+            stack.pop()
+            if not stack:
+                return text[:i + 1], i + 1
+            safe = (i + 1, tuple(stack))
+        elif ch == ",":
+            safe = (i, tuple(stack))
+    if safe is None:
+        return None, 0
+    cut, open_brackets = safe
+    closers = "".join("}" if bracket == "{" else "]" for bracket in reversed(open_brackets))
+    return text[:cut] + closers, cut
+
+
+class ParseOutcome:
+    """Parsed data plus whatever is still wrong with it."""
+
+    def __init__(self, data: Optional[Dict[str, Any]], problems: List[Dict[str, Any]],
+                 salvaged: bool = False, broken_tail: str = ""):
+        """Initialize a parse outcome.
+
+        Args:
+            data: Parsed JSON object (possibly a salvaged prefix), or None
+            problems: Broken parts, each with a ``path``, ``errors`` and current ``value``
+            salvaged: Whether the JSON was cut back to its last complete element
+            broken_tail: Text lost when salvaging, used as context for repairs
+        """
+        self.data = data
+        self.problems = problems
+        self.salvaged = salvaged
+        self.broken_tail = broken_tail
+
+    @property
+    def ok(self) -> bool:
+        """Whether the data is complete and matches the schema."""
+        return self.data is not None and not self.problems and not self.broken_tail
+
+
+class StructuredOutputParser:
+    """Parse a stage's JSON output against a pydantic model, repairing only what is broken."""
+
+    def __init__(self, output_model: Type[BaseModel]):
+        """Initialize the parser.
+
+        Args:
+            output_model: Pydantic model describing the stage output
+        """
+        self.output_model = output_model
+
+    def parse(self, content: str) -> ParseOutcome:
+        """Parse and validate a response, salvaging truncated or malformed JSON."""
+        text = strip_code_fences(content)
+        salvaged, broken_tail = False, ""
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            # Everything before the error position is well formed
+            repaired, cut = close_truncated_json(text[:e.pos])
+            if repaired is None:
+                return ParseOutcome(None, [], broken_tail=text[:REPAIR_FRAGMENT_CHARS])
+            try:
+                data = json.loads(repaired)
+            except json.JSONDecodeError:
+                return ParseOutcome(None, [], broken_tail=text[:REPAIR_FRAGMENT_CHARS])
+            if repaired != text[:cut]:
+                # Brackets had to be closed, so content after the cut was lost
+                salvaged, broken_tail = True, text[cut:cut + REPAIR_FRAGMENT_CHARS]
+        if not isinstance(data, dict):
+            return ParseOutcome(None, [], broken_tail=text[:REPAIR_FRAGMENT_CHARS])
+        if not broken_tail.strip(" \t\r\n,]}"):
+            broken_tail = ""
+        return ParseOutcome(data, self._problems(data), salvaged, broken_tail)
+
+    def _problems(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Group validation errors by the list element or field they belong to."""
+        try:
+            self.output_model.model_validate(data)
+            return []
+        except ValidationError as e:
+            errors = e.errors()
+        problems: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        for error in errors:
+            loc = tuple(error["loc"])
+            path = loc[:2] if len(loc) >= 2 and isinstance(loc[1], int) else loc[:1]
+            problem = problems.setdefault(path, {
+                "path": list(path),
+                "errors": [],
+                "value": _get_path(data, path)
+            })
+            problem["errors"].append(f"{'.'.join(str(p) for p in loc[len(path):]) or 'value'}: {error['msg']}")
+        return list(problems.values())
+
+    def repair_messages(self, outcome: ParseOutcome) -> List[BaseMessage]:
+        """Build a repair request covering only the broken parts of ``outcome``."""
+        parts = []
+        for problem in outcome.problems:
+            schema = self._path_schema(problem["path"])
+            parts.append(json.dumps({
+                "path": problem["path"],
+                "errors": problem["errors"],
+                "current_value": problem["value"],
+                **({"schema": schema} if schema else {})
+            }, ensure_ascii=False, separators=(",", ":")))
+        if outcome.broken_tail:
+            layout = ", ".join(
+                f"{key} ({len(value)} items)" if isinstance(value, list) else key
+                for key, value in (outcome.data or {}).items()
+            )
+            parts.append(
+                f"Parsed so far: {layout or 'nothing'}. The rest was lost to a JSON syntax error or truncation; "
+                "return fixes that add the values it contains (use the next index to append to a list):\n"
+                + outcome.broken_tail
+            )
+
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", """You fix broken parts of a JSON document. You are given only the broken parts, each with its path in the document, the validation errors and its current value.
+
+Return valid JSON only, in this format:
+{{"fixes": [{{"path": ["field", 0], "value": <corrected value for that path>}}]}}
+
+Keep the original content wherever possible; only fix what the errors describe."""),
+            ("human", "Broken parts:\n{problems}")
+        ])
+        return prompt.format_messages(problems="\n\n".join(parts))
+
+    def apply_repair(self, outcome: ParseOutcome, content: str) -> ParseOutcome:
+        """Apply the fixes returned by a repair call and re-validate."""
+        fixes = self.parse_fixes(content)
+        data = copy.deepcopy(outcome.data or {})
+        for fix in fixes:
+            path = fix.get("path") if isinstance(fix, dict) else None
+            if not isinstance(path, list) or not path or "value" not in fix:
+                continue
+            _set_path(data, path, fix["value"])
+        return ParseOutcome(data, self._problems(data), outcome.salvaged)
+
+    @staticmethod
+    def parse_fixes(content: str) -> List[Dict[str, Any]]:
+        """Extract the fix list from a repair response (empty if unusable)."""
+        try:
+            fixes = json.loads(strip_code_fences(content)).get("fixes", [])
+        except (json.JSONDecodeError, AttributeError):
+            return []
+        return fixes if isinstance(fixes, list) else []
+
+    def finalize(self, outcome: ParseOutcome) -> Tuple[Dict[str, Any], int]:
+        """Drop list elements that are still invalid and return the validated output.
+
+        Returns:
+            (validated output, number of elements dropped)
+
+        Raises:
+            ValueError: If the output is still invalid after dropping broken elements
+        """
+        if outcome.data is None:
+            raise ValueError("Response did not contain a JSON object")
+        data = copy.deepcopy(outcome.data)
+        elements = [p["path"] for p in outcome.problems if len(p["path"]) == 2]
+        dropped = 0
+        # Delete from the end so earlier indexes stay valid
+        for field, index in sorted(elements, key=lambda path: path[1], reverse=True):
+            if isinstance(data.get(field), list) and index < len(data[field]):
+                del data[field][index]
+                dropped += 1
+        try:
+            validated = self.output_model.model_validate(data)
+        except ValidationError as e:
+            raise ValueError(f"Response does not match {self.output_model.__name__}: {e}") from e
+        return validated.model_dump(mode="json", exclude_unset=True), dropped
+
+    def _path_schema(self, path: List[Any]) -> Optional[Dict[str, Any]]:
+        """JSON schema of the element or field at ``path``, if it is a model."""
+        field = self.output_model.model_fields.get(path[0])
+        if field is None:
+            return None
+        annotation = field.annotation
+        if len(path) == 2 and typing.get_origin(annotation) in (list, List):
+            annotation = typing.get_args(annotation)[0]
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return annotation.model_json_schema()
+        return None
+
+
+def _get_path(data: Any, path: Tuple[Any, ...]) -> Any:
+    for part in path:
+        try:
+            data = data[part]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
+
+
+def _set_path(data: Dict[str, Any], path: List[Any], value: Any):
+    target: Any = data
+    for part, next_part in zip(path[:-1], path[1:]):
+        child = _get_path(target, (part,))
+        if not isinstance(child, (dict, list)):
+            child = [] if isinstance(next_part, int) else {}
+            _set_path(target, [part], child)
+        target = child
+    last = path[-1]
+    if isinstance(target, list) and isinstance(last, int):
+        if last < len(target):
+            target[last] = value
+        else:
+            target.append(value)
+    elif isinstance(target, dict):
+        target[last] = value
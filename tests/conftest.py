@@ -0,0 +1,7 @@
+"""Make the top-level modules importable and keep tests offline."""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "offline-tests")
@@ -0,0 +1,30 @@
+import threading
+import data_loader
+from data_loader import DataLoader
+from generate_sample_data import generate_sample_data
+
+
+def test_shared_loader_fills_its_caches_once_across_threads(tmp_path, monkeypatch):
+    path = str(tmp_path / "ads.csv")
+    generate_sample_data(200, path)
+    calls = []
+    compute = data_loader.compute_metrics_summary
+    monkeypatch.setattr(data_loader, "compute_metrics_summary", lambda df: calls.append(1) or compute(df))
+
+    loader = DataLoader(path)
+    start = threading.Barrier(8)
+    results = []
+
+    def job():
+        start.wait()
+        results.append((loader.get_metrics_summary(), loader.get_cube(), loader.get_significance_summary(resamples=50)))
+
+    threads = [threading.Thread(target=job) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(result[i] is results[0][i] for result in results for i in range(3))
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+from incremental import IncrementalStore
+
+HEADER = "campaign_id,campaign_type,start_date,end_date,impressions,clicks,conversions,spend_usd,roas\n"
+
+
+def _rows(day, count, start=0):
+    return "".join(f"C{start + i},Conversion,{day},{day},1000,50,5,100.0,2.0\n" for i in range(count))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return IncrementalStore(str(tmp_path / "store.sqlite"))
+
+
+def test_append_reads_only_new_rows(tmp_path, store):
+    path = tmp_path / "ads.csv"
+    path.write_text(HEADER + _rows("2024-03-01", 3))
+    first = store.ingest(str(path))
+    assert (first["mode"], first["new_rows"]) == ("full", 3)
+
+    appended = _rows("2024-03-02", 2, start=3)
+    with open(path, "a") as f:
+        f.write(appended)
+    second = store.ingest(str(path))
+    assert (second["mode"], second["new_rows"]) == ("append", 2)
+    assert second["bytes_read"] == len(appended)
+    assert second["start_watermark"] == "2024-03-02"
+
+    daily = store.daily_totals(str(path))
+    assert daily["rows"].to_dict() == {"2024-03-01": 3.0, "2024-03-02": 2.0}
+    assert daily["revenue_usd"].sum() == pytest.approx(5 * 200.0)
+
+
+def test_nothing_new_reads_nothing(tmp_path, store):
+    path = tmp_path / "ads.csv"
+    path.write_text(HEADER + _rows("2024-03-01", 3))
+    store.ingest(str(path))
+    again = store.ingest(str(path))
+    assert (again["mode"], again["new_rows"], again["bytes_read"]) == ("append", 0, 0)
+
+
+def test_partial_last_row_waits_for_its_newline(tmp_path, store):
+    path = tmp_path / "ads.csv"
+    row = _rows("2024-03-02", 1, start=3)
+    path.write_text(HEADER + _rows("2024-03-01", 3) + row[:10])
+    assert store.ingest(str(path))["new_rows"] == 3
+    with open(path, "a") as f:
+        f.write(row[10:])
+    assert store.ingest(str(path))["new_rows"] == 1
+
+
+def test_rewritten_file_is_rescanned_from_the_watermark_day(tmp_path, store):
+    path = tmp_path / "ads.csv"
+    path.write_text(HEADER + _rows("2024-02-29", 2, start=100) + _rows("2024-03-01", 3))
+    store.ingest(str(path))
+
+    # Re-exported the same day: rows reordered, one more row for the watermark
+    # day, a new day, and a change to an earlier day that stays out of scope
+    old_rows = _rows("2024-03-01", 3).splitlines(keepends=True)
+    path.write_text(HEADER + _rows("2024-02-29", 1, start=100) + "".join(reversed(old_rows))
+                    + _rows("2024-03-01", 1, start=3) + _rows("2024-03-03", 4, start=4))
+    result = store.ingest(str(path))
+    assert (result["mode"], result["new_rows"]) == ("rescan", 8)
+
+    daily = store.daily_totals(str(path))
+    assert daily["rows"].to_dict() == {"2024-02-29": 2.0, "2024-03-01": 4.0, "2024-03-03": 4.0}
+    assert isinstance(daily, pd.DataFrame)
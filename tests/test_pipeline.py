@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from pipeline import Stage, StageResult, run_stages, summarize_timings
+
+
+def _run(stages):
+    async def collect():
+        return [result async for result in run_stages(stages)]
+    return asyncio.run(collect())
+
+
+def test_stages_start_after_their_dependencies_and_get_their_results():
+    async def data():
+        await asyncio.sleep(0.02)
+        return 2
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "slow"
+
+    async def double(data):
+        return data * 2
+
+    async def report(double, slow):
+        return f"{double} {slow}"
+
+    results = {r.name: r for r in _run([
+        Stage("report", report, ["double", "slow"]),
+        Stage("double", double, ["data"]),
+        Stage("data", data),
+        Stage("slow", slow),
+    ])}
+    assert results["report"].value == "4 slow"
+    assert results["double"].started >= results["data"].finished
+    assert results["report"].started >= max(results["double"].finished, results["slow"].finished)
+    # Independent stages overlap
+    assert results["slow"].started < results["data"].finished
+
+
+def test_results_are_yielded_in_completion_order():
+    async def wait(seconds):
+        await asyncio.sleep(seconds)
+
+    names = [r.name for r in _run([Stage("late", lambda: wait(0.05)), Stage("early", lambda: wait(0.01))])]
+    assert names == ["early", "late"]
+
+
+def test_failure_propagates_and_cancels_the_other_stages():
+    cancelled = []
+
+    async def boom():
+        raise RuntimeError("model unavailable")
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def dependent(boom):
+        return boom
+
+    async def main():
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            async for _ in run_stages([Stage("boom", boom), Stage("slow", slow), Stage("after", dependent, ["boom"])]):
+                pass
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(main()) == []
+    assert cancelled == ["slow"]
+
+
+def test_unknown_dependency_is_rejected():
+    async def stage(missing):
+        return missing
+
+    with pytest.raises(ValueError, match="unknown stages"):
+        _run([Stage("report", stage, ["missing"])])
+
+
+def test_summarize_timings_traces_the_critical_path():
+    stages = [Stage("data", None), Stage("insights", None, ["data"]), Stage("overview", None, ["data"]),
+              Stage("report", None, ["insights", "overview"])]
+    results = {
+        "data": StageResult("data", None, 0.0, 1.0),
+        "insights": StageResult("insights", None, 1.0, 4.0),
+        "overview": StageResult("overview", None, 1.0, 2.0),
+        "report": StageResult("report", None, 4.0, 5.0),
+    }
+    timings = summarize_timings(stages, results)
+    assert timings["critical_path"] == ["data", "insights", "report"]
+    assert timings["critical_path_seconds"] == 5.0
+    assert timings["sum_of_stage_seconds"] == 6.0
+    assert timings["concurrency"] == 1.2
+    assert timings["stages"]["insights"] == 3.0
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from langchain_core.messages import HumanMessage
+from fake_llm import FakeChatModel
+from routing import ModelRouter
+
+
+class FlakyChatModel(FakeChatModel):
+    """Fake model that times out while ``failing`` is set."""
+
+    failing: bool = True
+
+    def _generate(self, *args, **kwargs):
+        if self.failing:
+            raise TimeoutError("slow")
+        return super()._generate(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        return self._generate(*args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        if self.failing:
+            raise TimeoutError("slow")
+        yield from super()._stream(*args, **kwargs)
+
+
+@pytest.fixture
+def clients():
+    return {"big": FlakyChatModel(model_name="big"), "small": FakeChatModel(model_name="small")}
+
+
+@pytest.fixture
+def router(clients):
+    return ModelRouter({"insights": "big", "report": "big"}, "big", "small", client_factory=clients.__getitem__)
+
+
+MESSAGES = [HumanMessage(content="hello")]
+
+
+def test_route_picks_stage_model_and_fallback(router):
+    route = router.route("insights repair")
+    assert (route.model, route.fallback) == ("big", "small")
+    assert router.route("creatives").fallback == "small"
+    assert ModelRouter({}, "big", client_factory=lambda model: None).route("insights").fallback is None
+
+
+def test_timeout_falls_back_once(router, clients):
+    response, model = router.invoke(router.route("insights"), MESSAGES)
+    assert model == "small" and response.content
+
+    clients["big"].failing = False
+    assert router.invoke(router.route("insights"), MESSAGES)[1] == "big"
+
+
+def test_async_timeout_falls_back(router):
+    response, model = asyncio.run(router.ainvoke(router.route("insights"), MESSAGES))
+    assert model == "small" and response.content
+
+
+def test_stream_falls_back_before_first_chunk(router):
+    route = router.route("report")
+    text = "".join(chunk.content for chunk in router.stream(route, MESSAGES))
+    assert text and route.model == "small"
+
+
+def test_no_fallback_reraises(clients):
+    router = ModelRouter({}, "big", client_factory=clients.__getitem__)
+    with pytest.raises(TimeoutError):
+        router.invoke(router.route("insights"), MESSAGES)
+
+
+def test_analyst_caches_under_the_answering_model(tmp_path, monkeypatch, router, clients):
+    from agent import AgenticFBAnalyst
+    from generate_sample_data import generate_sample_data
+    from llm_cache import LLMResponseCache
+    from output_schemas import InsightsOutput
+
+    monkeypatch.chdir(tmp_path)
+    generate_sample_data(20, "ads.csv")
+    analyst = AgenticFBAnalyst("ads.csv", use_llm_cache=False, router=router, semantic_cache=False)
+    analyst.llm_cache = LLMResponseCache(str(tmp_path / "llm.sqlite"))
+    messages = analyst._insights_messages("summary", "")
+
+    insights = analyst._invoke_structured("insights", messages, InsightsOutput)
+    assert insights["key_insights"]
+    assert analyst.llm_cache.get(analyst._cache_key(messages, "big")) is None
+    assert analyst.llm_cache.get(analyst._cache_key(messages, "small")) is not None
+
+    # Once the primary recovers it answers instead of the fallback's cached response
+    clients["big"].failing = False
+    assert analyst._invoke("insights", messages).response_metadata["routed_model"] == "big"
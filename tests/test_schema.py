@@ -0,0 +1,46 @@
+import pandas as pd
+from data_loader import DataLoader
+from schema import memory_mb, optimize_dtypes
+
+
+def _frame(rows=2_000):
+    return pd.DataFrame({
+        "campaign_id": [f"CAMP_{i:05d}" for i in range(rows)],
+        "region": ["North", "South", "East", "West"] * (rows // 4),
+        "ad_format": ["Video", "Carousel"] * (rows // 2),
+        "impressions": range(rows),
+        "reach": range(rows),
+        "start_date": ["2024-03-01"] * rows,
+    })
+
+
+def test_repeated_strings_become_categoricals_and_memory_drops():
+    df = _frame()
+    before = memory_mb(df)
+    optimized = optimize_dtypes(df.copy())
+
+    assert isinstance(optimized["region"].dtype, pd.CategoricalDtype)
+    assert isinstance(optimized["ad_format"].dtype, pd.CategoricalDtype)
+    assert str(optimized["impressions"].dtype) == "int32"
+    assert pd.api.types.is_datetime64_any_dtype(optimized["start_date"])
+    assert memory_mb(optimized) < before
+    assert optimized["region"].astype(str).tolist() == df["region"].tolist()
+
+
+def test_opting_out_keeps_parsed_dtypes_with_a_cache(tmp_path):
+    path = tmp_path / "ads.csv"
+    _frame().to_csv(path, index=False)
+    cache_dir = tmp_path / "cache"
+
+    raw = DataLoader(str(path), cache_dir=str(cache_dir), optimize_dtypes=False).load_data()
+    assert not isinstance(raw["ad_format"].dtype, pd.CategoricalDtype)
+    assert not pd.api.types.is_datetime64_any_dtype(raw["start_date"])
+
+    DataLoader(str(path), cache_dir=str(cache_dir)).load_data()
+    raw_again = DataLoader(str(path), cache_dir=str(cache_dir), optimize_dtypes=False).load_data()
+    assert not isinstance(raw_again["ad_format"].dtype, pd.CategoricalDtype)
+
+
+def test_unique_strings_stay_strings():
+    optimized = optimize_dtypes(_frame())
+    assert not isinstance(optimized["campaign_id"].dtype, pd.CategoricalDtype)
@@ -0,0 +1,41 @@
+import pytest
+from semantic_cache import adapt_insights, metric_key
+
+METRICS = {
+    "overall": {"ctr_percent": 2.1, "cpa_usd": 3.34, "roas": 4.2},
+    "segments": {
+        "target_age_group": [
+            {"segment": "18-24", "ctr_percent": 2.6, "cpa_usd": 3.7, "roas": 3.9},
+            {"segment": "25-34", "ctr_percent": 1.9, "cpa_usd": 3.1, "roas": 4.5},
+        ],
+        "target_gender": [{"segment": "All", "ctr_percent": 2.1, "cpa_usd": 3.34, "roas": 4.2}],
+    },
+    "top_performers": [{"campaign": "Bras Conversion Campaign"}],
+}
+
+
+@pytest.mark.parametrize("name, key", [
+    ("CTR", "ctr_percent"), ("CTR (%)", "ctr_percent"), ("Conversion Rate", "conversion_rate_percent"),
+    ("CPA", "cpa_usd"), ("cpa_usd", "cpa_usd"), ("ROAS", "roas"), ("Spend", "spend_usd"), (None, None),
+])
+def test_metric_key_normalizes_model_names(name, key):
+    assert metric_key(name) == key
+
+
+def test_reused_insights_get_this_accounts_values():
+    insights = {
+        "key_insights": [
+            {"insight": "The 18-24 age group has the highest CPA", "metric": "CPA", "value": "12.3"},
+            {"insight": "Overall CTR is healthy", "metric": "CTR", "value": "9.9"},
+            {"insight": "18-24 beats 25-34 on ROAS", "metric": "ROAS", "value": "7.0"},
+        ],
+        "performance_summary": {"top_performers": ["Someone Else's Campaign"]},
+    }
+    adapted = adapt_insights(insights, METRICS)
+    segment, overall, ambiguous = adapted["key_insights"]
+
+    assert segment["value"] == "3.7" and "reused" not in segment
+    assert overall["value"] == "2.1" and "reused" not in overall
+    assert ambiguous["value"] == "7.0" and ambiguous["reused"]
+    assert adapted["performance_summary"]["top_performers"] == ["Bras Conversion Campaign"]
+    assert insights["key_insights"][0]["value"] == "12.3"
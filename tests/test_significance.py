@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+from significance import benjamini_hochberg
+
+
+def test_matches_reference_q_values():
+    # Reference values from R: p.adjust(p, method = "BH")
+    p = np.array([0.01, 0.04, 0.03, 0.005, 0.2])
+    assert benjamini_hochberg(p) == pytest.approx([0.025, 0.05, 0.05, 0.025, 0.2])
+
+
+def test_q_values_are_monotone_in_p_and_capped():
+    p = np.random.default_rng(1).uniform(size=200) ** 2
+    q = benjamini_hochberg(p)
+    order = np.argsort(p)
+    assert np.all(np.diff(q[order]) >= 0)
+    assert np.all(q >= p)
+    assert np.all(q <= 1.0)
+
+
+def test_empty_input():
+    assert len(benjamini_hochberg(np.array([]))) == 0
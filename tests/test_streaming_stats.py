@@ -0,0 +1,91 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from data_loader import DataLoader
+from streaming_stats import QuantileSketch, SummaryAccumulator
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "impressions": rng.integers(0, 100_000, 5_000),
+        "spend_usd": rng.gamma(2.0, 300.0, 5_000).round(2),
+        "campaign_type": rng.choice(["Awareness", "Conversion"], 5_000),
+    })
+    df.loc[::17, "spend_usd"] = np.nan
+    return df
+
+
+def _split(df, parts):
+    bounds = np.linspace(0, len(df), parts + 1).astype(int)
+    return [df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _accumulate(chunks, capacity=100_000):
+    accumulator = SummaryAccumulator(capacity)
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator
+
+
+def test_merged_chunks_match_full_describe(frame):
+    """Accumulators built on separate shards and merged give describe()'s numbers."""
+    shards = _split(frame, 3)
+    merged = _accumulate(shards[:1])
+    for shard in shards[1:]:
+        merged.merge(_accumulate([shard]))
+    summary = merged.to_summary()
+
+    expected = frame.describe(include="number").to_dict()
+    assert summary["total_campaigns"] == len(frame)
+    assert summary["missing_values"] == frame.isnull().sum().to_dict()
+    assert list(summary["numeric_summary"]) == list(expected)
+    for column, stats in expected.items():
+        for stat, value in stats.items():
+            assert summary["numeric_summary"][column][stat] == pytest.approx(value, rel=1e-9), (column, stat)
+
+
+def test_merge_is_order_independent(frame):
+    shards = _split(frame, 4)
+    forward, backward = _accumulate(shards[:1]), _accumulate(shards[-1:])
+    for shard in shards[1:]:
+        forward.merge(_accumulate([shard]))
+    for shard in reversed(shards[:-1]):
+        backward.merge(_accumulate([shard]))
+    backward_summary = backward.to_summary()["numeric_summary"]
+    for column, stats in forward.to_summary()["numeric_summary"].items():
+        assert stats == pytest.approx(backward_summary[column], rel=1e-9)
+
+
+def test_sketch_is_exact_under_capacity_and_close_above():
+    values = np.random.default_rng(3).normal(size=20_000)
+    exact = QuantileSketch(capacity=50_000)
+    exact.update(values)
+    assert exact.is_exact
+    assert exact.quantile(0.5) == pytest.approx(float(np.percentile(values, 50)))
+
+    sketch = QuantileSketch(capacity=1_000)
+    for part in np.array_split(values, 20):
+        sketch.update(part)
+    assert not sketch.is_exact
+    for q in (0.25, 0.5, 0.75):
+        rank = (values < sketch.quantile(q)).mean()
+        assert abs(rank - q) < 0.02
+
+
+def test_single_chunk_stream_matches_full_load(tmp_path, frame):
+    """A file read as one chunk gets exact quantiles even above the sketch capacity."""
+    path = tmp_path / "ads.csv"
+    frame.to_csv(path, index=False)
+    full = DataLoader(str(path)).get_data_for_analysis()
+    streamed = DataLoader(str(path), chunksize=10 ** 9, sketch_capacity=100).get_data_for_analysis()
+    assert streamed == full
+
+
+def test_empty_column_describes_as_nan():
+    summary = _accumulate([pd.DataFrame({"spend_usd": [np.nan, np.nan]})]).to_summary()
+    stats = summary["numeric_summary"]["spend_usd"]
+    assert stats["count"] == 0
+    assert math.isnan(stats["50%"])
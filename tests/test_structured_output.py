@@ -0,0 +1,63 @@
+import json
+from output_schemas import InsightsOutput
+from structured_output import StructuredOutputParser, close_truncated_json
+
+VALID = {
+    "key_insights": [
+        {"insight": "Video converts best", "impact": "high"},
+        {"insight": "18-24 is expensive", "impact": "medium"},
+    ],
+    "opportunities": [{"opportunity": "Scale retargeting"}],
+}
+
+
+def test_close_truncated_json_cuts_back_to_last_complete_element():
+    text = '{"a": [1, 2], "b": [3, {"c": "unfinished'
+    repaired, cut = close_truncated_json(text)
+    assert json.loads(repaired) == {"a": [1, 2], "b": [3, {}]}
+    assert text[:cut] == '{"a": [1, 2], "b": [3, {'
+    assert close_truncated_json('{"a": [1, 2]} trailing') == ('{"a": [1, 2]}', 13)
+
+
+def test_fenced_valid_output_parses_without_repair():
+    outcome = StructuredOutputParser(InsightsOutput).parse("Here you go:\n```json\n" + json.dumps(VALID) + "\n```")
+    assert outcome.ok
+    assert outcome.data == VALID
+
+
+def test_truncated_output_is_salvaged_and_repaired():
+    parser = StructuredOutputParser(InsightsOutput)
+    text = json.dumps(VALID)
+    outcome = parser.parse(text[:text.index("18-24") + 5])
+
+    assert outcome.salvaged and not outcome.ok
+    # The element cut off mid-way is kept empty and reported as a problem
+    assert outcome.data["key_insights"][1] == {}
+    assert [problem["path"] for problem in outcome.problems] == [["key_insights", 1]]
+    assert '"18-24' in outcome.broken_tail
+    request = parser.repair_messages(outcome)[-1].content
+    assert "key_insights (2 items)" in request
+
+    fixes = {"fixes": [
+        {"path": ["key_insights", 1], "value": VALID["key_insights"][1]},
+        {"path": ["opportunities"], "value": VALID["opportunities"]},
+    ]}
+    repaired = parser.apply_repair(outcome, json.dumps(fixes))
+    assert repaired.ok
+    data, dropped = parser.finalize(repaired)
+    assert dropped == 0
+    assert data["key_insights"] == VALID["key_insights"]
+
+
+def test_only_invalid_elements_are_sent_for_repair_and_dropped():
+    parser = StructuredOutputParser(InsightsOutput)
+    broken = {**VALID, "key_insights": [VALID["key_insights"][0], {"impact": "HIGH"}]}
+    outcome = parser.parse(json.dumps(broken))
+
+    assert [problem["path"] for problem in outcome.problems] == [["key_insights", 1]]
+    assert '"current_value":{"impact":"HIGH"}' in parser.repair_messages(outcome)[-1].content
+
+    unrepaired = parser.apply_repair(outcome, "not json")
+    data, dropped = parser.finalize(unrepaired)
+    assert dropped == 1
+    assert [insight["insight"] for insight in data["key_insights"]] == ["Video converts best"]
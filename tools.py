@@ -0,0 +1,345 @@
+"""Data tools the model calls to fetch slices of the ads data on demand, with a per-run budget and cache."""
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from analytics import ADDITIVE_MEASURES, CAMPAIGN_KEYS, RATIO_METRICS, additive_measures, derive_ratios
+from prompt_budget import compact_table, count_tokens
+from schema import DIMENSIONS
+
+# Columns the tools can filter on
+FILTER_COLUMNS = DIMENSIONS + ["campaign_name"]
+
+# Metrics the tools can return and rank by
+METRICS = ADDITIVE_MEASURES + list(RATIO_METRICS)
+
+# Numeric columns filter_describe reports by default
+DESCRIBE_COLUMNS = ["spend_usd", "impressions", "clicks", "conversions", "ctr_percent", "cpc_usd",
+                    "conversion_rate_percent", "cpa_usd", "roas"]
+
+# Column the time windows are cut on
+DATE_COLUMN = "start_date"
+
+FREQUENCIES = {"day": "D", "week": "W-SUN", "month": "M"}
+
+_FILTERS_SCHEMA = {
+    "type": "object",
+    "description": "Keep only rows whose column has one of these values, e.g. "
+                   "{\"product_category\": [\"Bras\"], \"target_gender\": [\"Female\"]}",
+    "properties": {column: {"type": "array", "items": {"type": "string"}} for column in FILTER_COLUMNS},
+    "additionalProperties": False
+}
+
+TOOL_SPECS: List[Dict[str, Any]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "group_by_aggregate",
+            "description": "Totals and ratio metrics (CTR, conversion rate, ROAS, CPC, CPM, CPA) broken down "
+                           "by one or more dimensions, sorted best first.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "group_by": {"type": "array", "items": {"type": "string", "enum": DIMENSIONS},
+                                 "description": "Dimensions to break down by; empty for account totals"},
+                    "filters": _FILTERS_SCHEMA,
+                    "metrics": {"type": "array", "items": {"type": "string", "enum": METRICS},
+                                "description": "Metrics to return (default: all)"},
+                    "sort_by": {"type": "string", "enum": METRICS, "description": "Default: roas"},
+                    "limit": {"type": "integer", "minimum": 1}
+                },
+                "required": ["group_by"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "top_k",
+            "description": "The k best (or worst) campaigns or dimension values by a metric.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "metric": {"type": "string", "enum": METRICS},
+                    "k": {"type": "integer", "minimum": 1},
+                    "level": {"type": "string", "enum": ["campaign"] + DIMENSIONS,
+                              "description": "What to rank (default: campaign)"},
+                    "worst": {"type": "boolean", "description": "Rank worst first instead of best first"},
+                    "min_spend_usd": {"type": "number", "description": "Ignore entries with less spend"},
+                    "filters": _FILTERS_SCHEMA
+                },
+                "required": ["metric"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "filter_describe",
+            "description": "Distribution (count, mean, std, min, quartiles, max) of per-row numeric columns "
+                           "for the rows matching the filters.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "filters": _FILTERS_SCHEMA,
+                    "columns": {"type": "array", "items": {"type": "string"},
+                                "description": f"Numeric columns (default: {', '.join(DESCRIBE_COLUMNS)})"}
+                }
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "time_window_summary",
+            "description": f"Totals and ratio metrics per day, week or month of {DATE_COLUMN} within a date window.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start": {"type": "string", "description": "First date, YYYY-MM-DD (default: earliest)"},
+                    "end": {"type": "string", "description": "Last date, YYYY-MM-DD (default: latest)"},
+                    "freq": {"type": "string", "enum": list(FREQUENCIES), "description": "Default: week"},
+                    "filters": _FILTERS_SCHEMA
+                }
+            }
+        }
+    },
+]
+
+
+class ToolBudgetExceeded(Exception):
+    """Raised when a run has used all of its tool calls."""
+
+
+class DataTools:
+    """Tools backed by a ``DataLoader``: aggregates, rankings, distributions and time windows.
+
+    Results are rendered as compact tables and cached for the rest of the
+    run, so a repeated question is answered without another pass over the
+    DataFrame. Each run gets a fixed number of tool calls.
+    """
+
+    def __init__(self, loader: Any, max_calls: int = 12, max_rows: int = 50, compact: bool = True):
+        """Initialize the tools.
+
+        Args:
+            loader: ``DataLoader`` with the data (loaded on first use)
+            max_calls: Tool calls allowed per run, cached answers included
+            max_rows: Rows returned per result at most
+            compact: Render results as TSV tables instead of JSON
+        """
+        self.loader = loader
+        self.max_calls = max_calls
+        self.max_rows = max_rows
+        self.compact = compact
+        self._tools: Dict[str, Callable[..., List[Dict[str, Any]]]] = {
+            "group_by_aggregate": self.group_by_aggregate,
+            "top_k": self.top_k,
+            "filter_describe": self.filter_describe,
+            "time_window_summary": self.time_window_summary,
+        }
+        self.reset()
+
+    def reset(self):
+        """Start a new run: clear the result cache and the call counters."""
+        self._results: Dict[str, str] = {}
+        self.calls = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.result_tokens = 0
+        self.log: List[Dict[str, Any]] = []
+
+    def overview(self) -> str:
+        """Short description of the dataset for the first prompt: size, dimension values, dates and totals."""
+        cube = self.loader.get_cube()
+        df = self.loader.df if self.loader.df is not None else self.loader.load_data()
+        lines = [f"Rows: {cube.rows}"]
+        if "campaign_id" in df.columns:
+            lines.append(f"Campaigns: {df['campaign_id'].nunique()}")
+        if DATE_COLUMN in df.columns:
+            dates = pd.to_datetime(df[DATE_COLUMN], errors="coerce")
+            lines.append(f"{DATE_COLUMN}: {dates.min():%Y-%m-%d} to {dates.max():%Y-%m-%d}")
+        for dimension in cube.dimensions:
+            lines.append(f"{dimension}: {', '.join(cube.values(dimension))}")
+        totals = cube.query()
+        if totals:
+            lines.append("Account totals: " + ", ".join(f"{metric}={value}" for metric, value in totals[0].items()))
+        lines.append(f"Columns: {', '.join(df.columns)}")
+        return "\n".join(lines)
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the run has used all of its tool calls."""
+        return self.calls >= self.max_calls
+
+    def summary(self) -> Dict[str, Any]:
+        """Calls, cache hits, errors and result tokens of the current run."""
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "result_tokens": self.result_tokens,
+            "max_calls": self.max_calls,
+            "log": list(self.log)
+        }
+
+    def call(self, name: str, args: Optional[Dict[str, Any]] = None, model: Optional[str] = None) -> str:
+        """Run a tool for the model.
+
+        Args:
+            name: Tool name from TOOL_SPECS
+            args: Arguments chosen by the model
+            model: Model whose tokenizer counts the result tokens
+
+        Returns:
+            Result table, or an error message the model can act on
+
+        Raises:
+            ToolBudgetExceeded: If the run has no tool calls left
+        """
+        if self.exhausted:
+            raise ToolBudgetExceeded(f"All {self.max_calls} tool calls of this run are used")
+        self.calls += 1
+        args = dict(args or {})
+        key = f"{name}:{json.dumps(args, sort_keys=True, default=str)}"
+        cached = key in self._results
+        if cached:
+            self.cache_hits += 1
+        else:
+            tool = self._tools.get(name)
+            try:
+                if tool is None:
+                    raise ValueError(f"Unknown tool {name}; available: {', '.join(self._tools)}")
+                self._results[key] = self._render(tool(**args))
+            except (TypeError, ValueError, KeyError) as e:
+                self.errors += 1
+                self._results[key] = f"Error: {e}"
+        result = self._results[key]
+        tokens = count_tokens(result, model)
+        self.result_tokens += tokens
+        self.log.append({"tool": name, "args": args, "cached": cached, "tokens": tokens})
+        return result
+
+    def _render(self, records: List[Dict[str, Any]]) -> str:
+        if not records:
+            return "No rows match."
+        note = ""
+        if len(records) > self.max_rows:
+            note = f"\n({len(records) - self.max_rows} more rows not shown)"
+            records = records[:self.max_rows]
+        if self.compact:
+            return compact_table(records) + note
+        return json.dumps(records, separators=(",", ":"), ensure_ascii=False) + note
+
+    def _frame(self, filters: Optional[Dict[str, Union[str, Sequence[str]]]] = None) -> pd.DataFrame:
+        """Loaded rows matching ``filters``."""
+        df = self.loader.df if self.loader.df is not None else self.loader.load_data()
+        if not filters:
+            return df
+        mask = np.ones(len(df), dtype=bool)
+        for column, values in filters.items():
+            if column not in FILTER_COLUMNS or column not in df.columns:
+                raise ValueError(f"Cannot filter on {column}; use one of {', '.join(FILTER_COLUMNS)}")
+            wanted = [values] if isinstance(values, str) else list(values)
+            mask &= df[column].astype(str).isin([str(v) for v in wanted]).to_numpy()
+        return df[mask]
+
+    @staticmethod
+    def _check_metric(metric: str):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}; use one of {', '.join(METRICS)}")
+
+    def group_by_aggregate(self, group_by: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None,
+                           metrics: Optional[List[str]] = None, sort_by: Optional[str] = None,
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Breakdown by dimensions, answered from the pre-aggregated cube."""
+        unknown = [column for column in (filters or {}) if column not in DIMENSIONS]
+        if not unknown:
+            return self.loader.get_cube().query(group_by, filters, metrics, sort_by, limit)
+        # Filters the cube does not hold (e.g. campaign_name) need the rows
+        totals = self._totals(self._frame(filters), list(group_by or []))
+        return self._records(totals, list(group_by or []), metrics, sort_by or "roas", False, limit)
+
+    def top_k(self, metric: str, k: int = 5, level: str = "campaign", worst: bool = False,
+              min_spend_usd: float = 0.0, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Best (or worst) campaigns or dimension values by ``metric``."""
+        self._check_metric(metric)
+        if level != "campaign" and level not in DIMENSIONS:
+            raise ValueError(f"Unknown level {level}; use campaign or one of {', '.join(DIMENSIONS)}")
+        df = self._frame(filters)
+        keys = [key for key in CAMPAIGN_KEYS if key in df.columns] if level == "campaign" else [level]
+        totals = self._totals(df, keys)
+        if min_spend_usd:
+            totals = totals[totals["spend_usd"] >= min_spend_usd]
+        if level == "campaign" and len(keys) > 1:
+            totals.index = [" / ".join(key) for key in totals.index]
+            keys = ["campaign"]
+        columns = list(dict.fromkeys([metric, "spend_usd", "conversions", "roas", "ctr_percent", "cpa_usd"]))
+        return self._records(totals, keys, columns, metric, worst, k)
+
+    def filter_describe(self, filters: Optional[Dict[str, Any]] = None,
+                        columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Per-row distribution of numeric columns for the matching rows."""
+        df = self._frame(filters)
+        columns = columns or [column for column in DESCRIBE_COLUMNS if column in df.columns]
+        missing = [column for column in columns if column not in df.columns
+                   or not pd.api.types.is_numeric_dtype(df[column])]
+        if missing:
+            raise ValueError(f"Not numeric columns of the data: {', '.join(missing)}")
+        if df.empty:
+            return []
+        stats = df[columns].describe().T
+        return [{"column": column, **{stat: _clean(value) for stat, value in row.items()}}
+                for column, row in stats.iterrows()]
+
+    def time_window_summary(self, start: Optional[str] = None, end: Optional[str] = None, freq: str = "week",
+                            filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Totals and ratios per period of ``DATE_COLUMN`` between ``start`` and ``end``."""
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unknown freq {freq}; use one of {', '.join(FREQUENCIES)}")
+        df = self._frame(filters)
+        if DATE_COLUMN not in df.columns:
+            raise ValueError(f"The data has no {DATE_COLUMN} column")
+        dates = pd.to_datetime(df[DATE_COLUMN], errors="coerce")
+        mask = dates.notna()
+        if start:
+            mask &= dates >= pd.Timestamp(start)
+        if end:
+            mask &= dates <= pd.Timestamp(end)
+        periods = dates[mask].dt.to_period(FREQUENCIES[freq]).dt.start_time.dt.strftime("%Y-%m-%d")
+        totals = derive_ratios(additive_measures(df[mask]).groupby(periods.rename("period")).sum())
+        records = self._records(totals, ["period"], None, None, False, None)
+        return sorted(records, key=lambda record: record["period"])
+
+    @staticmethod
+    def _totals(df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+        measures = additive_measures(df)
+        if not keys:
+            return derive_ratios(measures.sum().to_frame().T)
+        return derive_ratios(measures.groupby([df[key].astype(str) for key in keys], observed=True).sum())
+
+    def _records(self, totals: pd.DataFrame, keys: List[str], metrics: Optional[List[str]],
+                 sort_by: Optional[str], worst: bool, limit: Optional[int]) -> List[Dict[str, Any]]:
+        metrics = list(metrics or METRICS)
+        for metric in metrics + ([sort_by] if sort_by else []):
+            self._check_metric(metric)
+        if sort_by:
+            best_high = RATIO_METRICS.get(sort_by, True)
+            totals = totals.sort_values(sort_by, ascending=best_high == worst, na_position="last")
+        if limit is not None:
+            totals = totals.head(limit)
+        records = []
+        for key, row in totals.iterrows():
+            values = key if isinstance(key, tuple) else (key,)
+            record = dict(zip(keys, values)) if keys else {}
+            record.update({metric: _clean(row[metric]) for metric in metrics})
+            records.append(record)
+        return records
+
+
+def _clean(value: Any) -> Any:
+    """JSON-friendly number: None for NaN, ints for whole counts, floats rounded to 2 places."""
+    if value is None or pd.isna(value):
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
@@ -20,6 +20,30 @@ def main():
         ("main.py", "Main entry point"),
         ("agent.py", "Agentic system"),
         ("data_loader.py", "Data loader"),
+        ("streaming_stats.py", "Streaming summary statistics"),
+        ("schema.py", "Column dtype schema"),
+        ("data_cache.py", "Columnar data cache"),
+        ("pipeline.py", "Async stage pipeline"),
+        ("llm_cache.py", "LLM response cache"),
+        ("analytics.py", "Local metric engine"),
+        ("prompt_budget.py", "Token-budgeted prompt serializer"),
+        ("incremental.py", "Incremental daily aggregate store"),
+        ("io_utils.py", "Atomic file writes"),
+        ("output_schemas.py", "Insights and creatives output models"),
+        ("structured_output.py", "Tolerant JSON parsing and targeted repair"),
+        ("instrumentation.py", "Per-stage metrics recorder"),
+        ("map_reduce.py", "Segment partitioning and insight store"),
+        ("import_profile.py", "Startup and import profiler"),
+        ("checkpoints.py", "Resumable stage checkpoints"),
+        ("routing.py", "Per-stage model routing"),
+        ("semantic_cache.py", "Semantic cache across accounts"),
+        ("significance.py", "Significance tests and anomaly detection"),
+        ("cube.py", "Pre-aggregated query cube"),
+        ("creative_variants.py", "Creative variant dedup and ranking"),
+        ("run_history.py", "Run history store and CLI"),
+        ("tools.py", "Data tools for the insights model"),
+        ("service.py", "Analysis service"),
+        ("load_test.py", "Service load test"),
         ("config.py", "Configuration"),
         ("requirements.txt", "Dependencies"),
         (".gitignore", "Git ignore file"),
@@ -30,6 +54,9 @@ def main():
     optional_files = [
         ("EVAL_CHECKLIST.md", "Evaluation checklist"),
         ("generate_sample_data.py", "Sample data generator"),
+        ("batch.py", "Multi-account batch runner"),
+        ("benchmark.py", "Offline benchmark harness"),
+        ("fake_llm.py", "Local fake chat model"),
         ("setup_github.sh", "GitHub setup script (Linux/Mac)"),
         ("setup_github.ps1", "GitHub setup script (Windows)"),
     ]